@@ -1,34 +1,33 @@
 """Main application entry point."""
 
 import os
-import json
+import threading
+from datetime import datetime, timedelta
 from dash import Dash, html, dcc, Input, Output
 import dash_bootstrap_components as dbc
 from frontend.callbacks.chart import register_chart_callbacks
+from frontend.callbacks.correlation import register_correlation_callbacks, WINDOWS
 from frontend.callbacks.data import register_data_callbacks
-from frontend.callbacks.settings import register_settings_callbacks, load_app_state
+from frontend.callbacks.portfolio import register_portfolio_callbacks
+from frontend.callbacks.screener import register_screener_callbacks
+from frontend.callbacks.settings import register_settings_callbacks
 from frontend.components.settings_modal import create_settings_modal, THEMES, THEME_URLS
-from config.settings import TICKER_LISTS, THEME
+from frontend.components.portfolio_panel import create_portfolio_panel
+from frontend.components.screener_panel import create_screener_panel
+from config.settings import DATA_SETTINGS, TICKER_LISTS, THEME
+from core.state_manager import StateManager
+from core.ticker_manager import TickerManager
+from backend.utils.indicators import PRESETS, parse_indicator
+from backend.utils.instrumentation import instrument_callbacks
+from backend.utils.metrics import register_metrics
 
-# Load saved state and get initial theme
-app_state = load_app_state()
-print("Loaded app_state:", app_state.get('theme'))
-initial_theme = THEME_URLS['DARKLY']  # Default theme
-print("Default theme:", initial_theme)
+# Saved state is read once here and kept by StateManager for the callbacks
+app_state = StateManager.load_state()
 
-if app_state.get('theme'):
-    saved_theme = app_state['theme']
-    print("Found saved theme:", saved_theme)
-    # Validate that the saved theme is in our list of available themes
-    available_themes = [theme['value'] for theme in THEMES]
-    print("Available themes:", available_themes)
-    if saved_theme in available_themes:
-        initial_theme = saved_theme
-        print("Using saved theme:", initial_theme)
-    else:
-        print(f"Saved theme {saved_theme} not found in available themes, using default")
-else:
-    print("No saved theme found, using default")
+# Use the saved theme if it is still one of the available themes
+initial_theme = THEME_URLS['DARKLY']
+if app_state.get('theme') in [theme['value'] for theme in THEMES]:
+    initial_theme = app_state['theme']
 
 # Initialize the Dash app
 app = Dash(
@@ -85,6 +84,7 @@ app.layout = html.Div([
                 html.Label("Selected Tickers", className="mb-2"),
                 dcc.Dropdown(
                     id='ticker-dropdown',
+                    options=TickerManager.get_available_tickers(),
                     multi=True,
                     placeholder="Search and select tickers",
                     className="mb-3 dash-dropdown-dark",
@@ -137,6 +137,47 @@ app.layout = html.Div([
                     persistence_type='local'
                 ),
                 
+                # Normalization Mode
+                dbc.RadioItems(
+                    id='normalize-mode',
+                    options=[
+                        {'label': 'Index (100)', 'value': 'index'},
+                        {'label': 'Change %', 'value': 'percent'},
+                        {'label': 'Log return', 'value': 'log'}
+                    ],
+                    value='index',
+                    inline=True,
+                    className="mb-3",
+                    persistence=True,
+                    persistence_type='local'
+                ),
+                
+                # Normalization Base
+                dbc.RadioItems(
+                    id='normalize-base',
+                    options=[
+                        {'label': 'First visible bar', 'value': 'first'},
+                        {'label': 'Clicked date', 'value': 'clicked'}
+                    ],
+                    value='first',
+                    inline=True,
+                    className="mb-3",
+                    persistence=True,
+                    persistence_type='local'
+                ),
+                
+                # Indicators
+                html.Label("Indicators", className="mb-2"),
+                dcc.Dropdown(
+                    id='indicator-dropdown',
+                    options=[{'label': parse_indicator(spec).label, 'value': spec} for spec in PRESETS],
+                    multi=True,
+                    placeholder="Add indicators",
+                    className="mb-3 dash-dropdown-dark",
+                    persistence=True,
+                    persistence_type='local'
+                ),
+                
                 # Update Button
                 dbc.Button(
                     "Update Data",
@@ -153,36 +194,117 @@ app.layout = html.Div([
             
             # Main content
             dbc.Col([
-                # Chart container
-                html.Div([
-                    dcc.Graph(
-                        id='chart',
-                        style={
-                            "height": "100%",
-                            "width": "100%"
-                        },
-                        config={
-                            'scrollZoom': True,
-                            'showTips': True,
-                            'modeBarButtonsToAdd': ['drawline', 'drawopenpath', 'eraseshape'],
-                            'modeBarButtonsToRemove': ['lasso2d', 'select2d'],
-                            'displaylogo': False
-                        }
-                    )
-                ], id="chart-container", style={
-                    "position": "relative",
-                    "resize": "both",
-                    "overflow": "hidden",
-                    "minHeight": "400px",
-                    "minWidth": "600px",
-                    "height": "80vh",
-                    "width": "100%",
-                    "margin": "1rem",
-                    "padding": "1rem",
-                    "backgroundColor": THEME['sidebar_bg'],
-                    "borderRadius": "10px",
-                    "border": f"1px solid {THEME['border']}"
-                })
+                dbc.Tabs([
+                    dbc.Tab([
+                        # Chart container
+                        html.Div([
+                            dcc.Graph(
+                                id='chart',
+                                style={
+                                    "height": "100%",
+                                    "width": "100%"
+                                },
+                                config={
+                                    'scrollZoom': True,
+                                    'showTips': True,
+                                    'modeBarButtonsToAdd': ['drawline', 'drawopenpath', 'eraseshape'],
+                                    'modeBarButtonsToRemove': ['lasso2d', 'select2d'],
+                                    'displaylogo': False
+                                }
+                            )
+                        ], id="chart-container", style={
+                            "position": "relative",
+                            "resize": "both",
+                            "overflow": "hidden",
+                            "minHeight": "400px",
+                            "minWidth": "600px",
+                            "height": "80vh",
+                            "width": "100%",
+                            "margin": "1rem",
+                            "padding": "1rem",
+                            "backgroundColor": THEME['sidebar_bg'],
+                            "borderRadius": "10px",
+                            "border": f"1px solid {THEME['border']}"
+                        }),
+                
+                        # Selection last loaded by the chart, read by the views below
+                        dcc.Store(id='chart-range'),
+                        # Bars the chart shows, for patching in fetched ones
+                        dcc.Store(id='chart-stream'),
+                
+                        # Draws fetched bars while queued fetches finish
+                        dcc.Interval(
+                            id='fetch-poll',
+                            interval=DATA_SETTINGS['fetch_queue']['poll_ms'],
+                            disabled=True
+                        ),
+                
+                        # Correlation view
+                        html.Div([
+                            dbc.Row([
+                                dbc.Col([
+                                    html.Label("Benchmark", className="mb-2"),
+                                    dcc.Dropdown(
+                                        id='benchmark-dropdown',
+                                        placeholder="Benchmark ticker",
+                                        className="dash-dropdown-dark",
+                                        persistence=True,
+                                        persistence_type='local'
+                                    )
+                                ], width=4),
+                                dbc.Col([
+                                    html.Label("Rolling Window", className="mb-2"),
+                                    dcc.Dropdown(
+                                        id='correlation-window',
+                                        options=[{'label': f"{window} bars", 'value': window} for window in WINDOWS],
+                                        value=WINDOWS[1],
+                                        clearable=False,
+                                        className="dash-dropdown-dark",
+                                        persistence=True,
+                                        persistence_type='local'
+                                    )
+                                ], width=3),
+                                dbc.Col([
+                                    dbc.RadioItems(
+                                        id='correlation-measure',
+                                        options=[
+                                            {'label': 'Correlation', 'value': 'correlation'},
+                                            {'label': 'Covariance', 'value': 'covariance'}
+                                        ],
+                                        value='correlation',
+                                        inline=True,
+                                        persistence=True,
+                                        persistence_type='local'
+                                    )
+                                ], width=5, className="d-flex align-items-end")
+                            ], className="mb-3"),
+                            dbc.Row([
+                                dbc.Col(dcc.Graph(
+                                    id='correlation-heatmap',
+                                    style={"height": "60vh"},
+                                    config={'displaylogo': False}
+                                ), width=5),
+                                dbc.Col(dcc.Graph(
+                                    id='rolling-correlation',
+                                    style={"height": "60vh"},
+                                    config={'displaylogo': False}
+                                ), width=7)
+                            ])
+                        ], id="correlation-container", style={
+                            "margin": "1rem",
+                            "padding": "1rem",
+                            "backgroundColor": THEME['sidebar_bg'],
+                            "borderRadius": "10px",
+                            "border": f"1px solid {THEME['border']}"
+                        })
+                    ], label="Chart", tab_id='chart-tab'),
+                    
+                    # Backtest of weights over the selected tickers
+                    dbc.Tab(create_portfolio_panel(), label="Portfolio", tab_id='portfolio-tab'),
+                    
+                    # Screener over every ticker with local history
+                    dbc.Tab(create_screener_panel(), label="Screener", tab_id='screener-tab')
+                ], id='main-tabs', active_tab='chart-tab')
             ], width=9, className="p-4", style={
                 "backgroundColor": THEME['page_bg'],
                 "height": "100vh",
@@ -208,12 +330,58 @@ app.layout = html.Div([
 
 # Register callbacks
 register_chart_callbacks(app)
+register_correlation_callbacks(app)
 register_data_callbacks(app)
+register_portfolio_callbacks(app)
+register_screener_callbacks(app)
 register_settings_callbacks(app)
 
+# Time every callback; slow ones are logged
+instrument_callbacks(app)
+
+# Prometheus metrics at /metrics
+register_metrics(app)
+
+
+def warm_up() -> None:
+    """Restore the cache snapshot, preload tickers and start the screener."""
+    from backend.data.manager import get_data_manager
+    from backend.data.screener import get_screener
+    from backend.data.snapshot import is_writer_process, warm_start
+    
+    end = datetime.now()
+    start = end - timedelta(days=365)
+    try:
+        if app_state.get('start_date'):
+            start = datetime.strptime(app_state['start_date'], '%Y-%m-%d')
+        if app_state.get('end_date'):
+            end = datetime.strptime(app_state['end_date'], '%Y-%m-%d')
+    except ValueError:
+        pass
+    
+    warm_start(
+        get_data_manager(),
+        app_state.get('selected_tickers', []),
+        app_state.get('interval', '1d'),
+        start,
+        end
+    )
+    
+    # Loading the screener's universe takes seconds, so it runs off the
+    # request path, in one worker; the others load it when first asked
+    if DATA_SETTINGS['screener']['preload'] and is_writer_process():
+        threading.Thread(target=get_screener().refresh, name='screener-load', daemon=True).start()
+
+
 if __name__ == '__main__':
     # Get port from environment or use default
     port = int(os.environ.get('PORT', 8050))
     
-    # Run the app
-    app.run_server(debug=True, host='0.0.0.0', port=port)
+    debug = os.environ.get('DASH_DEBUG', '1') == '1'
+    
+    # With the reloader only the child process serves
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up()
+    
+    # Run the development server; use wsgi.py for production
+    app.run_server(debug=debug, host='0.0.0.0', port=port)
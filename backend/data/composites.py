@@ -0,0 +1,140 @@
+"""Composite index series of the ticker categories.
+
+Every category in TICKER_LISTS gets an equal-weighted and a cap-weighted
+index, stored like any other series under a symbol such as '@Tech:EW'.
+The index return on a date is the weighted mean of the returns of the
+members with a bar on it, each return taken over the member's own
+consecutive bars, so members listing later or trading on other days
+simply join from their next bar. Levels start at 100.
+
+Market capitalizations are not available from the providers, so cap
+weights use each member's average dollar volume (close x volume) over
+the preceding bars as a proxy. Members without volume get no weight; on
+dates none has any, the cap-weighted index falls back to equal weights.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from backend.utils.normalization import align
+from config.settings import DATA_SETTINGS, TICKER_LISTS
+from .resample import OHLCV_COLUMNS
+
+# Composite symbols start with this, which no provider symbol does
+PREFIX = '@'
+
+# Weighting methods and their labels
+METHODS = {
+    'EW': 'equal weight',
+    'CW': 'cap weight'
+}
+
+# Provider name the composite series are stored under
+PROVIDER = 'composite'
+
+
+def composite_symbol(category: str, method: str) -> str:
+    """Symbol of a category index, e.g. '@Tech:EW'."""
+    return f"{PREFIX}{category}:{method}"
+
+
+# Symbol -> (category, method) of every composite
+COMPOSITES: Dict[str, Tuple[str, str]] = {
+    composite_symbol(category, method): (category, method)
+    for category in TICKER_LISTS
+    for method in METHODS
+}
+
+
+def is_composite(ticker: str) -> bool:
+    """Whether a symbol is a category index."""
+    return ticker in COMPOSITES
+
+
+def composite_label(ticker: str) -> str:
+    """Dropdown label of a category index."""
+    category, method = COMPOSITES[ticker]
+    return f"{category} Index, {METHODS[method]}"
+
+
+def members(tickers: List[str]) -> List[str]:
+    """Tickers with every composite replaced by its category's members.
+
+    Order is kept and each ticker appears once.
+    """
+    expanded: Dict[str, None] = {}
+    for ticker in tickers:
+        if is_composite(ticker):
+            expanded.update(dict.fromkeys(TICKER_LISTS[COMPOSITES[ticker][0]]))
+        else:
+            expanded[ticker] = None
+    return list(expanded)
+
+
+def categories_of(tickers) -> List[str]:
+    """Categories with at least one member among the tickers."""
+    tickers = set(tickers)
+    return [category for category, listed in TICKER_LISTS.items() if tickers.intersection(listed)]
+
+
+def _trailing_means(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last `window` values at each position, fewer at the start."""
+    sums = np.cumsum(values)
+    sums[window:] -= sums[:-window].copy()
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+def composite_bars(member_data: Dict[str, pd.DataFrame], window: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Build the index bars of one category.
+
+    Args:
+        member_data: Dictionary mapping the category's tickers to their
+            bars at the base interval
+        window: Bars of dollar volume averaged into a cap weight
+
+    Returns:
+        Dictionary mapping each method in METHODS to OHLCV bars of the
+        index; open, high and low equal the close and volume is the
+        members' total dollar volume
+    """
+    window = window or DATA_SETTINGS['composites']['weight_bars']
+    closes = align(member_data, 'close')
+    if not closes.tickers:
+        return {method: pd.DataFrame(columns=OHLCV_COLUMNS) for method in METHODS}
+    volumes = align(member_data, 'volume')
+
+    shape = closes.values.shape
+    returns = np.full(shape, np.nan)
+    dollar_volume = np.zeros(shape)
+    # Cap weight of each return: dollar volume up to the bar before it
+    weights = np.full(shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for col, ticker in enumerate(closes.tickers):
+            rows = closes.rows[ticker]
+            prices = closes.values[rows, col]
+            returns[rows[1:], col] = prices[1:] / prices[:-1] - 1.0
+            traded = np.nan_to_num(prices * volumes.values[rows, col], nan=0.0, posinf=0.0, neginf=0.0)
+            dollar_volume[rows, col] = traded
+            weights[rows[1:], col] = _trailing_means(traded, window)[:-1]
+
+    valid = np.isfinite(returns)
+    returns = np.where(valid, returns, 0.0)
+    equal = valid.astype(np.float64)
+    cap = np.where(valid & (weights > 0), weights, 0.0)
+    # Dates no member with a return has volume on fall back to equal weights
+    cap = np.where((cap.sum(axis=1) > 0)[:, None], cap, equal)
+
+    index = pd.DatetimeIndex(closes.dates, name='date')
+    total_volume = dollar_volume.sum(axis=1)
+    result = {}
+    for method, weight in (('EW', equal), ('CW', cap)):
+        totals = weight.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily = np.where(totals > 0, (weight * returns).sum(axis=1) / totals, 0.0)
+        level = 100.0 * np.cumprod(1.0 + daily)
+        result[method] = pd.DataFrame(
+            {'open': level, 'high': level, 'low': level, 'close': level, 'volume': total_volume},
+            index=index
+        )[OHLCV_COLUMNS]
+    return result
@@ -44,4 +44,17 @@ class TickerMetadata(Base):
     # Create index for update queries
     __table_args__ = (
         Index('idx_last_update', 'last_update'),
-    ) 
\ No newline at end of file
+    )
+
+
+class EmptyRange(Base):
+    """Model for date ranges a provider returned no bars for."""
+    
+    __tablename__ = 'empty_ranges'
+    
+    ticker = Column(String, primary_key=True)
+    provider = Column(String, primary_key=True)
+    interval = Column(String, primary_key=True)
+    start = Column(DateTime, primary_key=True)
+    end = Column(DateTime, primary_key=True)
+    recorded_at = Column(DateTime, nullable=False)
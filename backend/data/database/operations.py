@@ -1,24 +1,32 @@
 """Database operations for the application."""
 
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
-from sqlalchemy import create_engine, select
+from sqlalchemy import String, create_engine, delete, func, insert, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import text
 from pathlib import Path
 
 from config.settings import DB_SETTINGS
-from .models import Base, TickerData, TickerMetadata
+from .models import Base, EmptyRange, TickerData, TickerMetadata
+from backend.utils.instrumentation import annotate, timed
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
 
 
 class DatabaseOperations:
     """Handles all database operations."""
     
-    def __init__(self):
-        """Initialize database connection."""
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize database connection.
+
+        Args:
+            db_path: SQLite file to use instead of DB_SETTINGS['db_path']
+        """
         # Ensure the parent directory exists
-        db_path = Path(DB_SETTINGS['db_path'])
+        db_path = Path(db_path or DB_SETTINGS['db_path'])
         db_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Create database URL
@@ -39,61 +47,125 @@ class DatabaseOperations:
         ticker: str,
         data: pd.DataFrame,
         interval: str,
-        provider: str
+        provider: str,
+        replace: bool = True,
+        update_metadata: bool = True
     ) -> None:
-        """Save ticker data to database."""
-        session = self.Session()
-        try:
-            # Delete existing data for this ticker and interval
-            session.query(TickerData).filter_by(
-                ticker=ticker,
-                interval=interval
-            ).delete()
-            
-            # Convert DataFrame to database records
-            records = []
-            for idx, row in data.iterrows():
-                record = TickerData(
-                    date=idx,
-                    ticker=ticker,
-                    interval=interval,
-                    open=row['open'],
-                    high=row['high'],
-                    low=row['low'],
-                    close=row['close'],
-                    volume=row['volume']
-                )
-                records.append(record)
-            
-            # Bulk insert records
-            session.bulk_save_objects(records)
-            
-            # Update metadata
-            metadata = session.query(TickerMetadata).filter_by(
-                ticker=ticker,
-                provider=provider,
-                interval=interval
-            ).first()
-            
-            if metadata:
-                metadata.last_update = datetime.now()
-            else:
-                metadata = TickerMetadata(
-                    ticker=ticker,
-                    provider=provider,
-                    interval=interval,
-                    last_update=datetime.now()
-                )
-                session.add(metadata)
-            
-            session.commit()
-            
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        """Save ticker data to database.
+
+        With replace=False only the stored rows inside the date range of
+        the new data are overwritten; the rest of the history is kept.
+        Backfills pass update_metadata=False so they do not count as a
+        refresh of the series.
+        """
+        self.save_ticker_batch(
+            [(ticker, interval, data)],
+            provider,
+            replace=replace,
+            refreshed=[(ticker, interval)] if update_metadata else []
+        )
     
+    @timed('db.save_ticker_batch')
+    def save_ticker_batch(
+        self,
+        frames: List[Tuple[str, str, pd.DataFrame]],
+        provider: str,
+        replace: bool = False,
+        refreshed: Optional[List[Tuple[str, str]]] = None
+    ) -> None:
+        """Save data for many tickers in as few transactions as possible.
+        
+        Frames are written in chunks of DB_SETTINGS['write_batch_size'],
+        one transaction per chunk, and the metadata of every refreshed
+        (ticker, interval) is upserted in the chunk holding its data.
+        """
+        refreshed = list(refreshed or [])
+        if not frames and not refreshed:
+            return
+        
+        now = datetime.now()
+        chunk_size = DB_SETTINGS['write_batch_size']
+        pending = set(refreshed)
+        written = 0
+        
+        for offset in range(0, max(len(frames), 1), chunk_size):
+            chunk = frames[offset:offset + chunk_size]
+            last_chunk = offset + chunk_size >= len(frames)
+            with self.engine.begin() as conn:
+                records = []
+                for ticker, interval, data in chunk:
+                    # Delete existing data for this ticker and interval
+                    existing = delete(TickerData).where(
+                        TickerData.ticker == ticker,
+                        TickerData.interval == interval
+                    )
+                    if not replace:
+                        if data.empty:
+                            continue
+                        existing = existing.where(
+                            TickerData.date >= data.index.min().to_pydatetime(),
+                            TickerData.date <= data.index.max().to_pydatetime()
+                        )
+                    conn.execute(existing)
+                    records.extend(self._to_records(ticker, interval, data))
+                
+                # Bulk insert records
+                if records:
+                    conn.execute(insert(TickerData), records)
+                    written += len(records)
+                
+                # Update metadata together with the data it describes
+                keys = set(pending) if last_chunk else pending & {
+                    (ticker, interval) for ticker, interval, _ in chunk
+                }
+                self._upsert_metadata(conn, keys, provider, now)
+                pending -= keys
+        
+        annotate(rows_written=written)
+    
+    @staticmethod
+    def _upsert_metadata(conn, keys, provider: str, last_update: datetime) -> None:
+        """Insert or refresh the metadata rows of many series at once."""
+        if not keys:
+            return
+        
+        upsert = sqlite_insert(TickerMetadata).values([
+            {
+                'ticker': ticker,
+                'provider': provider,
+                'interval': interval,
+                'last_update': last_update
+            }
+            for ticker, interval in keys
+        ])
+        conn.execute(upsert.on_conflict_do_update(
+            index_elements=['ticker', 'provider', 'interval'],
+            set_={'last_update': upsert.excluded.last_update}
+        ))
+    
+    @staticmethod
+    def _to_records(ticker: str, interval: str, data: pd.DataFrame) -> List[Dict]:
+        """Convert a DataFrame to insert parameters without iterrows."""
+        if data.empty:
+            return []
+        
+        dates = pd.DatetimeIndex(data.index).to_pydatetime()
+        values = data[OHLCV_COLUMNS].to_numpy(dtype=float).tolist()
+        return [
+            {
+                'date': date,
+                'ticker': ticker,
+                'interval': interval,
+                'open': row[0],
+                'high': row[1],
+                'low': row[2],
+                'close': row[3],
+                'volume': row[4]
+            }
+            for date, row in zip(dates, values)
+        ]
+    
+    @timed('db.load_ticker_data')
     def load_ticker_data(
         self,
         ticker: str,
@@ -122,8 +194,303 @@ class DatabaseOperations:
                 parse_dates=['date']
             )
         
+        annotate(rows_read=len(df))
         return df if not df.empty else pd.DataFrame()
     
+    @timed('db.load_ticker_dates')
+    def load_ticker_dates(
+        self,
+        ticker: str,
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> pd.DatetimeIndex:
+        """Load only the stored dates of a ticker."""
+        query = select(TickerData.date).filter_by(
+            ticker=ticker,
+            interval=interval
+        )
+        
+        if start_date:
+            query = query.filter(TickerData.date >= start_date)
+        if end_date:
+            query = query.filter(TickerData.date <= end_date)
+        
+        with self.engine.connect() as conn:
+            dates = conn.execute(query.order_by(TickerData.date)).scalars().all()
+        
+        annotate(rows_read=len(dates))
+        return pd.DatetimeIndex(dates, name='date')
+    
+    @timed('db.load_ticker_batch')
+    def load_ticker_batch(
+        self,
+        tickers: List[str],
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Load data for many tickers with one query per chunk of symbols."""
+        result = {}
+        rows = 0
+        chunk_size = DB_SETTINGS['query_batch_size']
+        
+        for offset in range(0, len(tickers), chunk_size):
+            query = select(
+                TickerData.ticker,
+                TickerData.date,
+                *[getattr(TickerData, column) for column in OHLCV_COLUMNS]
+            ).where(
+                TickerData.ticker.in_(tickers[offset:offset + chunk_size]),
+                TickerData.interval == interval
+            )
+            
+            if start_date:
+                query = query.where(TickerData.date >= start_date)
+            if end_date:
+                query = query.where(TickerData.date <= end_date)
+            
+            query = query.order_by(TickerData.ticker, TickerData.date)
+            
+            with self.engine.connect() as conn:
+                df = pd.read_sql(query, conn, parse_dates=['date'])
+            
+            rows += len(df)
+            for ticker, group in df.groupby('ticker', sort=False):
+                result[ticker] = group.set_index('date')[OHLCV_COLUMNS]
+        
+        annotate(rows_read=rows)
+        return result
+    
+    @timed('db.load_recent_bars')
+    def load_recent_bars(
+        self,
+        interval: str,
+        start_date: datetime,
+        tickers: Optional[List[str]] = None,
+        columns: Tuple[str, ...] = ('high', 'close', 'volume')
+    ) -> pd.DataFrame:
+        """Load bars since a date in long format, for all or some tickers.
+
+        Returns:
+            DataFrame with ticker, date and the requested columns, sorted
+            by ticker and date
+        """
+        # Dates are read as stored text and parsed in one go, much faster
+        # than a datetime object per row for a whole universe
+        fields = [
+            TickerData.ticker,
+            type_coerce(TickerData.date, String).label('date'),
+            *[getattr(TickerData, column) for column in columns]
+        ]
+        rows = []
+        chunk_size = DB_SETTINGS['query_batch_size']
+        chunks = [None] if tickers is None else [
+            tickers[offset:offset + chunk_size] for offset in range(0, len(tickers), chunk_size)
+        ]
+        
+        with self.engine.connect() as conn:
+            for chunk in chunks:
+                query = select(*fields).where(
+                    TickerData.interval == interval,
+                    TickerData.date >= start_date
+                )
+                if chunk is not None:
+                    query = query.where(TickerData.ticker.in_(chunk))
+                rows.extend(conn.execute(query.order_by(TickerData.ticker, TickerData.date)).all())
+        
+        df = pd.DataFrame(rows, columns=['ticker', 'date', *columns])
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+        annotate(rows_read=len(df))
+        return df
+    
+    @timed('db.get_updated_since')
+    def get_updated_since(
+        self,
+        interval: str,
+        since: Optional[datetime] = None
+    ) -> Dict[str, datetime]:
+        """Get the tickers refreshed at or after a time, with their last update."""
+        query = select(TickerMetadata.ticker, func.max(TickerMetadata.last_update)).where(
+            TickerMetadata.interval == interval
+        )
+        if since:
+            query = query.where(TickerMetadata.last_update >= since)
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query.group_by(TickerMetadata.ticker))
+            return {ticker: last_update for ticker, last_update in rows}
+    
+    @timed('db.get_last_updates')
+    def get_last_updates(
+        self,
+        tickers: List[str],
+        provider: str,
+        interval: str
+    ) -> Dict[str, Optional[datetime]]:
+        """Get the last update times of many tickers in one query."""
+        result = dict.fromkeys(tickers)
+        chunk_size = DB_SETTINGS['query_batch_size']
+        
+        with self.engine.connect() as conn:
+            for offset in range(0, len(tickers), chunk_size):
+                rows = conn.execute(
+                    select(TickerMetadata.ticker, TickerMetadata.last_update).where(
+                        TickerMetadata.ticker.in_(tickers[offset:offset + chunk_size]),
+                        TickerMetadata.provider == provider,
+                        TickerMetadata.interval == interval
+                    )
+                )
+                result.update({ticker: last_update for ticker, last_update in rows})
+        
+        return result
+    
+    @timed('db.get_last_dates')
+    def get_last_dates(
+        self,
+        tickers: List[str],
+        interval: str
+    ) -> Dict[str, Optional[datetime]]:
+        """Get the date of the newest stored bar of many tickers."""
+        result = dict.fromkeys(tickers)
+        chunk_size = DB_SETTINGS['query_batch_size']
+        
+        with self.engine.connect() as conn:
+            for offset in range(0, len(tickers), chunk_size):
+                rows = conn.execute(
+                    select(TickerData.ticker, func.max(TickerData.date)).where(
+                        TickerData.ticker.in_(tickers[offset:offset + chunk_size]),
+                        TickerData.interval == interval
+                    ).group_by(TickerData.ticker)
+                )
+                result.update({ticker: last_date for ticker, last_date in rows})
+        
+        return result
+    
+    @timed('db.get_last_bars')
+    def get_last_bars(
+        self,
+        tickers: List[str],
+        interval: str,
+        count: int = 2
+    ) -> Dict[str, List[Tuple[datetime, float]]]:
+        """Get the (date, close) of the newest stored bars of many tickers, newest first."""
+        result: Dict[str, List[Tuple[datetime, float]]] = {ticker: [] for ticker in tickers}
+        chunk_size = DB_SETTINGS['query_batch_size']
+        
+        with self.engine.connect() as conn:
+            for offset in range(0, len(tickers), chunk_size):
+                ranked = select(
+                    TickerData.ticker,
+                    TickerData.date,
+                    TickerData.close,
+                    func.row_number().over(
+                        partition_by=TickerData.ticker,
+                        order_by=TickerData.date.desc()
+                    ).label('rank')
+                ).where(
+                    TickerData.ticker.in_(tickers[offset:offset + chunk_size]),
+                    TickerData.interval == interval
+                ).subquery()
+                rows = conn.execute(
+                    select(ranked.c.ticker, ranked.c.date, ranked.c.close)
+                    .where(ranked.c.rank <= count)
+                    .order_by(ranked.c.ticker, ranked.c.rank)
+                )
+                for ticker, date, close in rows:
+                    result[ticker].append((date, close))
+        
+        return result
+    
+    @timed('db.get_series_extents')
+    def get_series_extents(
+        self,
+        tickers: List[str],
+        interval: str
+    ) -> Dict[str, Optional[Tuple[int, datetime, datetime]]]:
+        """Get the bar count, first and last date of many stored series."""
+        result = dict.fromkeys(tickers)
+        chunk_size = DB_SETTINGS['query_batch_size']
+        
+        with self.engine.connect() as conn:
+            for offset in range(0, len(tickers), chunk_size):
+                rows = conn.execute(
+                    select(
+                        TickerData.ticker,
+                        func.count(),
+                        func.min(TickerData.date),
+                        func.max(TickerData.date)
+                    ).where(
+                        TickerData.ticker.in_(tickers[offset:offset + chunk_size]),
+                        TickerData.interval == interval
+                    ).group_by(TickerData.ticker)
+                )
+                result.update({ticker: (count, first, last) for ticker, count, first, last in rows})
+        
+        return result
+    
+    @timed('db.load_empty_ranges')
+    def load_empty_ranges(
+        self,
+        tickers: List[str],
+        provider: str,
+        interval: str,
+        since: Optional[datetime] = None
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """Get the ranges the provider had no bars for, per ticker.
+        
+        Args:
+            tickers: List of ticker symbols
+            provider: Provider the ranges were asked from
+            interval: Data interval
+            since: Only ranges recorded at or after this time
+        """
+        result: Dict[str, List[Tuple[datetime, datetime]]] = {ticker: [] for ticker in tickers}
+        chunk_size = DB_SETTINGS['query_batch_size']
+        
+        with self.engine.connect() as conn:
+            for offset in range(0, len(tickers), chunk_size):
+                query = select(EmptyRange.ticker, EmptyRange.start, EmptyRange.end).where(
+                    EmptyRange.ticker.in_(tickers[offset:offset + chunk_size]),
+                    EmptyRange.provider == provider,
+                    EmptyRange.interval == interval
+                )
+                if since is not None:
+                    query = query.where(EmptyRange.recorded_at >= since)
+                rows = conn.execute(query)
+                for ticker, start, end in rows:
+                    result[ticker].append((start, end))
+        
+        return result
+    
+    @timed('db.save_empty_ranges')
+    def save_empty_ranges(
+        self,
+        ranges: List[Tuple[str, str, datetime, datetime]],
+        provider: str
+    ) -> None:
+        """Record (ticker, interval, start, end) ranges the provider had no bars for."""
+        if not ranges:
+            return
+        
+        now = datetime.now()
+        upsert = sqlite_insert(EmptyRange).values([
+            {
+                'ticker': ticker,
+                'provider': provider,
+                'interval': interval,
+                'start': start,
+                'end': end,
+                'recorded_at': now
+            }
+            for ticker, interval, start, end in ranges
+        ])
+        with self.engine.begin() as conn:
+            conn.execute(upsert.on_conflict_do_update(
+                index_elements=['ticker', 'provider', 'interval', 'start', 'end'],
+                set_={'recorded_at': upsert.excluded.recorded_at}
+            ))
+    
     def get_last_update(
         self,
         ticker: str,
@@ -142,6 +509,7 @@ class DatabaseOperations:
         finally:
             session.close()
     
+    @timed('db.cleanup_old_data')
     def cleanup_old_data(self, days: int = 30) -> None:
         """Remove data older than specified days."""
         session = self.Session()
@@ -0,0 +1,312 @@
+"""Priority queue of ticker fetches shared by all callbacks.
+
+Fetches run on a few worker threads, most urgent first: tickers already
+drawn in the chart, then tickers the user just added, then background
+refreshes and prefetches. A worker takes a few queued tickers of the
+same priority and interval at once. The provider is still asked once
+per ticker, but their bars are written in one batch, and a category
+index is rebuilt once no member is left in this queue rather than after
+every fetch. A background fetch never takes the last free worker, so an
+interactive fetch waits for at most the provider calls in flight. A
+ticker requested again while still queued keeps one job, moved up if
+the new request is more urgent. Callers ask which tickers are still
+pending and draw whatever has arrived.
+
+Each process of a multi-worker server has its own queue, and a chart
+poll may reach a different worker than the one that queued its fetch.
+So every queued ticker also has a marker file named after the ticker
+and the queuing process, in a directory shared by the workers of one
+database. The marker goes away once the bars are stored and no fetch
+of the ticker is left in that process. A ticker is pending while any
+live process has a marker for it. Markers of processes that died are
+removed by the next reader.
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from backend.utils.instrumentation import span
+from config.settings import DATA_SETTINGS
+from .composites import members
+
+# Priorities, most urgent first
+VISIBLE = 0
+ADDED = 1
+BACKGROUND = 2
+
+
+def _marker_name(key: Tuple[str, str]) -> str:
+    """File name stem of a job key, safe for any ticker spelling."""
+    return hashlib.md5(f'{key[0]}@{key[1]}'.encode()).hexdigest()[:16]
+
+
+def _alive(pid: int) -> bool:
+    """Whether a process is still running; assumed so off POSIX."""
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Job:
+    """A queued fetch of one ticker."""
+
+    __slots__ = ('priority', 'seq', 'start_date', 'end_date')
+
+    def __init__(self, priority: int, seq: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+        self.priority = priority
+        self.seq = seq
+        self.start_date = start_date
+        self.end_date = end_date
+
+
+class FetchQueue:
+    """Fetches tickers on worker threads in priority order."""
+
+    def __init__(self, manager, workers: Optional[int] = None, directory: Optional[Path] = None):
+        """Initialize the queue; workers start with the first job.
+
+        Args:
+            manager: Data manager that fetches and stores the bars
+            workers: Worker threads, from DATA_SETTINGS by default
+            directory: Marker directory shared by the server's workers,
+                the manager's fetch_dir by default
+        """
+        self.manager = manager
+        self.directory = self._open(Path(directory or manager.fetch_dir))
+        self.workers = workers or DATA_SETTINGS['fetch_queue']['workers']
+        self.batch_size = max(1, DATA_SETTINGS['fetch_queue']['batch_size'])
+        # (priority, seq, key) entries; an entry is stale once its job was
+        # moved up or taken
+        self._heap: List[Tuple[int, int, Tuple[str, str]]] = []
+        self._queued: Dict[Tuple[str, str], _Job] = {}
+        # Priorities of the fetches in flight per key; a ticker requested
+        # again during its fetch is fetched once more after it
+        self._running: Dict[Tuple[str, str], List[int]] = {}
+        self._seq = itertools.count()
+        self._changed = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    @staticmethod
+    def _open(directory: Path) -> Optional[Path]:
+        """Create the marker directory; None keeps progress in-process."""
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            # A process that had this pid before left its markers behind
+            for path in directory.glob(f'*.{os.getpid()}'):
+                path.unlink(missing_ok=True)
+            return directory
+        except OSError as e:
+            print(f"Error opening fetch marker directory: {str(e)}")
+            return None
+
+    def _marker(self, key: Tuple[str, str]) -> Path:
+        return self.directory / f'{_marker_name(key)}.{os.getpid()}'
+
+    def _mark(self, key: Tuple[str, str]) -> None:
+        """Show a queued key to the other workers; holds the lock."""
+        if self.directory is None:
+            return
+        try:
+            self._marker(key).touch()
+        except OSError as e:
+            print(f"Error marking fetch of {key[0]}: {str(e)}")
+
+    def _unmark(self, key: Tuple[str, str]) -> None:
+        """Drop the marker of a key with no fetch left; holds the lock."""
+        if self.directory is None or key in self._queued or key in self._running:
+            return
+        try:
+            self._marker(key).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Error clearing fetch of {key[0]}: {str(e)}")
+
+    def _shared(self) -> Set[str]:
+        """Marker names of keys queued by the other live processes."""
+        names = set()
+        if self.directory is None:
+            return names
+        pid = os.getpid()
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return names
+        for entry in entries:
+            name, _, owner = entry.name.rpartition('.')
+            if not owner.isdigit() or int(owner) == pid:
+                continue
+            if not _alive(int(owner)):
+                Path(entry.path).unlink(missing_ok=True)
+                continue
+            names.add(name)
+        return names
+
+    def _key(self, ticker: str, interval: Optional[str]) -> Tuple[str, str]:
+        """Job key of a ticker; derived intervals are fetched as base bars."""
+        return ticker, self.manager._source_interval(interval or DATA_SETTINGS['default_interval'])
+
+    def submit(
+        self,
+        tickers: List[str],
+        interval: Optional[str] = None,
+        priority: int = BACKGROUND,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> None:
+        """Queue fetches of tickers.
+
+        Args:
+            tickers: Tickers to fetch, in the order they should start;
+                category indices queue their members
+            interval: Data interval ('1d', '1wk', '1mo')
+            priority: VISIBLE, ADDED or BACKGROUND
+            start_date: Start of a range to also backfill gaps in
+            end_date: End of that range
+        """
+        with self._changed:
+            for ticker in members(tickers):
+                key = self._key(ticker, interval)
+                job = self._queued.get(key)
+                if job is None:
+                    job = self._queued[key] = _Job(priority, next(self._seq), start_date, end_date)
+                    self._mark(key)
+                else:
+                    # One job backfills the union of the requested ranges
+                    if start_date and (job.start_date is None or start_date < job.start_date):
+                        job.start_date = start_date
+                    if end_date and (job.end_date is None or end_date > job.end_date):
+                        job.end_date = end_date
+                    if priority >= job.priority:
+                        continue
+                    job.priority, job.seq = priority, next(self._seq)
+                heapq.heappush(self._heap, (job.priority, job.seq, key))
+            self._changed.notify_all()
+        self._start()
+
+    def _pending(self, tickers: List[str], interval: Optional[str], shared: Set[str]) -> List[str]:
+        """Tickers with a member still queued or being fetched; holds the lock."""
+        busy = set(self._queued) | set(self._running)
+        pending = []
+        for ticker in tickers:
+            keys = [self._key(member, interval) for member in members([ticker])]
+            if any(key in busy or _marker_name(key) in shared for key in keys):
+                pending.append(ticker)
+        return pending
+
+    def pending(self, tickers: List[str], interval: Optional[str] = None) -> List[str]:
+        """Tickers whose fetch has not finished in any worker process yet."""
+        shared = self._shared()
+        with self._changed:
+            return self._pending(tickers, interval, shared)
+
+    def _start(self) -> None:
+        """Start the worker threads once."""
+        if self._threads:
+            return
+        with self._changed:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'fetch-{i}', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _next(self) -> List[Tuple[Tuple[str, str], _Job]]:
+        """Take the most urgent jobs this worker may run; holds the lock.
+
+        Jobs behind the first are taken while they have its priority and
+        interval, up to batch_size.
+        """
+        while True:
+            batch = []
+            while self._heap and len(batch) < self.batch_size:
+                priority, seq, key = self._heap[0]
+                job = self._queued.get(key)
+                if job is None or job.seq != seq:
+                    heapq.heappop(self._heap)
+                    continue
+                if batch:
+                    if priority != batch[0][1].priority or key[1] != batch[0][0][1]:
+                        break
+                else:
+                    background = sum(running.count(BACKGROUND) for running in self._running.values())
+                    # Keep a worker free for interactive fetches
+                    if priority == BACKGROUND and self.workers > 1 and background >= self.workers - 1:
+                        break
+                heapq.heappop(self._heap)
+                del self._queued[key]
+                self._running.setdefault(key, []).append(priority)
+                batch.append((key, job))
+            if batch:
+                return batch
+            self._changed.wait()
+
+    def _busy(self, batch: List[Tuple[Tuple[str, str], _Job]]) -> List[str]:
+        """Tickers queued or in flight besides the batch; holds the lock."""
+        done = {key for key, _ in batch}
+        busy = {key[0] for key in self._queued}
+        busy.update(
+            key[0] for key, running in self._running.items()
+            if key not in done or len(running) > 1
+        )
+        return list(busy)
+
+    def _run(self) -> None:
+        while True:
+            with self._changed:
+                batch = self._next()
+            interval = batch[0][0][1]
+            tickers = [key[0] for key, _ in batch]
+            # Gaps are backfilled per requested range, one call per range
+            ranges = defaultdict(list)
+            for key, job in batch:
+                if job.start_date and job.end_date:
+                    ranges[(job.start_date, job.end_date)].append(key[0])
+            try:
+                with self.manager.deferred_composites():
+                    with span('fetch_queue.fetch', tickers=len(tickers), priority=batch[0][1].priority):
+                        self.manager.update_ticker_data(tickers, interval)
+                        for (start_date, end_date), backfill in ranges.items():
+                            self.manager.backfill_gaps(backfill, start_date, end_date, interval)
+            except Exception as e:
+                print(f"Error fetching {', '.join(tickers)}: {str(e)}")
+            finally:
+                # Indices are rebuilt before their members stop being
+                # pending, so a caller never draws an index missing them
+                with self._changed:
+                    busy = self._busy(batch)
+                self.manager.flush_composites(busy)
+                with self._changed:
+                    for key, job in batch:
+                        self._running[key].remove(job.priority)
+                        if not self._running[key]:
+                            del self._running[key]
+                        self._unmark(key)
+                    self._changed.notify_all()
+
+
+_queue: Optional[FetchQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_fetch_queue() -> FetchQueue:
+    """Get the fetch queue of the shared data manager."""
+    global _queue
+    if _queue is None:
+        from .manager import get_data_manager
+        with _queue_lock:
+            if _queue is None:
+                _queue = FetchQueue(get_data_manager())
+    return _queue
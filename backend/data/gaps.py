@@ -0,0 +1,82 @@
+"""Detection of missing date ranges in stored series."""
+
+from datetime import time, timedelta
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .market_calendar import DateLike, get_calendar, last_bar_close, period_keys
+
+Gap = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def expected_sessions(
+    ticker: str,
+    start_date: DateLike,
+    end_date: DateLike,
+    now: Optional[DateLike] = None
+) -> pd.DatetimeIndex:
+    """Get the completed sessions a ticker should have bars for.
+
+    The forming session is left out; refreshing it is the job of the
+    staleness policy, not of the backfill.
+    """
+    calendar = get_calendar(ticker)
+    last_close = last_bar_close(ticker, '1d', now)
+    if last_close is None:
+        return pd.DatetimeIndex([], name='date')
+    last_session = last_close.astimezone(calendar.tz).date()
+    if calendar.close_time == time(0):
+        # Midnight closes end the previous day's session
+        last_session -= timedelta(days=1)
+    end = min(pd.Timestamp(end_date).date(), last_session)
+    return calendar.sessions(start_date, end)
+
+
+def find_gaps(
+    stored_dates: pd.DatetimeIndex,
+    expected: pd.DatetimeIndex,
+    interval: str = '1d',
+    merge_within: int = 0
+) -> List[Gap]:
+    """Find the ranges of expected sessions with no stored bar.
+
+    Sessions are compared by the bar they belong to, so a weekly series
+    only misses a week if no bar at all falls into it.
+
+    Args:
+        stored_dates: Dates present in the database
+        expected: Expected session dates, sorted
+        interval: Bar interval ('1d', '1wk', '1mo')
+        merge_within: Merge gaps separated by at most this many sessions
+
+    Returns:
+        List of (first, last) missing sessions, inclusive
+    """
+    if expected.empty:
+        return []
+
+    expected_keys = period_keys(expected, interval)
+    if len(stored_dates):
+        stored = pd.DatetimeIndex(stored_dates)
+        if stored.tz is not None:
+            stored = stored.tz_localize(None)
+        stored_keys = np.unique(period_keys(stored.normalize(), interval))
+        missing = ~np.isin(expected_keys, stored_keys)
+    else:
+        missing = np.ones(len(expected), dtype=bool)
+
+    if merge_within and missing.any():
+        # Fill short runs of present sessions between two missing ones
+        present = ~missing
+        edges = np.diff(np.concatenate(([0], present.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        inner = (starts > 0) & (ends < len(missing)) & (ends - starts <= merge_within)
+        for run_start, run_end in zip(starts[inner], ends[inner]):
+            missing[run_start:run_end] = True
+
+    edges = np.diff(np.concatenate(([0], missing.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return list(zip(expected[starts], expected[ends]))
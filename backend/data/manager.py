@@ -1,28 +1,318 @@
 """Data manager for coordinating data providers and database operations."""
 
+import hashlib
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 import pandas as pd
 
-from .providers import get_provider, DataProvider
+from . import composites
+from .providers import get_provider, fetch_failed, DataProvider
 from .database.operations import DatabaseOperations
-from config.settings import DATA_SETTINGS
+from .market_calendar import stale_tickers
+from .gaps import expected_sessions, find_gaps
+from .resample import derive_levels, levels_start
+from .shared_cache import SharedSeriesCache
+from .validation import SymbolValidator
+from backend.utils.instrumentation import timed
+from backend.utils.metrics import record_cache
+from config.settings import DATA_SETTINGS, DB_SETTINGS, TICKER_LISTS
 
 
 class DataManager:
     """Manages data operations between providers and database."""
     
-    def __init__(self, provider_name: str = None, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        provider_name: str = None,
+        api_key: Optional[str] = None,
+        db_path: Optional[str] = None
+    ):
         """Initialize the data manager.
         
         Args:
             provider_name: Name of the data provider to use
             api_key: API key for the provider if required
+            db_path: SQLite file to use instead of the configured one
         """
         self.provider_name = provider_name or DATA_SETTINGS['default_provider']
         self.provider = get_provider(self.provider_name, api_key)
-        self.db = DatabaseOperations()
+        self.db = DatabaseOperations(db_path)
+        store_path = db_path or DB_SETTINGS['db_path']
+        self.cache = self._shared_cache(store_path)
+        # Markers of queued fetches, seen by every worker of this database
+        self.fetch_dir = Path(DATA_SETTINGS['shared_cache']['dir']) / f"{self._store_key(store_path)}-fetches"
+        self.validator = SymbolValidator(self.provider, self.provider_name)
+        # Recent ranges the provider had no bars for, so they are not asked
+        # again by this process; settled ones are stored in the database
+        self._empty_ranges: Set[Tuple[str, str, pd.Timestamp, pd.Timestamp]] = set()
+        # Indices are rebuilt one at a time, so the last write saw every member
+        self._composite_lock = threading.Lock()
+        # Members changed by threads that defer their index rebuilds, with
+        # the date of their first changed bar
+        self._deferred: Dict[str, Optional[pd.Timestamp]] = {}
+        self._deferred_lock = threading.Lock()
+        self._local = threading.local()
+    
+    @staticmethod
+    def _store_key(db_path: str) -> str:
+        """Name of a database's shared directories, so stores never mix."""
+        return hashlib.md5(str(Path(db_path).resolve()).encode()).hexdigest()[:12]
+    
+    @classmethod
+    def _shared_cache(cls, db_path: str) -> Optional[SharedSeriesCache]:
+        """Open the shared series cache of a database, if enabled."""
+        settings = DATA_SETTINGS['shared_cache']
+        if not settings['enabled']:
+            return None
+        try:
+            return SharedSeriesCache(Path(settings['dir']) / cls._store_key(db_path))
+        except OSError as e:
+            print(f"Error opening shared cache: {str(e)}")
+            return None
+    
+    def _invalidate(self, batch: List[Tuple[str, str, pd.DataFrame]]) -> None:
+        """Drop cached series that a write changed."""
+        if self.cache:
+            self.cache.invalidate({(ticker, interval) for ticker, interval, _ in batch})
+    
+    @staticmethod
+    def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Strip time zones so stored dates are plain session dates."""
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+            df = df.copy()
+            df.index = df.index.tz_localize(None)
+        return df
+    
+    @staticmethod
+    def _source_interval(interval: str) -> str:
+        """Get the interval that is actually fetched for an interval."""
+        if interval in DATA_SETTINGS['derived_intervals']:
+            return DATA_SETTINGS['base_interval']
+        return interval
+    
+    @timed('data.rebuild_derived')
+    def _rebuild_derived(self, tickers: List[str]) -> None:
+        """Rebuild every derived level from the stored base bars."""
+        daily = self.db.load_ticker_batch(tickers, DATA_SETTINGS['base_interval'])
+        batch = [
+            (ticker, level, bars)
+            for ticker, df in daily.items()
+            for level, bars in derive_levels(df, DATA_SETTINGS['derived_intervals']).items()
+        ]
+        self.db.save_ticker_batch(batch, self.provider_name, replace=True)
+        self._invalidate(batch)
+    
+    @contextmanager
+    def deferred_composites(self):
+        """Collect the index changes of this thread until flush_composites.
         
+        Stores made inside the block leave the category indices as they
+        are, so a run of member fetches rebuilds each index once.
+        """
+        self._local.defer = True
+        try:
+            yield
+        finally:
+            self._local.defer = False
+    
+    def _composites_changed(self, changed: Dict[str, Optional[pd.Timestamp]]) -> None:
+        """Rebuild the indices of changed members now or collect them."""
+        if not getattr(self._local, 'defer', False):
+            self._update_composites(changed)
+            return
+        with self._deferred_lock:
+            for ticker, first in changed.items():
+                if not composites.categories_of([ticker]):
+                    continue
+                if ticker not in self._deferred:
+                    self._deferred[ticker] = first
+                elif first is None or self._deferred[ticker] is None:
+                    self._deferred[ticker] = None
+                else:
+                    self._deferred[ticker] = min(first, self._deferred[ticker])
+    
+    def flush_composites(self, busy: Set[str] = frozenset()) -> None:
+        """Rebuild the indices with collected changes.
+        
+        Args:
+            busy: Tickers still being fetched; their categories wait for
+                a later flush so each index is rebuilt once
+        """
+        with self._deferred_lock:
+            blocked = set(composites.categories_of(busy))
+            ready = [c for c in composites.categories_of(self._deferred) if c not in blocked]
+            if not ready:
+                return
+            changed = {
+                ticker: first for ticker, first in self._deferred.items()
+                if any(ticker in TICKER_LISTS[category] for category in ready)
+            }
+            # A member of a waiting category stays for that category too
+            for ticker in changed:
+                if not set(composites.categories_of([ticker])) & blocked:
+                    del self._deferred[ticker]
+        try:
+            self._update_composites(changed, ready)
+        except Exception as e:
+            print(f"Error updating category indices: {str(e)}")
+    
+    @timed('data.update_composites')
+    def _update_composites(
+        self,
+        changed: Dict[str, Optional[pd.Timestamp]],
+        categories: Optional[List[str]] = None
+    ) -> None:
+        """Recompute the category indices of changed base bars.
+        
+        Index levels before the first changed bar of any member stay the
+        same, so only the bars from there on are rewritten.
+        
+        Args:
+            changed: Dictionary mapping member tickers to the date of their
+                first changed bar, or None to rebuild their indices
+            categories: Categories to rebuild, all of the changed members'
+                by default
+        """
+        categories = categories or composites.categories_of(changed)
+        if not categories:
+            return
+        with self._composite_lock:
+            self._write_composites(categories, changed)
+    
+    def _write_composites(self, categories: List[str], changed: Dict[str, Optional[pd.Timestamp]]) -> None:
+        """Rebuild and store the indices of categories; see _update_composites."""
+        base = DATA_SETTINGS['base_interval']
+        symbols = [composites.composite_symbol(c, m) for c in categories for m in composites.METHODS]
+        stored = self.db.get_last_dates(symbols, base)
+        tickers = list(dict.fromkeys(ticker for category in categories for ticker in TICKER_LISTS[category]))
+        daily = self.db.load_ticker_batch(tickers, base)
+        
+        batch = []
+        for category in categories:
+            listed = TICKER_LISTS[category]
+            firsts = [changed[ticker] for ticker in listed if ticker in changed]
+            bars = composites.composite_bars({ticker: daily[ticker] for ticker in listed if ticker in daily})
+            for method, index in bars.items():
+                symbol = composites.composite_symbol(category, method)
+                since = None
+                if stored[symbol] is not None and None not in firsts:
+                    since = min(firsts)
+                    index_bars = index[index.index >= since]
+                else:
+                    index_bars = index
+                batch.append((symbol, base, index_bars))
+                levels = derive_levels(index, DATA_SETTINGS['derived_intervals'], since)
+                batch.extend((symbol, level, level_bars) for level, level_bars in levels.items())
+        
+        self.db.save_ticker_batch(
+            batch,
+            composites.PROVIDER,
+            replace=False,
+            refreshed=[(symbol, interval) for symbol, interval, _ in batch]
+        )
+        self._invalidate(batch)
+    
+    @timed('data.store_batch')
+    def _store_batch(
+        self,
+        frames: List[Tuple[str, pd.DataFrame]],
+        interval: str,
+        refreshed: bool,
+        replace: bool = False
+    ) -> None:
+        """Write fetched bars and the derived levels they touch together.
+        
+        Args:
+            frames: Fetched (ticker, bars) pairs, time zones already stripped;
+                a ticker may appear once per fetched range
+            interval: Interval the bars were fetched at
+            refreshed: Whether the fetch counts as a refresh of the series
+            replace: Whether the bars are the full history, replacing every
+                stored bar of the series and its derived levels
+        """
+        if not frames:
+            return
+        
+        batch = [(ticker, interval, df) for ticker, df in frames]
+        by_ticker: Dict[str, List[pd.DataFrame]] = {}
+        for ticker, df in frames:
+            by_ticker.setdefault(ticker, []).append(df)
+        
+        if interval == DATA_SETTINGS['base_interval']:
+            firsts = {
+                ticker: min(df.index.min() for df in dfs)
+                for ticker, dfs in by_ticker.items()
+            }
+            # First day of the earliest bar of any level that new bars touch;
+            # a week can start in the month before
+            starts = {
+                ticker: levels_start(first, DATA_SETTINGS['derived_intervals'])
+                for ticker, first in firsts.items()
+            }
+            # Replaced series keep none of their stored bars
+            stored = {} if replace else self.db.load_ticker_batch(
+                list(by_ticker),
+                interval,
+                min(starts.values())
+            )
+            for ticker, dfs in by_ticker.items():
+                daily = stored.get(ticker, pd.DataFrame())
+                for df in dfs:
+                    if daily.empty:
+                        daily = df
+                        continue
+                    # New bars replace the stored range they cover
+                    kept = (daily.index < df.index.min()) | (daily.index > df.index.max())
+                    daily = pd.concat([daily[kept], df])
+                daily = daily[daily.index >= starts[ticker]].sort_index()
+                levels = derive_levels(
+                    daily,
+                    DATA_SETTINGS['derived_intervals'],
+                    firsts[ticker]
+                )
+                batch.extend((ticker, level, bars) for level, bars in levels.items())
+        
+        self.db.save_ticker_batch(
+            batch,
+            self.provider_name,
+            replace=replace,
+            refreshed=[(ticker, interval) for ticker in by_ticker] if refreshed else []
+        )
+        self._invalidate(batch)
+        
+        if interval == DATA_SETTINGS['base_interval']:
+            try:
+                self._composites_changed(firsts)
+            except Exception as e:
+                print(f"Error updating category indices: {str(e)}")
+        
+    def find_stale_tickers(self, tickers: List[str], interval: str = None) -> List[str]:
+        """Tickers whose stored series may be missing bars.
+        
+        Category indices are stale when any member is.
+        
+        Args:
+            tickers: List of ticker symbols to check
+            interval: Data interval ('1d', '1wk', '1mo')
+            
+        Returns:
+            The stale tickers, in the given order
+        """
+        interval = self._source_interval(
+            interval or DATA_SETTINGS['default_interval']
+        )
+        listed = composites.members(tickers)
+        last_updates = self.db.get_last_updates(listed, self.provider_name, interval)
+        stale = set(stale_tickers(listed, interval, last_updates))
+        return [
+            ticker for ticker in tickers
+            if stale.intersection(composites.members([ticker]))
+        ]
+    
+    @timed('data.update_ticker_data')
     def update_ticker_data(
         self,
         tickers: List[str],
@@ -31,38 +321,176 @@ class DataManager:
     ) -> None:
         """Update data for given tickers.
         
+        Metadata for all tickers is read with one query and everything
+        fetched is written in one batch at the end. Category indices
+        update their members instead.
+        
         Args:
             tickers: List of ticker symbols to update
             interval: Data interval ('1d', '1wk', '1mo')
-            force: Whether to force update regardless of last update time
+            force: Whether to force update even if no new bar can exist
         """
-        interval = interval or DATA_SETTINGS['default_interval']
+        interval = self._source_interval(
+            interval or DATA_SETTINGS['default_interval']
+        )
+        tickers = composites.members(tickers)
         
+        # Check which tickers need an update
+        if not force:
+            last_updates = self.db.get_last_updates(
+                tickers,
+                self.provider_name,
+                interval
+            )
+            stale = stale_tickers(tickers, interval, last_updates)
+            record_cache('series', hits=len(tickers) - len(stale), misses=len(stale))
+            tickers = stale
+        
+        # Refetch from the bar before the newest stored one; the newest may
+        # still have been forming, the one before is checked for a change
+        # of price basis
+        last_bars = self.db.get_last_bars(tickers, interval, 2)
+        tolerance = DATA_SETTINGS['adjustment_tolerance']
+        
+        frames = []
+        reloaded = []
         for ticker in tickers:
             try:
-                # Check if update is needed
-                if not force:
-                    last_update = self.db.get_last_update(
-                        ticker,
-                        self.provider_name,
-                        interval
-                    )
-                    if last_update and datetime.now() - last_update < timedelta(minutes=DATA_SETTINGS['cache_timeout']):
+                # Fetch new data
+                bars = last_bars.get(ticker) or []
+                start_date = bars[-1][0] if bars else None
+                df = self.provider.fetch_data(
+                    ticker,
+                    interval=interval,
+                    start_date=start_date.strftime('%Y-%m-%d') if start_date else None
+                )
+                if df.empty:
+                    continue
+                df = self._prepare_frame(df)
+                
+                # Yahoo adjusts all earlier bars for a split or dividend, so
+                # appended bars would be on another basis than stored ones
+                if len(bars) == 2:
+                    check_date, stored_close = bars[-1]
+                    fetched_close = df['close'].get(pd.Timestamp(check_date))
+                    if fetched_close is not None and stored_close \
+                            and abs(fetched_close / stored_close - 1) > tolerance:
+                        df = self.provider.fetch_data(ticker, interval=interval)
+                        if not df.empty:
+                            reloaded.append((ticker, self._prepare_frame(df)))
                         continue
+                frames.append((ticker, df))
+            except Exception as e:
+                print(f"Error updating {ticker}: {str(e)}")
+        
+        for stored, replace in ((frames, False), (reloaded, True)):
+            try:
+                self._store_batch(stored, interval, refreshed=True, replace=replace)
+            except Exception as e:
+                print(f"Error saving {', '.join(t for t, _ in stored)}: {str(e)}")
+    
+    @timed('data.backfill_gaps')
+    def backfill_gaps(
+        self,
+        tickers: List[str],
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = None
+    ) -> Dict[str, int]:
+        """Fetch only the date ranges missing from stored series.
+        
+        Category indices backfill their members instead. Ranges the
+        provider answered with no bars, such as holidays missing from the
+        calendar, are recorded and not asked for again until they expire;
+        failed requests are not recorded.
+        
+        Args:
+            tickers: List of ticker symbols to check
+            start_date: Start of the range that should be complete
+            end_date: End of the range that should be complete
+            interval: Data interval ('1d', '1wk', '1mo')
+            
+        Returns:
+            Dictionary mapping tickers to the number of bars backfilled
+        """
+        interval = self._source_interval(
+            interval or DATA_SETTINGS['default_interval']
+        )
+        result = {}
+        frames = []
+        empty = []
+        listed = composites.members(tickers)
+        known_empty = self.db.load_empty_ranges(
+            listed,
+            self.provider_name,
+            interval,
+            since=datetime.now() - timedelta(days=DATA_SETTINGS['empty_range_ttl_days'])
+        )
+        settled = pd.Timestamp.now().normalize() - timedelta(days=DATA_SETTINGS['empty_range_settle_days'])
+        
+        for ticker in listed:
+            result[ticker] = 0
+            try:
+                stored = self.db.load_ticker_dates(
+                    ticker,
+                    interval,
+                    start_date,
+                    end_date
+                )
+                gaps = find_gaps(
+                    stored,
+                    expected_sessions(ticker, start_date, end_date),
+                    interval,
+                    merge_within=DATA_SETTINGS['gap_merge_sessions']
+                )
                 
-                # Fetch new data
-                df = self.provider.fetch_data(ticker, interval=interval)
-                if not df.empty:
-                    self.db.save_ticker_data(
+                for gap_start, gap_end in gaps:
+                    key = (ticker, interval, gap_start, gap_end)
+                    if key in self._empty_ranges or any(
+                        start <= gap_start and gap_end <= end for start, end in known_empty[ticker]
+                    ):
+                        continue
+                    
+                    # Provider end dates are exclusive
+                    df = self.provider.fetch_data(
                         ticker,
-                        df,
-                        interval,
-                        self.provider_name
+                        interval=interval,
+                        start_date=gap_start.strftime('%Y-%m-%d'),
+                        end_date=(gap_end + timedelta(days=1)).strftime('%Y-%m-%d')
                     )
+                    # A failed request says nothing about the range; it is
+                    # asked again next time
+                    if fetch_failed(df):
+                        continue
+                    df = self._prepare_frame(df)
+                    if not df.empty:
+                        df = df[(df.index >= gap_start) & (df.index < gap_end + timedelta(days=1))]
+                    if df.empty:
+                        if gap_end < settled:
+                            empty.append(key)
+                        else:
+                            self._empty_ranges.add(key)
+                        continue
+                    
+                    # Each gap is written on its own so bars between gaps stay
+                    frames.append((ticker, df))
+                    result[ticker] += len(df)
                     
             except Exception as e:
-                print(f"Error updating {ticker}: {str(e)}")
+                print(f"Error backfilling {ticker}: {str(e)}")
+        
+        try:
+            self._store_batch(frames, interval, refreshed=False)
+        except Exception as e:
+            print(f"Error saving backfill for {', '.join(t for t, _ in frames)}: {str(e)}")
+        try:
+            self.db.save_empty_ranges(empty, self.provider_name)
+        except Exception as e:
+            print(f"Error saving empty ranges: {str(e)}")
+        
+        return result
     
+    @timed('data.load_data_for_tickers')
     def load_data_for_tickers(
         self,
         tickers: List[str],
@@ -82,36 +510,82 @@ class DataManager:
             Dictionary mapping tickers to their data DataFrames
         """
         interval = interval or DATA_SETTINGS['default_interval']
-        result = {}
         
-        for ticker in tickers:
-            try:
-                df = self.db.load_ticker_data(
-                    ticker,
-                    interval,
-                    start_date,
-                    end_date
-                )
-                result[ticker] = df
-            except Exception as e:
-                print(f"Error loading {ticker}: {str(e)}")
-                result[ticker] = pd.DataFrame()
+        try:
+            data = {}
+            cached = set()
+            if self.cache:
+                for ticker in tickers:
+                    df = self.cache.get(ticker, interval, start_date, end_date)
+                    if df is not None:
+                        cached.add(ticker)
+                        if not df.empty:
+                            data[ticker] = df
+                record_cache('shared_series', hits=len(cached), misses=len(tickers) - len(cached))
+            
+            missing = [ticker for ticker in tickers if ticker not in cached]
+            if missing:
+                data.update(self._load_stored(missing, interval, start_date, end_date))
+            missing = [ticker for ticker in tickers if ticker not in data]
+            if missing and interval in DATA_SETTINGS['derived_intervals']:
+                # Base bars stored before derived levels existed; a level
+                # with no bars in the range, e.g. before a listing, is fine
+                stored = self.db.get_last_dates(missing, interval)
+                underived = [ticker for ticker in missing if stored[ticker] is None]
+                if underived:
+                    self._rebuild_derived(underived)
+                    data.update(self._load_stored(underived, interval, start_date, end_date))
+            missing = [ticker for ticker in tickers if ticker not in data and composites.is_composite(ticker)]
+            if missing:
+                stored = self.db.get_last_dates(missing, DATA_SETTINGS['base_interval'])
+                unbuilt = [ticker for ticker in missing if stored[ticker] is None]
+                if unbuilt:
+                    # Members stored before the indices existed
+                    self._update_composites(dict.fromkeys(composites.members(unbuilt)))
+                    data.update(self._load_stored(unbuilt, interval, start_date, end_date))
+        except Exception as e:
+            print(f"Error loading {', '.join(tickers)}: {str(e)}")
+            data = {}
+        
+        return {ticker: data.get(ticker, pd.DataFrame()) for ticker in tickers}
+    
+    def _load_stored(
+        self,
+        tickers: List[str],
+        interval: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        """Load series from the database, filling the shared cache."""
+        if not self.cache:
+            return self.db.load_ticker_batch(tickers, interval, start_date, end_date)
         
+        # Whole series go into the cache so any later range is a hit, unless
+        # another worker changed them while they were read
+        versions = {ticker: self.cache.version(ticker, interval) for ticker in tickers}
+        result = {}
+        for ticker, df in self.db.load_ticker_batch(tickers, interval).items():
+            self.cache.put(ticker, interval, df, versions[ticker])
+            df = df.loc[start_date:end_date]
+            if not df.empty:
+                result[ticker] = df
         return result
     
-    def validate_tickers(self, tickers: List[str]) -> Dict[str, bool]:
+    @timed('data.validate_tickers')
+    def validate_tickers(self, tickers: List[str]) -> Dict[str, Optional[bool]]:
         """Validate multiple tickers.
         
+        Known symbols are answered from the local universe and cache;
+        only the rest reach the provider, in one batch.
+        
         Args:
             tickers: List of ticker symbols to validate
             
         Returns:
-            Dictionary mapping tickers to their validity
+            Dictionary mapping tickers to their validity, None where the
+            provider could not be reached
         """
-        return {
-            ticker: self.provider.validate_ticker(ticker)
-            for ticker in tickers
-        }
+        return self.validator.validate(tickers)
     
     def cleanup(self, days: int = 30) -> None:
         """Clean up old data.
@@ -122,4 +596,18 @@ class DataManager:
         try:
             self.db.cleanup_old_data(days)
         except Exception as e:
-            print(f"Error during cleanup: {str(e)}") 
\ No newline at end of file
+            print(f"Error during cleanup: {str(e)}") 
+
+
+_shared_manager: Optional[DataManager] = None
+_shared_lock = threading.Lock()
+
+
+def get_data_manager() -> DataManager:
+    """Get the data manager shared by all callbacks, creating it on first use."""
+    global _shared_manager
+    if _shared_manager is None:
+        with _shared_lock:
+            if _shared_manager is None:
+                _shared_manager = DataManager()
+    return _shared_manager
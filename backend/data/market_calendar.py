@@ -0,0 +1,322 @@
+"""Trading calendars and bar freshness policy."""
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Union
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+WEEKDAYS = '1111100'
+ALL_DAYS = '1111111'
+
+
+def _observed(day: date) -> date:
+    """Shift a weekend holiday to the nearest weekday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """Get the n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Get Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nyse_holidays(year: int) -> List[date]:
+    """Get the full-day NYSE holidays for a year."""
+    days = [
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(date(year, 7, 4)),    # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    ]
+    # New Year's Day falling on a Saturday is not moved back into December
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.append(_observed(new_year))
+    if year >= 2022:
+        days.append(_observed(date(year, 6, 19)))  # Juneteenth
+    return sorted(days)
+
+
+def fixed_holidays(year: int) -> List[date]:
+    """Get the holidays shared by most European and Asian exchanges."""
+    return [
+        day for day in (date(year, 1, 1), date(year, 12, 25))
+        if day.weekday() < 5
+    ]
+
+
+class MarketCalendar:
+    """Trading sessions of a single venue."""
+
+    def __init__(
+        self,
+        name: str,
+        tz: str,
+        open_time: time,
+        close_time: time,
+        weekmask: str = WEEKDAYS,
+        holiday_rule=None
+    ):
+        """Initialize the calendar.
+
+        Args:
+            name: Venue name
+            tz: IANA time zone of the venue
+            open_time: Local session open
+            close_time: Local session close (midnight means end of day)
+            weekmask: Trading weekdays, Monday first
+            holiday_rule: Callable returning the holidays of a year
+        """
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.weekmask = weekmask
+        self.holiday_rule = holiday_rule
+
+    @property
+    def always_open(self) -> bool:
+        """Whether the venue trades around the clock."""
+        return self.weekmask == ALL_DAYS and self.holiday_rule is None
+
+    @lru_cache(maxsize=64)
+    def _holidays(self, start_year: int, end_year: int) -> np.ndarray:
+        """Get holidays between two years as a datetime64 array."""
+        if self.holiday_rule is None:
+            return np.array([], dtype='datetime64[D]')
+        days = [
+            day
+            for year in range(start_year, end_year + 1)
+            for day in self.holiday_rule(year)
+        ]
+        return np.array(days, dtype='datetime64[D]')
+
+    def _busday_args(self, start: np.datetime64, end: np.datetime64) -> Dict:
+        """Get the keyword arguments for NumPy business-day functions."""
+        start_year = start.astype('datetime64[Y]').astype(int) + 1970
+        end_year = end.astype('datetime64[Y]').astype(int) + 1970
+        return {
+            'weekmask': self.weekmask,
+            'holidays': self._holidays(int(start_year) - 1, int(end_year) + 1)
+        }
+
+    def sessions(self, start: DateLike, end: DateLike) -> pd.DatetimeIndex:
+        """Get the session dates between two dates, inclusive."""
+        start_day = np.datetime64(pd.Timestamp(start).date(), 'D')
+        end_day = np.datetime64(pd.Timestamp(end).date(), 'D')
+        if end_day < start_day:
+            return pd.DatetimeIndex([], name='date')
+        days = np.arange(start_day, end_day + 1, dtype='datetime64[D]')
+        mask = np.is_busday(days, **self._busday_args(start_day, end_day))
+        return pd.DatetimeIndex(days[mask], name='date')
+
+    def is_session(self, day: DateLike) -> bool:
+        """Whether the venue trades on a given date."""
+        day = np.datetime64(pd.Timestamp(day).date(), 'D')
+        return bool(np.is_busday(day, **self._busday_args(day, day)))
+
+    def _local(self, day: date, at: time) -> datetime:
+        """Get a venue-local moment as an aware UTC datetime."""
+        if at == time(0) and at == self.close_time:
+            day = day + timedelta(days=1)
+        return datetime.combine(day, at, tzinfo=self.tz).astimezone(timezone.utc)
+
+    def session_close(self, day: DateLike) -> datetime:
+        """Get the close of the session on a given date."""
+        return self._local(pd.Timestamp(day).date(), self.close_time)
+
+    def is_open(self, now: datetime) -> bool:
+        """Whether a session is in progress at a given moment."""
+        if self.always_open:
+            return True
+        local_day = now.astimezone(self.tz).date()
+        if not self.is_session(local_day):
+            return False
+        opens = datetime.combine(local_day, self.open_time, tzinfo=self.tz)
+        return opens <= now < self.session_close(local_day)
+
+    def closes_between(self, start: datetime, end: datetime) -> List[datetime]:
+        """Get the session closes in the half-open range (start, end]."""
+        first = start.astimezone(self.tz).date() - timedelta(days=1)
+        last = end.astimezone(self.tz).date()
+        return [
+            close
+            for close in (self.session_close(day) for day in self.sessions(first, last))
+            if start < close <= end
+        ]
+
+
+CRYPTO = MarketCalendar('CRYPTO', 'UTC', time(0), time(0), weekmask=ALL_DAYS)
+NYSE = MarketCalendar('NYSE', 'America/New_York', time(9, 30), time(16), holiday_rule=nyse_holidays)
+LSE = MarketCalendar('LSE', 'Europe/London', time(8), time(16, 30), holiday_rule=fixed_holidays)
+XETRA = MarketCalendar('XETRA', 'Europe/Berlin', time(9), time(17, 30), holiday_rule=fixed_holidays)
+EURONEXT = MarketCalendar('EURONEXT', 'Europe/Paris', time(9), time(17, 30), holiday_rule=fixed_holidays)
+JPX = MarketCalendar('JPX', 'Asia/Tokyo', time(9), time(15), holiday_rule=fixed_holidays)
+HKEX = MarketCalendar('HKEX', 'Asia/Hong_Kong', time(9, 30), time(16), holiday_rule=fixed_holidays)
+
+# Indices quoted by Yahoo that do not follow the US session
+INDEX_CALENDARS: Dict[str, MarketCalendar] = {
+    '^FTSE': LSE,
+    '^GDAXI': XETRA,
+    '^FCHI': EURONEXT,
+    '^N225': JPX,
+    '^HSI': HKEX
+}
+
+# Exchange suffixes used by Yahoo for foreign listings
+SUFFIX_CALENDARS: Dict[str, MarketCalendar] = {
+    '.L': LSE,
+    '.DE': XETRA,
+    '.PA': EURONEXT,
+    '.AS': EURONEXT,
+    '.T': JPX,
+    '.HK': HKEX
+}
+
+
+def get_calendar(ticker: str) -> MarketCalendar:
+    """Get the trading calendar for a ticker."""
+    ticker = ticker.upper()
+    if ticker.endswith('-USD'):
+        return CRYPTO
+    if ticker in INDEX_CALENDARS:
+        return INDEX_CALENDARS[ticker]
+    for suffix, calendar in SUFFIX_CALENDARS.items():
+        if ticker.endswith(suffix):
+            return calendar
+    return NYSE
+
+
+def _as_utc(moment: DateLike) -> datetime:
+    """Convert a moment to aware UTC; naive values are local time."""
+    if isinstance(moment, pd.Timestamp):
+        moment = moment.to_pydatetime()
+    elif not isinstance(moment, datetime):
+        moment = datetime.combine(pd.Timestamp(moment).date(), time(0))
+    return moment.astimezone(timezone.utc)
+
+
+def period_keys(days: pd.DatetimeIndex, interval: str) -> np.ndarray:
+    """Get the bar each session belongs to for an interval."""
+    values = days.values.astype('datetime64[D]')
+    if interval == '1wk':
+        # Weeks start on Monday; the epoch is a Thursday
+        return (values.astype(np.int64) + 3) // 7
+    if interval == '1mo':
+        return values.astype('datetime64[M]').astype(np.int64)
+    return values.astype(np.int64)
+
+
+def last_bar_close(ticker: str, interval: str, now: Optional[DateLike] = None) -> Optional[datetime]:
+    """Get the moment the most recent complete bar of an interval closed.
+
+    Args:
+        ticker: The ticker symbol
+        interval: Bar interval ('1d', '1wk', '1mo')
+        now: Reference moment, defaults to the current time
+
+    Returns:
+        Aware UTC datetime, or None if no bar closed in the lookback window
+    """
+    calendar = get_calendar(ticker)
+    now = _as_utc(now or datetime.now())
+    today = now.astimezone(calendar.tz).date()
+    days = calendar.sessions(today - timedelta(days=70), today + timedelta(days=40))
+    if days.empty:
+        return None
+    keys = period_keys(days, interval)
+    # The last session of a bar is the one followed by a different bar
+    ends = days[np.append(keys[1:] != keys[:-1], False)]
+    closes = [calendar.session_close(day) for day in ends]
+    closed = [close for close in closes if close <= now]
+    return closed[-1] if closed else None
+
+
+def is_stale(
+    ticker: str,
+    interval: str,
+    last_update: Optional[DateLike],
+    now: Optional[DateLike] = None
+) -> bool:
+    """Check whether a stored series can be out of date.
+
+    A series is stale when a bar of its interval has closed since the last
+    fetch, or when the forming bar has traded and the refresh interval for
+    that bar size has elapsed. Outside trading hours nothing can change, so
+    the series stays fresh however old the fetch is.
+
+    Args:
+        ticker: The ticker symbol
+        interval: Bar interval ('1d', '1wk', '1mo')
+        last_update: Time of the last successful fetch, naive local time
+        now: Reference moment, defaults to the current time
+
+    Returns:
+        Whether the series should be fetched again
+    """
+    if last_update is None:
+        return True
+
+    calendar = get_calendar(ticker)
+    fetched = _as_utc(last_update)
+    now = _as_utc(now or datetime.now())
+
+    bar_close = last_bar_close(ticker, interval, now)
+    if bar_close is not None and bar_close > fetched:
+        return True
+
+    # Only the forming bar can still change
+    traded = calendar.is_open(now) or bool(calendar.closes_between(fetched, now))
+    if not traded:
+        return False
+
+    refresh = DATA_SETTINGS['refresh_intervals'].get(interval, DATA_SETTINGS['cache_timeout'])
+    return now - fetched >= timedelta(seconds=refresh)
+
+
+def stale_tickers(
+    tickers: Iterable[str],
+    interval: str,
+    last_updates: Dict[str, Optional[datetime]],
+    now: Optional[DateLike] = None
+) -> List[str]:
+    """Filter tickers down to those whose stored series is stale."""
+    now = now or datetime.now()
+    return [
+        ticker for ticker in tickers
+        if is_stale(ticker, interval, last_updates.get(ticker), now)
+    ]
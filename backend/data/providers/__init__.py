@@ -1,9 +1,29 @@
 """Data provider interfaces and factory."""
 
+import importlib
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import pandas as pd
 
+# Provider name -> (module, class); modules are imported on first use
+PROVIDERS: Dict[str, tuple] = {
+    'yahoo': ('.yahoo', 'YahooProvider'),
+    'alphavantage': ('.alpha_vantage', 'AlphaVantageProvider'),
+    'replay': ('.replay', 'ReplayProvider')
+}
+
+
+def failed_frame() -> pd.DataFrame:
+    """Empty result of a fetch that failed, unlike a range with no bars."""
+    df = pd.DataFrame()
+    df.attrs['failed'] = True
+    return df
+
+
+def fetch_failed(df: pd.DataFrame) -> bool:
+    """Whether a fetch_data result is empty because the request failed."""
+    return bool(df.attrs.get('failed'))
+
 
 class DataProvider(ABC):
     """Abstract base class for data providers."""
@@ -25,7 +45,9 @@ class DataProvider(ABC):
             end_date: End date for data fetch
             
         Returns:
-            DataFrame with columns: [date, open, high, low, close, volume]
+            DataFrame with columns: [date, open, high, low, close, volume];
+            empty if there are no bars, or failed_frame() if the request
+            failed
         """
         pass
     
@@ -33,20 +55,21 @@ class DataProvider(ABC):
     def validate_ticker(self, ticker: str) -> bool:
         """Validate if a ticker is available in this provider."""
         pass
+    
+    def validate_tickers(self, tickers: List[str]) -> Dict[str, Optional[bool]]:
+        """Validate several tickers, batching requests where supported.
+        
+        Tickers that could not be checked, e.g. on a network error, map
+        to None.
+        """
+        return {ticker: self.validate_ticker(ticker) for ticker in tickers}
 
 
 def get_provider(name: str, api_key: Optional[str] = None) -> DataProvider:
     """Get a data provider instance by name."""
-    from .yahoo import YahooProvider
-    from .alpha_vantage import AlphaVantageProvider
-    
-    providers: Dict[str, type] = {
-        'yahoo': YahooProvider,
-        'alphavantage': AlphaVantageProvider
-    }
-    
-    if name not in providers:
+    if name not in PROVIDERS:
         raise ValueError(f"Unknown provider: {name}")
     
-    provider_class = providers[name]
+    module_name, class_name = PROVIDERS[name]
+    provider_class = getattr(importlib.import_module(module_name, __name__), class_name)
     return provider_class(api_key) if api_key else provider_class() 
\ No newline at end of file
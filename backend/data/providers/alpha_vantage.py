@@ -1,35 +1,120 @@
 """Alpha Vantage data provider implementation."""
 
+from datetime import datetime
+from typing import Optional, Dict
+import numpy as np
 import requests
 import pandas as pd
-from typing import Optional, Dict
-from . import DataProvider
+from config.settings import DATA_SETTINGS
+from . import DataProvider, failed_frame
+from ..symbols import get_registry
+from backend.utils.instrumentation import annotate, timed
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    import json
+    _loads = json.loads
+
+REQUIRED_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Alpha Vantage returns at most this many bars with outputsize=compact
+COMPACT_BARS = 100
+
+
+def loads(payload: bytes) -> Dict:
+    """Decode a JSON response body with the fastest decoder available."""
+    return _loads(payload)
+
+
+def parse_time_series(data: Dict) -> pd.DataFrame:
+    """Build an OHLCV frame from a decoded Alpha Vantage response.
+
+    Dates and values are collected in a single pass over the time-series
+    object and converted to arrays at once, instead of building an
+    object frame and converting it column by column.
+
+    Args:
+        data: Decoded response of a TIME_SERIES_* or DIGITAL_CURRENCY_*
+            function
+
+    Returns:
+        DataFrame indexed by date (ascending) with columns
+        [open, high, low, close, volume]; empty if there is no series
+    """
+    series_key = next((key for key in data if 'Time Series' in key), None)
+    series = data.get(series_key) if series_key else None
+    if not series:
+        return pd.DataFrame()
+
+    # Map '1. open', '1a. open (USD)', ... to the first matching field
+    fields = {}
+    for field in next(iter(series.values())):
+        name = field.split('. ', 1)[-1].split(' (', 1)[0].lower()
+        fields.setdefault(name, field)
+    sources = [fields.get(column) for column in REQUIRED_COLUMNS]
+
+    dates = np.empty(len(series), dtype=object)
+    rows = []
+    for i, (day, bar) in enumerate(series.items()):
+        dates[i] = day
+        rows.append([bar.get(source, 'nan') if source else '0' for source in sources])
+
+    values = np.array(rows, dtype=float)
+    index = pd.DatetimeIndex(dates.astype('datetime64[s]'), name='date')
+
+    # Responses are newest first
+    if len(index) > 1 and index[0] > index[-1]:
+        index = index[::-1]
+        values = values[::-1]
+    elif not index.is_monotonic_increasing:
+        order = np.argsort(index.values, kind='stable')
+        index = index[order]
+        values = values[order]
+
+    return pd.DataFrame(values, index=index, columns=REQUIRED_COLUMNS)
+
+
+def estimated_bars(start_date: Optional[str], interval: str) -> Optional[int]:
+    """Estimate how many bars a fetch starting at a date returns."""
+    if not start_date:
+        return None
+    days = (datetime.now() - pd.to_datetime(start_date)).days + 1
+    if interval == '1wk':
+        return days // 7 + 1
+    if interval == '1mo':
+        return days // 30 + 1
+    # Calendar days are an upper bound on trading days
+    return days
 
 
 class AlphaVantageProvider(DataProvider):
     """Alpha Vantage data provider."""
-    
-    BASE_URL = "https://www.alphavantage.co/query"
-    
+
+    # Points at the replay server when ALPHA_VANTAGE_URL is set
+    BASE_URL = DATA_SETTINGS['alphavantage_url']
+
     INTERVALS = {
         '1d': 'Daily',
         '1wk': 'Weekly',
         '1mo': 'Monthly'
     }
-    
+
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the Alpha Vantage provider."""
         self.api_key = api_key
         if not api_key:
             raise ValueError("API key is required for Alpha Vantage")
-    
+
     def _make_request(self, params: Dict) -> Dict:
         """Make a request to Alpha Vantage API."""
         params['apikey'] = self.api_key
         response = requests.get(self.BASE_URL, params=params)
         response.raise_for_status()
-        return response.json()
-    
+        return loads(response.content)
+
+    @timed('provider.alphavantage.fetch_data')
     def fetch_data(
         self,
         ticker: str,
@@ -42,57 +127,57 @@ class AlphaVantageProvider(DataProvider):
             # Validate interval
             if interval not in self.INTERVALS:
                 raise ValueError(f"Invalid interval: {interval}")
-            
-            # Prepare request parameters
-            function = f"TIME_SERIES_{self.INTERVALS[interval]}"
-            params = {
-                'function': function,
-                'symbol': ticker,
-                'outputsize': 'full'
-            }
-            
+
+            # Short incremental updates fit in a compact response
+            bars = estimated_bars(start_date, interval)
+            outputsize = 'compact' if bars is not None and bars < COMPACT_BARS else 'full'
+
+            # Prepare request parameters; crypto pairs have their own series
+            registry = get_registry()
+            if registry.is_crypto(ticker):
+                base, market = registry.pair(ticker)
+                params = {
+                    'function': f"DIGITAL_CURRENCY_{self.INTERVALS[interval].upper()}",
+                    'symbol': base,
+                    'market': market
+                }
+            else:
+                params = {
+                    'function': f"TIME_SERIES_{self.INTERVALS[interval].upper()}",
+                    'symbol': registry.provider_symbol(ticker, 'alphavantage'),
+                    'outputsize': outputsize
+                }
+
             # Make request
             data = self._make_request(params)
-            
+
             # Parse response
-            time_series_key = [k for k in data.keys() if 'Time Series' in k][0]
-            df = pd.DataFrame.from_dict(data[time_series_key], orient='index')
-            
-            # Clean column names
-            df.columns = [col.split('. ')[1].lower() for col in df.columns]
-            df.index = pd.to_datetime(df.index)
-            df.index.name = 'date'
-            
-            # Convert values to float
-            for col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
+            df = parse_time_series(data)
+            if df.empty:
+                raise ValueError(data.get('Note') or data.get('Error Message') or "No time series in response")
+
             # Filter by date if provided
             if start_date:
                 df = df[df.index >= pd.to_datetime(start_date)]
             if end_date:
                 df = df[df.index <= pd.to_datetime(end_date)]
-            
-            # Ensure all required columns exist
-            required_columns = ['open', 'high', 'low', 'close', 'volume']
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = 0
-            
-            return df[required_columns]
-            
+
+            return df
+
         except Exception as e:
+            annotate(failed=True)
             print(f"Error fetching data for {ticker}: {str(e)}")
-            return pd.DataFrame()
-    
-    def validate_ticker(self, ticker: str) -> bool:
-        """Validate if a ticker exists on Alpha Vantage."""
+            return failed_frame()
+
+    @timed('provider.alphavantage.validate_ticker')
+    def validate_ticker(self, ticker: str) -> Optional[bool]:
+        """Validate if a ticker exists on Alpha Vantage; None if the request failed."""
         try:
             params = {
                 'function': 'GLOBAL_QUOTE',
-                'symbol': ticker
+                'symbol': get_registry().provider_symbol(ticker, 'alphavantage')
             }
             data = self._make_request(params)
-            return 'Global Quote' in data and data['Global Quote']
-        except:
-            return False 
\ No newline at end of file
+            return bool(data.get('Global Quote'))
+        except Exception:
+            return None
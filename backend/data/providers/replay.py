@@ -0,0 +1,247 @@
+"""Replay provider serving recorded or generated data offline."""
+
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+from . import DataProvider, failed_frame
+from backend.utils.instrumentation import annotate, timed
+from backend.utils.metrics import record_rate_limit_wait
+from .alpha_vantage import REQUIRED_COLUMNS, loads, parse_time_series
+from ..synthetic import generate_series
+
+
+def _stem(ticker: str) -> str:
+    """Get a file-name-safe stem for a ticker."""
+    return ticker.replace('^', '_').replace('/', '_')
+
+
+class ThrottledError(Exception):
+    """Raised when a replayed request is rejected by the rate limit."""
+
+
+class FaultInjector:
+    """Adds latency, random errors and rate limiting to replayed calls."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_calls: int = 0,
+        throttle_period: float = 60.0,
+        throttle_mode: str = 'wait',
+        seed: Optional[int] = None
+    ):
+        """Initialize the injector.
+
+        Args:
+            latency_ms: Base latency added to every call
+            jitter_ms: Upper bound of uniform extra latency
+            error_rate: Probability that a call fails
+            throttle_calls: Calls allowed per period, 0 for no limit
+            throttle_period: Length of the rate limit window in seconds
+            throttle_mode: 'wait' to delay calls over the limit, 'reject'
+                to fail them the way Alpha Vantage does
+            seed: Seed for reproducible latency and errors
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_calls = throttle_calls
+        self.throttle_period = throttle_period
+        self.throttle_mode = throttle_mode
+        self._random = random.Random(seed)
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'errors': 0, 'throttled': 0, 'throttle_wait': 0.0}
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'FaultInjector':
+        """Create an injector from a DATA_SETTINGS['replay']-style dict."""
+        return cls(
+            latency_ms=settings.get('latency_ms', 0.0),
+            jitter_ms=settings.get('jitter_ms', 0.0),
+            error_rate=settings.get('error_rate', 0.0),
+            throttle_calls=settings.get('throttle_calls', 0),
+            throttle_period=settings.get('throttle_period', 60.0),
+            throttle_mode=settings.get('throttle_mode', 'wait'),
+            seed=settings.get('seed')
+        )
+
+    def _throttle(self) -> float:
+        """Apply the rate limit and return the time waited in seconds."""
+        if not self.throttle_calls:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.throttle_period:
+                self._calls.popleft()
+            wait = 0.0
+            if len(self._calls) >= self.throttle_calls:
+                if self.throttle_mode == 'reject':
+                    self.stats['throttled'] += 1
+                    raise ThrottledError("Rate limit exceeded")
+                wait = self._calls[0] + self.throttle_period - now
+                self.stats['throttled'] += 1
+                self.stats['throttle_wait'] += wait
+            self._calls.append(now + wait)
+        if wait > 0:
+            record_rate_limit_wait('replay', wait)
+            time.sleep(wait)
+        return wait
+
+    def apply(self) -> None:
+        """Run the faults for one call; raises on injected errors."""
+        with self._lock:
+            self.stats['calls'] += 1
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            failed = self._random.random() < self.error_rate
+        self._throttle()
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if failed:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise ConnectionError("Injected replay error")
+
+
+class ReplaySource:
+    """Recorded series on disk, with generated series for the rest."""
+
+    def __init__(self, recordings_dir: Optional[Path] = None, seed: int = 0, years: float = 10):
+        """Initialize the source.
+
+        Args:
+            recordings_dir: Directory of `<ticker>_<interval>.csv` (OHLCV
+                with a date column) or `.json` (raw Alpha Vantage bodies)
+            seed: Base seed for generated series
+            years: History length of generated series
+        """
+        self.recordings_dir = Path(recordings_dir) if recordings_dir else None
+        self.seed = seed
+        self.years = years
+        self._frames: Dict[tuple, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str, interval: str, suffix: str) -> Optional[Path]:
+        """Get the recording file of a series if it exists."""
+        if not self.recordings_dir:
+            return None
+        path = self.recordings_dir / f"{_stem(ticker)}_{interval}{suffix}"
+        return path if path.exists() else None
+
+    def _load_recording(self, ticker: str, interval: str) -> Optional[pd.DataFrame]:
+        """Load a recorded series, CSV first."""
+        path = self._path(ticker, interval, '.csv')
+        if path:
+            df = pd.read_csv(path, index_col='date', parse_dates=['date'])
+            return df[REQUIRED_COLUMNS].sort_index()
+        path = self._path(ticker, interval, '.json')
+        if path:
+            return parse_time_series(loads(path.read_bytes()))
+        return None
+
+    def _generate(self, ticker: str, interval: str) -> pd.DataFrame:
+        """Generate a deterministic synthetic series ending today."""
+        return generate_series(ticker, interval, years=self.years, seed=self.seed)
+
+    def series(self, ticker: str, interval: str) -> pd.DataFrame:
+        """Get the full series of a ticker."""
+        key = (ticker, interval)
+        with self._lock:
+            if key not in self._frames:
+                df = self._load_recording(ticker, interval)
+                self._frames[key] = df if df is not None else self._generate(ticker, interval)
+            return self._frames[key]
+
+    def has_recording(self, ticker: str) -> bool:
+        """Whether any interval of a ticker was recorded."""
+        return bool(self.recordings_dir) and any(self.recordings_dir.glob(f"{_stem(ticker)}_*"))
+
+
+class ReplayProvider(DataProvider):
+    """Data provider answering from recordings instead of the network."""
+
+    INTERVALS = ['1d', '1wk', '1mo']
+
+    def __init__(self, api_key: Optional[str] = None, settings: Optional[Dict] = None):
+        """Initialize the replay provider.
+
+        Args:
+            api_key: Ignored, accepted for interface compatibility
+            settings: Overrides for DATA_SETTINGS['replay']
+        """
+        settings = {**DATA_SETTINGS['replay'], **(settings or {})}
+        self.source = ReplaySource(
+            settings.get('recordings_dir'),
+            settings.get('seed') or 0,
+            settings.get('years', 10)
+        )
+        self.faults = FaultInjector.from_settings(settings)
+        self.generate_missing = settings.get('generate_missing', True)
+
+    @timed('provider.replay.fetch_data')
+    def fetch_data(
+        self,
+        ticker: str,
+        interval: str = '1d',
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Replay data for a ticker."""
+        try:
+            if interval not in self.INTERVALS:
+                raise ValueError(f"Invalid interval: {interval}")
+            self.faults.apply()
+
+            if not self.generate_missing and not self.source.has_recording(ticker):
+                return pd.DataFrame()
+            df = self.source.series(ticker, interval)
+
+            # Same bounds as Yahoo: start inclusive, end exclusive
+            if start_date:
+                df = df[df.index >= pd.to_datetime(start_date)]
+            if end_date:
+                df = df[df.index < pd.to_datetime(end_date)]
+            return df.copy()
+
+        except Exception as e:
+            annotate(failed=True)
+            print(f"Error fetching data for {ticker}: {str(e)}")
+            return failed_frame()
+
+    def validate_ticker(self, ticker: str) -> bool:
+        """Validate a ticker against the recordings."""
+        return self.generate_missing or self.source.has_recording(ticker)
+
+
+def record_responses(
+    provider: DataProvider,
+    tickers: List[str],
+    interval: str,
+    recordings_dir: Path,
+    start_date: Optional[str] = None
+) -> List[str]:
+    """Record a live provider's data for later replay.
+
+    Returns:
+        Tickers that were recorded
+    """
+    recordings_dir = Path(recordings_dir)
+    recordings_dir.mkdir(parents=True, exist_ok=True)
+    recorded = []
+    for ticker in tickers:
+        df = provider.fetch_data(ticker, interval=interval, start_date=start_date)
+        if df.empty:
+            continue
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        df[REQUIRED_COLUMNS].to_csv(recordings_dir / f"{_stem(ticker)}_{interval}.csv", index_label='date')
+        recorded.append(ticker)
+    return recorded
@@ -0,0 +1,202 @@
+"""Local HTTP stand-in for the Alpha Vantage query endpoint.
+
+Usage:
+    python -m backend.data.providers.replay_server [--port 8765]
+
+Then point the app at it with
+    ALPHA_VANTAGE_URL=http://127.0.0.1:8765/query
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config.settings import DATA_SETTINGS
+from ..symbols import get_registry
+from .alpha_vantage import COMPACT_BARS
+from .replay import FaultInjector, ReplaySource, ThrottledError
+
+FUNCTION_INTERVALS = {
+    'TIME_SERIES_DAILY': ('1d', 'Daily'),
+    'TIME_SERIES_DAILY_ADJUSTED': ('1d', 'Daily'),
+    'TIME_SERIES_WEEKLY': ('1wk', 'Weekly'),
+    'TIME_SERIES_WEEKLY_ADJUSTED': ('1wk', 'Weekly'),
+    'TIME_SERIES_MONTHLY': ('1mo', 'Monthly'),
+    'TIME_SERIES_MONTHLY_ADJUSTED': ('1mo', 'Monthly'),
+    'DIGITAL_CURRENCY_DAILY': ('1d', 'Digital Currency Daily')
+}
+
+THROTTLE_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is "
+    "5 calls per minute and 500 calls per day."
+)
+
+
+def time_series_body(source: ReplaySource, params: Dict[str, str]) -> Dict:
+    """Build an Alpha Vantage style time-series response."""
+    function = params.get('function', '')
+    interval, label = FUNCTION_INTERVALS[function]
+    symbol = params.get('symbol', '')
+    if function == 'DIGITAL_CURRENCY_DAILY':
+        symbol = f"{symbol}-{params.get('market', 'USD')}"
+    else:
+        symbol = get_registry().display_symbol(symbol, 'alphavantage')
+
+    df = source.series(symbol, interval)
+    # Digital currency series always come in full
+    if function != 'DIGITAL_CURRENCY_DAILY' and params.get('outputsize', 'compact') == 'compact':
+        df = df.iloc[-COMPACT_BARS:]
+
+    # Newest first, values as strings, like the real API
+    series = {
+        day.strftime('%Y-%m-%d'): {
+            '1. open': f"{row[0]:.4f}",
+            '2. high': f"{row[1]:.4f}",
+            '3. low': f"{row[2]:.4f}",
+            '4. close': f"{row[3]:.4f}",
+            '5. volume': f"{row[4]:.0f}"
+        }
+        for day, row in zip(df.index[::-1], df.to_numpy()[::-1])
+    }
+    return {
+        'Meta Data': {'1. Information': f"{label} Prices (replay)", '2. Symbol': symbol},
+        f"Time Series ({label})": series
+    }
+
+
+def global_quote_body(source: ReplaySource, params: Dict[str, str]) -> Dict:
+    """Build a GLOBAL_QUOTE response from the last replayed bar."""
+    df = source.series(get_registry().display_symbol(params.get('symbol', ''), 'alphavantage'), '1d')
+    if df.empty:
+        return {'Global Quote': {}}
+    last = df.iloc[-1]
+    return {'Global Quote': {
+        '01. symbol': params.get('symbol', ''),
+        '05. price': f"{last['close']:.4f}",
+        '07. latest trading day': df.index[-1].strftime('%Y-%m-%d')
+    }}
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the shared replay state."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], source: ReplaySource, faults: FaultInjector):
+        super().__init__(address, ReplayHandler)
+        self.source = source
+        self.faults = faults
+
+    @property
+    def url(self) -> str:
+        """URL to use as ALPHA_VANTAGE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/query"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Answers /query like Alpha Vantage does."""
+
+    server: ReplayServer
+
+    def _send(self, status: int, body: Dict) -> None:
+        """Send a JSON response."""
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        """Handle a query."""
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/query':
+            self._send(404, {'Error Message': 'Not found'})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            self.server.faults.apply()
+        except ThrottledError:
+            # Alpha Vantage answers 200 with a note when throttling
+            self._send(200, {'Note': THROTTLE_NOTE})
+            return
+        except ConnectionError as e:
+            self._send(503, {'Error Message': str(e)})
+            return
+
+        function = params.get('function', '')
+        try:
+            if function in FUNCTION_INTERVALS:
+                self._send(200, time_series_body(self.server.source, params))
+            elif function == 'GLOBAL_QUOTE':
+                self._send(200, global_quote_body(self.server.source, params))
+            else:
+                self._send(200, {'Error Message': f"Invalid API call: {function}"})
+        except Exception as e:
+            self._send(500, {'Error Message': str(e)})
+
+    def log_message(self, format: str, *args) -> None:
+        """Keep request logging out of benchmark output."""
+
+
+def start_server(
+    host: str = '127.0.0.1',
+    port: int = 0,
+    settings: Optional[Dict] = None
+) -> ReplayServer:
+    """Start a replay server in a background thread.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind, 0 for any free port
+        settings: Overrides for DATA_SETTINGS['replay']
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    settings = {**DATA_SETTINGS['replay'], **(settings or {})}
+    server = ReplayServer(
+        (host, port),
+        ReplaySource(
+            settings.get('recordings_dir'),
+            settings.get('seed') or 0,
+            settings.get('years', 10)
+        ),
+        FaultInjector.from_settings(settings)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Alpha Vantage replay server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float)
+    parser.add_argument('--jitter-ms', type=float)
+    parser.add_argument('--error-rate', type=float)
+    parser.add_argument('--throttle-calls', type=int)
+    parser.add_argument('--throttle-period', type=float)
+    parser.add_argument('--throttle-mode', choices=['wait', 'reject'])
+    args = parser.parse_args()
+
+    overrides = {
+        key: value for key, value in vars(args).items()
+        if key not in ('host', 'port') and value is not None
+    }
+    server = start_server(args.host, args.port, overrides)
+    print(f"Serving Alpha Vantage replay at {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,18 @@
 
 import yfinance as yf
 import pandas as pd
-from typing import Optional
-from . import DataProvider
+from yfinance.exceptions import YFPricesMissingError
+from typing import Dict, List, Optional
+from . import DataProvider, failed_frame
+from backend.utils.instrumentation import annotate, timed
 
 
 class YahooProvider(DataProvider):
     """Yahoo Finance data provider."""
     
+    # Symbols per batched download when validating
+    VALIDATE_BATCH_SIZE = 200
+    
     INTERVALS = {
         '1d': '1d',
         '1wk': '1wk',
@@ -25,6 +30,7 @@ class YahooProvider(DataProvider):
             self.session = yf.Ticker('')  # Create a dummy ticker to get session
         return self.session
     
+    @timed('provider.yahoo.fetch_data')
     def fetch_data(
         self,
         ticker: str,
@@ -41,12 +47,17 @@ class YahooProvider(DataProvider):
             # Create ticker object
             yf_ticker = yf.Ticker(ticker)
             
-            # Fetch data
-            df = yf_ticker.history(
-                interval=self.INTERVALS[interval],
-                start=start_date,
-                end=end_date
-            )
+            # Fetch data; errors raise so a failed request is not taken
+            # for a range without bars
+            try:
+                df = yf_ticker.history(
+                    interval=self.INTERVALS[interval],
+                    start=start_date,
+                    end=end_date,
+                    raise_errors=True
+                )
+            except YFPricesMissingError:
+                return pd.DataFrame()
             
             # Standardize column names
             df.index.name = 'date'
@@ -61,14 +72,54 @@ class YahooProvider(DataProvider):
             return df[required_columns]
             
         except Exception as e:
+            annotate(failed=True)
             print(f"Error fetching data for {ticker}: {str(e)}")
-            return pd.DataFrame()
+            return failed_frame()
+    
+    @timed('provider.yahoo.validate_tickers')
+    def validate_tickers(self, tickers: List[str]) -> Dict[str, Optional[bool]]:
+        """Validate tickers with a few batched downloads instead of .info.
+        
+        A symbol is invalid when the download has no prices for it. A
+        download that raised, or had no prices for any symbol of the
+        batch, as when the request failed, leaves the batch unknown (None).
+        """
+        result = {}
+        for offset in range(0, len(tickers), self.VALIDATE_BATCH_SIZE):
+            batch = tickers[offset:offset + self.VALIDATE_BATCH_SIZE]
+            try:
+                df = yf.download(
+                    batch,
+                    period='5d',
+                    group_by='ticker',
+                    progress=False,
+                    threads=True
+                )
+            except Exception as e:
+                annotate(failed=True)
+                print(f"Error validating {', '.join(batch)}: {str(e)}")
+                result.update(dict.fromkeys(batch))
+                continue
+            
+            found = {}
+            for ticker in batch:
+                try:
+                    # Columns are (ticker, field) even for one ticker
+                    closes = df[ticker]['Close']
+                    found[ticker] = bool(closes.notna().to_numpy().any())
+                except KeyError:
+                    found[ticker] = False
+            if not any(found.values()):
+                annotate(failed=True)
+                found = dict.fromkeys(batch)
+            result.update(found)
+        return result
     
-    def validate_ticker(self, ticker: str) -> bool:
-        """Validate if a ticker exists on Yahoo Finance."""
+    def validate_ticker(self, ticker: str) -> Optional[bool]:
+        """Validate if a ticker exists on Yahoo Finance; None if the request failed."""
         try:
             yf_ticker = yf.Ticker(ticker)
             info = yf_ticker.info
             return 'regularMarketPrice' in info
-        except:
-            return False 
\ No newline at end of file
+        except Exception:
+            return None 
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Local derivation of coarser bars from daily bars."""
+
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+from .market_calendar import DateLike, period_keys
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def key_labels(keys: np.ndarray, interval: str) -> np.ndarray:
+    """Convert bar keys back to the date each bar is labeled with."""
+    if interval == '1wk':
+        # Inverse of the Monday-based week number
+        return (keys * 7 - 3).astype('datetime64[D]')
+    if interval == '1mo':
+        return keys.astype('datetime64[M]').astype('datetime64[D]')
+    return keys.astype('datetime64[D]')
+
+
+def period_start(moment: DateLike, interval: str) -> pd.Timestamp:
+    """Get the first day of the bar containing a date."""
+    day = pd.DatetimeIndex([pd.Timestamp(moment).normalize()])
+    return pd.Timestamp(key_labels(period_keys(day, interval), interval)[0])
+
+
+def levels_start(moment: DateLike, levels) -> pd.Timestamp:
+    """Get the first day of the earliest bar of any level containing a date."""
+    return min(period_start(moment, level) for level in levels)
+
+
+def resample_ohlcv(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Aggregate daily bars into weekly or monthly bars.
+
+    Bars are labeled like Yahoo's: weeks by their Monday and months by
+    their first day. Open is the first open, high the highest high, low
+    the lowest low, close the last close and volume the sum.
+
+    Args:
+        df: Daily bars indexed by date, sorted ascending
+        interval: Target interval ('1wk', '1mo')
+
+    Returns:
+        DataFrame with the same columns, one row per bar
+    """
+    if df.empty:
+        return df
+
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    keys = period_keys(index.normalize(), interval)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    ends = np.append(starts[1:], len(keys)) - 1
+
+    columns = {
+        'open': df['open'].to_numpy(dtype=float)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=float), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=float), starts),
+        'close': df['close'].to_numpy(dtype=float)[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(dtype=float), starts)
+    }
+    labels = pd.DatetimeIndex(key_labels(keys[starts], interval), name='date')
+    return pd.DataFrame(columns, index=labels)[OHLCV_COLUMNS]
+
+
+def derive_levels(
+    daily: pd.DataFrame,
+    levels,
+    since: Optional[DateLike] = None
+) -> Dict[str, pd.DataFrame]:
+    """Build every derived level from daily bars.
+
+    With `since`, only the bars touched by daily data on or after that
+    date are returned, which is what an incremental update needs.
+    `daily` must then start no later than levels_start(since, levels),
+    the first day of the earliest bar containing `since`; a week can
+    start in the month before.
+    """
+    result = {}
+    for level in levels:
+        bars = resample_ohlcv(daily, level)
+        if since is not None and not bars.empty:
+            bars = bars[bars.index >= period_start(since, level)]
+        result[level] = bars
+    return result
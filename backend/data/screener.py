@@ -0,0 +1,294 @@
+"""Screener over every ticker with local history.
+
+The last bars of all tickers are held as columnar (bars x tickers)
+matrices aligned on each ticker's newest bar, with NaN above a ticker's
+first bar. Every metric is then one NumPy expression over the whole
+universe. The universe is loaded from the database once and afterwards
+only the tickers refreshed since the last scan are reloaded, found from
+their metadata update times, which also catches refreshes made by other
+worker processes.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from backend.utils.instrumentation import annotate, timed
+from config.settings import DATA_SETTINGS
+
+# Bars in a 52-week year of daily data
+YEAR_BARS = 252
+
+# Column title of each metric
+METRICS = {
+    'return': 'Return %',
+    'from_high': 'From 52w High %',
+    'volatility': 'Volatility %',
+    'volume_spike': 'Volume Spike x'
+}
+
+# Conditions are (minimum, maximum) pairs; None leaves that side open
+Conditions = Dict[str, Tuple[Optional[float], Optional[float]]]
+
+
+class Universe:
+    """Last bars of many tickers as (bars x tickers) matrices."""
+
+    def __init__(self, history: Optional[int] = None):
+        """Initialize an empty universe.
+
+        Args:
+            history: Bars kept per ticker
+        """
+        self.history = history or DATA_SETTINGS['screener']['history_bars']
+        self.tickers: List[str] = []
+        self.columns: Dict[str, int] = {}
+        # float32 halves the footprint of ~10k tickers; metrics are
+        # computed in float64
+        self.close = np.empty((self.history, 0), dtype=np.float32)
+        self.high = np.empty((self.history, 0), dtype=np.float32)
+        self.volume = np.empty((self.history, 0), dtype=np.float32)
+        self.last_dates = np.empty(0, dtype='datetime64[ns]')
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def _add_columns(self, tickers: List[str]) -> None:
+        """Append empty columns for tickers not in the universe yet."""
+        for ticker in tickers:
+            self.columns[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        pad = np.full((self.history, len(tickers)), np.nan, dtype=np.float32)
+        self.close = np.hstack([self.close, pad])
+        self.high = np.hstack([self.high, pad])
+        self.volume = np.hstack([self.volume, pad])
+        self.last_dates = np.concatenate([self.last_dates, np.full(len(tickers), np.datetime64('NaT'), 'datetime64[ns]')])
+
+    def update(self, bars: pd.DataFrame) -> None:
+        """Replace the bars of the tickers in a long-format frame.
+
+        Args:
+            bars: ticker, date, high, close and volume rows sorted by
+                ticker and date, as from DatabaseOperations.load_recent_bars
+        """
+        if bars.empty:
+            return
+        symbols = bars['ticker'].to_numpy()
+        # First row of each ticker's run of rows
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        ends = np.r_[starts[1:], len(symbols)]
+        tickers = symbols[starts].tolist()
+        self._add_columns([ticker for ticker in tickers if ticker not in self.columns])
+        cols = np.array([self.columns[ticker] for ticker in tickers])
+
+        # Bars counted back from each ticker's newest one land at the bottom
+        from_end = np.repeat(ends, ends - starts) - np.arange(len(symbols)) - 1
+        keep = from_end < self.history
+        rows = self.history - 1 - from_end[keep]
+        row_cols = np.repeat(cols, ends - starts)[keep]
+        for matrix, column in ((self.close, 'close'), (self.high, 'high'), (self.volume, 'volume')):
+            matrix[:, cols] = np.nan
+            matrix[rows, row_cols] = bars[column].to_numpy(dtype=np.float32)[keep]
+        self.last_dates[cols] = bars['date'].to_numpy(dtype='datetime64[ns]')[ends - 1]
+
+
+def scan(
+    universe: Universe,
+    return_bars: int = 20,
+    volatility_bars: int = 20,
+    volume_bars: int = 20
+) -> Dict[str, np.ndarray]:
+    """Compute every metric of every ticker.
+
+    A metric is NaN for tickers with fewer bars than it needs.
+
+    Args:
+        universe: Bars of the tickers
+        return_bars: Bars the return is measured over
+        volatility_bars: Bars of daily log returns in the volatility
+        volume_bars: Bars of average volume the last bar is compared to
+
+    Returns:
+        Dictionary mapping metric names to one value per ticker
+    """
+    history = universe.history
+    return_bars = int(np.clip(return_bars, 1, history - 1))
+    volatility_bars = int(np.clip(volatility_bars, 2, history - 1))
+    volume_bars = int(np.clip(volume_bars, 1, history - 1))
+    close = universe.close.astype(np.float64)
+    last = close[-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = (last / close[-1 - return_bars] - 1.0) * 100.0
+        # fmax skips NaN and leaves all-NaN columns NaN without a warning
+        year_high = np.fmax.reduce(universe.high[-YEAR_BARS:].astype(np.float64), axis=0)
+        from_high = (last / year_high - 1.0) * 100.0
+        log_returns = np.diff(np.log(close[-1 - volatility_bars:]), axis=0)
+        volatility = log_returns.std(axis=0, ddof=1) * np.sqrt(YEAR_BARS) * 100.0
+        volume = universe.volume[-1 - volume_bars:].astype(np.float64)
+        volume_spike = volume[-1] / volume[:-1].mean(axis=0)
+
+    metrics = {
+        'return': returns,
+        'from_high': from_high,
+        'volatility': volatility,
+        'volume_spike': volume_spike
+    }
+    for values in metrics.values():
+        values[~np.isfinite(values)] = np.nan
+    return metrics
+
+
+def matching(metrics: Dict[str, np.ndarray], conditions: Conditions) -> np.ndarray:
+    """Positions of the tickers meeting every condition."""
+    mask = np.ones(len(next(iter(metrics.values()))), dtype=bool)
+    for name, (low, high) in conditions.items():
+        values = metrics[name]
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    return np.flatnonzero(mask)
+
+
+def sort_order(values: np.ndarray, descending: bool = False) -> np.ndarray:
+    """Sort order of values, with NaN last either way."""
+    keys = -values if descending else values
+    return np.argsort(keys, kind='stable')
+
+
+class Screener:
+    """Screens the local universe, reloading only refreshed tickers."""
+
+    def __init__(self, db, interval: Optional[str] = None, history: Optional[int] = None):
+        """Initialize the screener.
+
+        Args:
+            db: Database operations to read bars and metadata from
+            interval: Interval screened, the base interval by default
+            history: Bars kept per ticker
+        """
+        self.db = db
+        self.interval = interval or DATA_SETTINGS['base_interval']
+        self.universe = Universe(history)
+        # Last seen update of every ticker, from the metadata
+        self._updates: Dict[str, datetime] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _start_date(self) -> datetime:
+        """Oldest bar date loaded."""
+        # Enough calendar days for the history of a market closed on
+        # weekends and holidays
+        return datetime.now() - timedelta(days=int(self.universe.history * 1.6))
+
+    @timed('screener.refresh')
+    def refresh(self) -> int:
+        """Load the universe, or reload the tickers refreshed since.
+
+        Returns:
+            Number of tickers loaded
+        """
+        with self._lock:
+            since = max(self._updates.values()) if self._updates else None
+            updates = self.db.get_updated_since(self.interval, since if self._loaded else None)
+            if not self._loaded:
+                tickers = None
+            else:
+                tickers = [
+                    ticker for ticker, last_update in updates.items()
+                    if self._updates.get(ticker) is None or last_update > self._updates[ticker]
+                ]
+                if not tickers:
+                    return 0
+
+            bars = self.db.load_recent_bars(self.interval, self._start_date(), tickers)
+            self.universe.update(bars)
+            self._updates.update(updates)
+            self._loaded = True
+            loaded = bars['ticker'].nunique() if not bars.empty else 0
+            annotate(tickers=loaded)
+            return loaded
+
+    def screen(
+        self,
+        conditions: Optional[Conditions] = None,
+        return_bars: int = 20,
+        volatility_bars: int = 20,
+        volume_bars: int = 20,
+        sort_by: str = 'return',
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[List[Dict], int]:
+        """Screen the universe and return one page of the matches.
+
+        Args:
+            conditions: Minimum and maximum of metrics, in their display
+                units (percent, or a multiple for volume spikes)
+            return_bars: Bars the return is measured over
+            volatility_bars: Bars in the volatility
+            volume_bars: Bars of average volume in the volume spike
+            sort_by: Metric name, 'ticker', 'close' or 'date'
+            descending: Whether to sort from the highest value
+            offset: Position of the first row of the page
+            limit: Rows in the page
+
+        Returns:
+            Rows of the page and the number of matching tickers
+        """
+        self.refresh()
+        with self._lock:
+            universe = self.universe
+            if not len(universe):
+                return [], 0
+            tickers = np.array(universe.tickers, dtype=object)
+            last_dates = universe.last_dates.copy()
+            last_close = universe.close[-1].astype(np.float64)
+            metrics = scan(universe, return_bars, volatility_bars, volume_bars)
+
+        matches = matching(metrics, conditions or {})
+        if sort_by == 'ticker':
+            ranked = matches[np.argsort(tickers[matches].astype(str), kind='stable')]
+            ranked = ranked[::-1] if descending else ranked
+        else:
+            keys = {
+                **metrics,
+                'close': last_close,
+                'date': np.where(np.isnat(last_dates), np.nan, last_dates.view(np.int64))
+            }
+            ranked = matches[sort_order(keys[sort_by][matches], descending)]
+
+        page = ranked[offset:offset + limit]
+        rows = [
+            {
+                'ticker': tickers[i],
+                'date': str(last_dates[i])[:10],
+                'close': _rounded(last_close[i], 4),
+                **{name: _rounded(values[i], 2) for name, values in metrics.items()}
+            }
+            for i in page
+        ]
+        return rows, len(matches)
+
+
+def _rounded(value: float, digits: int) -> Optional[float]:
+    """A table cell value; NaN becomes an empty cell."""
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+_screener: Optional[Screener] = None
+_screener_lock = threading.Lock()
+
+
+def get_screener() -> Screener:
+    """Get the screener of the shared data manager."""
+    global _screener
+    if _screener is None:
+        from .manager import get_data_manager
+        with _screener_lock:
+            if _screener is None:
+                _screener = Screener(get_data_manager().db)
+    return _screener
@@ -0,0 +1,213 @@
+"""Series cache shared by all worker processes through mmap'ed files.
+
+Each (ticker, interval) series is one .npy file holding a (6 x bars)
+float64 array: epoch seconds of the bar dates, then open, high, low,
+close and volume. Files are written to a temporary name and renamed into
+place, and readers map them read-only, so every worker reads the same
+pages of the OS page cache instead of holding its own copy. On Linux the
+default directory is in /dev/shm, which is memory-backed.
+
+Writers invalidate the series they change by deleting the file; other
+workers notice on their next read, since every read checks the file's
+modification time. Invalidating also writes a new version token for the
+series. A worker that read a series from the database records the token
+first and does not cache what it read if the token changed meanwhile,
+so a slow reader cannot put back bars another worker just replaced.
+"""
+
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+from .resample import OHLCV_COLUMNS
+
+
+def _file_name(ticker: str, interval: str) -> str:
+    """File name of a series; symbols may hold characters unsafe in paths."""
+    safe = ''.join(c if c.isalnum() or c in '-_.' else f"~{ord(c):06x}" for c in ticker)
+    return f"{safe}@{interval}.npy"
+
+
+def _parse_file_name(name: str) -> Tuple[str, str]:
+    """(ticker, interval) of a series file name."""
+    safe, _, interval = name[:-len('.npy')].rpartition('@')
+    parts = safe.split('~')
+    # Each escape is six hex digits of a code point, then plain text
+    ticker = parts[0] + ''.join(chr(int(part[:6], 16)) + part[6:] for part in parts[1:])
+    return ticker, interval
+
+
+class SharedSeriesCache:
+    """Full series of hot tickers, memory-mapped from a shared directory."""
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: Optional[int] = None):
+        """Initialize the cache.
+
+        Args:
+            directory: Directory shared by the workers
+            max_bytes: Size above which the oldest series are dropped
+        """
+        settings = DATA_SETTINGS['shared_cache']
+        self.directory = Path(directory or settings['dir'])
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or settings['max_mb'] * 2 ** 20
+        # Open maps by file name -> (mtime_ns, array)
+        self._maps: Dict[str, Tuple[int, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _array(self, ticker: str, interval: str) -> Optional[np.ndarray]:
+        """Map a series file, reusing the map while the file is unchanged."""
+        name = _file_name(ticker, interval)
+        path = self.directory / name
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._maps.pop(name, None)
+            return None
+
+        with self._lock:
+            cached = self._maps.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            array = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._maps[name] = (mtime, array)
+        return array
+
+    def version(self, ticker: str, interval: str) -> bytes:
+        """Token that changes whenever a series is invalidated."""
+        try:
+            return (self.directory / f".{_file_name(ticker, interval)}.version").read_bytes()
+        except OSError:
+            return b''
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """(ticker, interval) of every cached series."""
+        return [
+            _parse_file_name(entry.name)
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith('.npy') and not entry.name.startswith('.')
+        ]
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return (self.directory / _file_name(*key)).exists()
+
+    def get_array(self, ticker: str, interval: str) -> Optional[np.ndarray]:
+        """The raw (6 x bars) array of a cached series, read-only."""
+        return self._array(ticker, interval)
+
+    def get(
+        self,
+        ticker: str,
+        interval: str,
+        start_date=None,
+        end_date=None
+    ) -> Optional[pd.DataFrame]:
+        """Get a slice of a cached series.
+
+        Returns:
+            Bars from start_date to end_date inclusive, or None if the
+            series is not cached
+        """
+        array = self._array(ticker, interval)
+        if array is None:
+            return None
+
+        seconds = array[0]
+        lo = np.searchsorted(seconds, pd.Timestamp(start_date).timestamp(), 'left') if start_date else 0
+        hi = np.searchsorted(seconds, pd.Timestamp(end_date).timestamp(), 'right') if end_date else len(seconds)
+        # Only the requested slice is copied out of the shared pages
+        block = np.array(array[:, lo:hi])
+        index = pd.DatetimeIndex(block[0].astype('datetime64[s]').astype('datetime64[ns]'), name='date')
+        return pd.DataFrame(block[1:].T, index=index, columns=OHLCV_COLUMNS)
+
+    def put(self, ticker: str, interval: str, df: pd.DataFrame, version: Optional[bytes] = None) -> None:
+        """Cache the full series of a ticker.
+
+        Args:
+            ticker: Ticker of the series
+            interval: Interval of the series
+            df: Full series
+            version: Token from version() taken before the series was
+                read; nothing is cached if it has changed since
+        """
+        if df.empty:
+            return
+        index = pd.DatetimeIndex(df.index)
+        block = np.empty((6, len(df)), dtype=np.float64)
+        block[0] = index.values.astype('datetime64[s]').astype(np.int64)
+        block[1:] = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64).T
+        self.put_array(ticker, interval, block, version)
+
+    def put_array(
+        self,
+        ticker: str,
+        interval: str,
+        block: np.ndarray,
+        version: Optional[bytes] = None
+    ) -> None:
+        """Cache a series given as a (6 x bars) array; see put."""
+        if version is not None and self.version(ticker, interval) != version:
+            return
+        path = self.directory / _file_name(ticker, interval)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, block)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error caching {ticker}: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        # An invalidation between the check above and the rename must win
+        if version is not None and self.version(ticker, interval) != version:
+            path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def invalidate(self, keys: Iterable[Tuple[str, str]]) -> None:
+        """Drop (ticker, interval) series after their stored data changed."""
+        for ticker, interval in keys:
+            name = _file_name(ticker, interval)
+            version_path = self.directory / f".{name}.version"
+            tmp_path = version_path.with_name(f"{version_path.name}.{os.getpid()}.{threading.get_ident()}")
+            try:
+                tmp_path.write_bytes(uuid.uuid4().bytes)
+                os.replace(tmp_path, version_path)
+            except OSError as e:
+                print(f"Error invalidating {ticker}: {str(e)}")
+            (self.directory / name).unlink(missing_ok=True)
+            with self._lock:
+                self._maps.pop(name, None)
+
+    def _evict(self) -> None:
+        """Drop the least recently written series above the size limit."""
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy') and not entry.name.startswith('.'):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Drop every cached series."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy') or entry.name.startswith('.'):
+                Path(entry.path).unlink(missing_ok=True)
+        with self._lock:
+            self._maps.clear()
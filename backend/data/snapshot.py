@@ -0,0 +1,296 @@
+"""Warm-start snapshot of the shared series cache.
+
+The snapshot holds every cached series of every interval, so the derived
+weekly and monthly bars are included. It is one .npy file with the series
+side by side, plus a JSON index of where each one starts. It is written
+periodically and at shutdown. At boot the file is memory-mapped, and the
+series the database still agrees with, on bar count, first and last bar
+and update time, are copied back into the shared cache.
+
+Every worker restores, but the cache is shared, so only one process
+writes snapshots: the one holding a lock file in the snapshot
+directory. If it exits, another worker's scheduler takes the lock over.
+Other once-per-server work checks the same lock, see is_writer_process.
+"""
+
+import atexit
+import json
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+from backend.utils.instrumentation import timed
+from . import composites
+from .fetch_queue import BACKGROUND, get_fetch_queue
+
+try:
+    import fcntl
+except ImportError:
+    # No pre-fork servers without it, so every process may write
+    fcntl = None
+
+INDEX_FILE = 'index.json'
+LOCK_FILE = '.writer.lock'
+
+
+# Lock files held by this process, by directory
+_writer_locks: Dict[Path, object] = {}
+_writer_lock = threading.Lock()
+
+
+def _directory(directory: Optional[Path] = None) -> Path:
+    return Path(directory or DATA_SETTINGS['warm_start']['dir'])
+
+
+def is_writer_process(directory: Optional[Path] = None) -> bool:
+    """Whether this process is the one server worker doing shared work.
+
+    The first process to take the lock file of the snapshot directory
+    keeps it until it exits; the others may take it over later. Besides
+    writing snapshots, the holder does other once-per-server work such as
+    preloading the screener.
+    """
+    if fcntl is None:
+        return True
+    directory = _directory(directory)
+    with _writer_lock:
+        if directory in _writer_locks:
+            return True
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            lock_file = open(directory / LOCK_FILE, 'a')
+        except OSError as e:
+            print(f"Error opening snapshot lock: {str(e)}")
+            return False
+        try:
+            # Held until the process exits
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _writer_locks[directory] = lock_file
+        return True
+
+
+@timed('snapshot.write')
+def write_snapshot(manager, directory: Optional[Path] = None) -> Optional[Path]:
+    """Write the shared cache of a data manager to a snapshot.
+
+    Returns:
+        Path of the series file, or None if there was nothing to write
+    """
+    cache = manager.cache
+    if not cache:
+        return None
+
+    arrays = []
+    for ticker, interval in sorted(cache.keys()):
+        array = cache.get_array(ticker, interval)
+        if array is not None:
+            arrays.append((ticker, interval, array))
+    if not arrays:
+        return None
+
+    directory = _directory(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    created = datetime.now()
+    name = f"series-{created:%Y%m%d-%H%M%S-%f}-{os.getpid()}.npy"
+    tmp_path = directory / f".{name}"
+
+    # Series are copied one by one into a mapped file, not joined in memory
+    total = sum(array.shape[1] for _, _, array in arrays)
+    series = []
+    try:
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=(6, total))
+        offset = 0
+        for ticker, interval, array in arrays:
+            out[:, offset:offset + array.shape[1]] = array
+            series.append([ticker, interval, offset, offset + array.shape[1]])
+            offset += array.shape[1]
+        out.flush()
+        del out
+        os.replace(tmp_path, directory / name)
+
+        index = {
+            'created': created.isoformat(),
+            'cache': cache.directory.name,
+            'file': name,
+            'series': series
+        }
+        index_tmp = directory / f".{INDEX_FILE}.{os.getpid()}"
+        index_tmp.write_text(json.dumps(index))
+        os.replace(index_tmp, directory / INDEX_FILE)
+    except OSError as e:
+        print(f"Error writing cache snapshot: {str(e)}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+    # Files older than the one the index points to are no longer needed;
+    # they may still be mapped by a restoring process, which is fine
+    try:
+        current = json.loads((directory / INDEX_FILE).read_text())['file']
+    except (OSError, ValueError, KeyError):
+        current = name
+    for path in directory.glob('series-*.npy'):
+        if path.name < current:
+            path.unlink(missing_ok=True)
+    return directory / name
+
+
+@timed('snapshot.restore')
+def restore_snapshot(manager, directory: Optional[Path] = None) -> int:
+    """Copy snapshot series the database still agrees with into the cache.
+
+    A series is restored only if the database has as many bars as the
+    snapshot, with the same first and last dates, and the series was not
+    refreshed after the snapshot was taken. The bar count catches gaps
+    backfilled since, which leave both the last bar and the update time
+    alone.
+
+    Returns:
+        Number of series restored
+    """
+    cache = manager.cache
+    directory = _directory(directory)
+    if not cache or not (directory / INDEX_FILE).exists():
+        return 0
+
+    try:
+        index = json.loads((directory / INDEX_FILE).read_text())
+        if index['cache'] != cache.directory.name:
+            # Taken from another database
+            return 0
+        array = np.load(directory / index['file'], mmap_mode='r')
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading cache snapshot: {str(e)}")
+        return 0
+    created = datetime.fromisoformat(index['created'])
+
+    by_interval: Dict[str, List] = {}
+    for ticker, interval, start, stop in index['series']:
+        if (ticker, interval) not in cache:
+            by_interval.setdefault(interval, []).append((ticker, start, stop))
+
+    restored = 0
+    for interval, entries in by_interval.items():
+        tickers = [ticker for ticker, _, _ in entries]
+        extents = manager.db.get_series_extents(tickers, interval)
+        # Indices are stored under their own provider at every interval
+        indices = [ticker for ticker in tickers if composites.is_composite(ticker)]
+        last_updates = manager.db.get_last_updates(
+            [ticker for ticker in tickers if ticker not in indices],
+            manager.provider_name,
+            manager._source_interval(interval)
+        )
+        last_updates.update(manager.db.get_last_updates(indices, composites.PROVIDER, interval))
+        for ticker, start, stop in entries:
+            block = array[:, start:stop]
+            extent = extents.get(ticker)
+            if extent is None or extent[0] != block.shape[1]:
+                continue
+            if pd.Timestamp(extent[1]).timestamp() != block[0, 0] \
+                    or pd.Timestamp(extent[2]).timestamp() != block[0, -1]:
+                continue
+            if last_updates.get(ticker) and last_updates[ticker] > created:
+                continue
+            cache.put_array(ticker, interval, block)
+            restored += 1
+    return restored
+
+
+class SnapshotScheduler:
+    """Writes snapshots periodically and once more at shutdown.
+
+    Only the scheduler holding the writer lock of the snapshot directory
+    writes; the others keep trying to take it over.
+    """
+
+    def __init__(self, manager, interval: Optional[float] = None, directory: Optional[Path] = None):
+        """Initialize the scheduler.
+
+        Args:
+            manager: Data manager whose cache is snapshotted
+            interval: Seconds between snapshots
+            directory: Directory of the snapshot
+        """
+        self.manager = manager
+        self.interval = interval or DATA_SETTINGS['warm_start']['interval']
+        self.directory = directory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._writer = False
+
+    def _is_writer(self) -> bool:
+        """Whether this process writes the snapshots, taking the lock if free."""
+        self._writer = is_writer_process(self.directory)
+        return self._writer
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._is_writer():
+                write_snapshot(self.manager, self.directory)
+
+    def start(self) -> None:
+        """Start the periodic snapshots and write one more at exit."""
+        self._is_writer()
+        self._thread = threading.Thread(target=self._run, name='cache-snapshot', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+        # SIGTERM normally ends the process without running atexit; pre-fork
+        # servers install their own graceful handler, which is kept
+        if threading.current_thread() is threading.main_thread() \
+                and signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    def stop(self) -> None:
+        """Stop the periodic snapshots and write a final one."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        # Not taken over at shutdown, when every worker stops at once
+        if self._writer:
+            write_snapshot(self.manager, self.directory)
+
+
+def warm_start(
+    manager,
+    tickers: List[str],
+    interval: str,
+    start_date: datetime,
+    end_date: datetime
+) -> Optional[SnapshotScheduler]:
+    """Restore the snapshot, preload tickers and schedule snapshots.
+
+    Args:
+        manager: Data manager serving the app
+        tickers: Tickers to load before serving, e.g. the last selection
+        interval: Interval to load them at
+        start_date: Start of the range to load
+        end_date: End of the range to load
+
+    Returns:
+        The running snapshot scheduler, or None if warm start is disabled
+    """
+    settings = DATA_SETTINGS['warm_start']
+    if not settings['enabled']:
+        return None
+
+    restored = restore_snapshot(manager)
+    if tickers:
+        if settings['refresh']:
+            # Refreshed in the background, behind what the first page asks for
+            get_fetch_queue().submit(tickers, interval, BACKGROUND)
+        manager.load_data_for_tickers(tickers, start_date, end_date, interval)
+    print(f"Warm start: {restored} cached series restored, {len(tickers)} tickers preloaded")
+
+    scheduler = SnapshotScheduler(manager)
+    scheduler.start()
+    return scheduler
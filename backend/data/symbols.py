@@ -0,0 +1,200 @@
+"""Registry of every known symbol and its provider spellings.
+
+Symbols are kept in the Yahoo spelling the app displays ('BTC-USD',
+'^GSPC'). Each one is interned and numbered on registration; the
+provider spellings that differ are held in a forward and a reverse
+dictionary per provider, so translating either way is one lookup.
+Symbols of the universe files get the same ids in every process as long
+as the files do not change; symbols registered later are numbered in
+the order they are first seen.
+"""
+
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from config.settings import TICKER_LISTS
+from .composites import COMPOSITES
+from .universe import get_universe
+
+# Quote currencies of crypto pairs spelled 'BASE-QUOTE'
+CRYPTO_QUOTES = ('USD',)
+
+# Other names providers have gone by
+PROVIDER_ALIASES = {
+    'alpha_vantage': 'alphavantage'
+}
+
+# Provider spellings that no rule below produces
+PROVIDER_SYMBOLS: Dict[str, Dict[str, str]] = {
+    'alphavantage': {
+        '^GSPC': 'SPX',
+        '^DJI': 'DJI',
+        '^IXIC': 'IXIC',
+        '^RUT': 'RUT',
+        '^VIX': 'VIX',
+        '^FTSE': 'FTSE',
+        '^N225': 'N225',
+        '^GDAXI': 'GDAXI',
+        '^FCHI': 'FCHI'
+    }
+}
+
+
+def symbol_kind(symbol: str) -> str:
+    """Kind of a symbol from its spelling: composite, index, crypto or stock."""
+    if symbol in COMPOSITES:
+        return 'composite'
+    if symbol.startswith('^'):
+        return 'index'
+    if symbol.rpartition('-')[2] in CRYPTO_QUOTES:
+        return 'crypto'
+    return 'stock'
+
+
+def _provider_spellings(symbol: str, kind: str) -> Dict[str, str]:
+    """Provider spellings of a symbol that differ from its own."""
+    spellings = {}
+    if kind == 'crypto':
+        # Alpha Vantage names pairs without the dash, e.g. BTCUSD
+        spellings['alphavantage'] = symbol.replace('-', '')
+    for provider, symbols in PROVIDER_SYMBOLS.items():
+        if symbol in symbols:
+            spellings[provider] = symbols[symbol]
+    return spellings
+
+
+class SymbolRegistry:
+    """Symbols, their integer ids and their provider spellings."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._ids: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._kinds: List[str] = []
+        # Provider -> symbol -> provider spelling, and the reverse
+        self._forward: Dict[str, Dict[str, str]] = {}
+        self._reverse: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._ids
+
+    def register(self, symbol: str, kind: Optional[str] = None) -> int:
+        """Add a symbol if it is new.
+
+        Args:
+            symbol: Symbol in the app's spelling
+            kind: Kind of the symbol, guessed from its spelling if None
+
+        Returns:
+            Id of the symbol
+        """
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
+        with self._lock:
+            symbol_id = self._ids.get(symbol)
+            if symbol_id is not None:
+                return symbol_id
+            symbol = sys.intern(symbol)
+            kind = kind or symbol_kind(symbol)
+            for provider, spelling in _provider_spellings(symbol, kind).items():
+                spelling = sys.intern(spelling)
+                self._forward.setdefault(provider, {})[symbol] = spelling
+                # The first symbol spelled so keeps the reverse entry
+                self._reverse.setdefault(provider, {}).setdefault(spelling, symbol)
+            symbol_id = len(self._symbols)
+            self._symbols.append(symbol)
+            self._kinds.append(sys.intern(kind))
+            # Published last, so lookups without the lock see whole entries
+            self._ids[symbol] = symbol_id
+            return symbol_id
+
+    def id(self, symbol: str) -> int:
+        """Id of a symbol, registering it first if needed."""
+        symbol_id = self._ids.get(symbol)
+        return symbol_id if symbol_id is not None else self.register(symbol)
+
+    def ids(self, symbols: Iterable[str]) -> np.ndarray:
+        """Ids of many symbols as an array."""
+        return np.fromiter((self.id(symbol) for symbol in symbols), dtype=np.int32)
+
+    def symbol(self, symbol_id: int) -> str:
+        """Symbol with an id."""
+        return self._symbols[symbol_id]
+
+    def kind(self, symbol: str) -> str:
+        """Kind of a symbol: composite, index, crypto or stock.
+
+        Unknown symbols are judged by their spelling without being
+        registered, so registration keeps meaning the symbol is known.
+        """
+        symbol_id = self._ids.get(symbol)
+        return self._kinds[symbol_id] if symbol_id is not None else symbol_kind(symbol)
+
+    def is_crypto(self, symbol: str) -> bool:
+        """Whether a symbol is a cryptocurrency pair."""
+        return self.kind(symbol) == 'crypto'
+
+    def pair(self, symbol: str) -> Tuple[str, str]:
+        """Base and quote currency of a crypto pair, e.g. ('BTC', 'USD')."""
+        base, _, quote = symbol.rpartition('-')
+        return (base, quote) if base else (symbol, CRYPTO_QUOTES[0])
+
+    def provider_symbol(self, symbol: str, provider: str) -> str:
+        """Spelling of a symbol at a provider."""
+        provider = PROVIDER_ALIASES.get(provider, provider)
+        forward = self._forward.get(provider)
+        if forward is None:
+            return symbol
+        spelling = forward.get(symbol)
+        if spelling is None and symbol not in self._ids:
+            # Unknown symbols may still follow a rule, e.g. new crypto pairs;
+            # the spelling is kept for display_symbol, the symbol stays unknown
+            spelling = _provider_spellings(symbol, symbol_kind(symbol)).get(provider)
+            if spelling is not None:
+                with self._lock:
+                    spelling = forward.setdefault(symbol, sys.intern(spelling))
+                    self._reverse.setdefault(provider, {}).setdefault(spelling, symbol)
+        return spelling or symbol
+
+    def display_symbol(self, provider_symbol: str, provider: str) -> str:
+        """Symbol spelled some way at a provider, in the app's spelling."""
+        provider = PROVIDER_ALIASES.get(provider, provider)
+        return self._reverse.get(provider, {}).get(provider_symbol, provider_symbol)
+
+
+def load_registry() -> SymbolRegistry:
+    """Build a registry of the ticker lists, symbol universe and indices."""
+    registry = SymbolRegistry()
+    for tickers in TICKER_LISTS.values():
+        for ticker in tickers:
+            registry.register(ticker.upper())
+    universe = get_universe()
+    for symbol, category in zip(universe.symbols(), universe.categories()):
+        registry.register(symbol, 'crypto' if category == 'Crypto' else None)
+    for symbols in PROVIDER_SYMBOLS.values():
+        for symbol in symbols:
+            registry.register(symbol)
+    for symbol in COMPOSITES:
+        registry.register(symbol, 'composite')
+    return registry
+
+
+_registry: Optional[SymbolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> SymbolRegistry:
+    """Get the registry shared by the whole process, loading it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = load_registry()
+    return _registry
@@ -0,0 +1,372 @@
+"""Synthetic market data for scale testing the store and the chart.
+
+Usage:
+    python -m backend.data.synthetic --tickers 10000 --years 30 --db /tmp/synthetic.db
+
+Prices follow geometric Brownian motion with occasional jumps, overnight
+gaps and intraday ranges; volume is lognormal and rises with the size of
+the move. Tickers are spread over several exchange calendars, some list
+after the start of the range, some have missing stretches of bars and
+some split. Everything is simulated as (tickers x sessions) matrices,
+one chunk of tickers sharing a calendar at a time.
+"""
+
+import argparse
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from .market_calendar import DateLike, get_calendar, period_keys
+from .resample import OHLCV_COLUMNS, key_labels
+
+# Ticker suffix -> share of the generated universe
+CALENDAR_MIX = {
+    '': 0.70,
+    '-USD': 0.10,
+    '.L': 0.05,
+    '.DE': 0.05,
+    '.T': 0.05,
+    '.HK': 0.05
+}
+
+TRADING_DAYS = 252
+SPLIT_RATIOS = np.array([2.0, 3.0, 4.0, 0.1])
+
+
+def synthetic_tickers(count: int, mix: Optional[Dict[str, float]] = None, seed: int = 0) -> List[str]:
+    """Create ticker names spread over calendars by suffix."""
+    mix = mix or CALENDAR_MIX
+    suffixes = list(mix)
+    weights = np.array([mix[suffix] for suffix in suffixes], dtype=float)
+    choice = np.random.default_rng([seed, count]).choice(
+        len(suffixes), size=count, p=weights / weights.sum()
+    )
+    width = len(str(max(count - 1, 0)))
+    return [f"SYN{i:0{width}d}{suffixes[c]}" for i, c in enumerate(choice)]
+
+
+def _bars(days: pd.DatetimeIndex, interval: str) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    """Positions of the first session of every bar, and the bar labels.
+
+    Labels match resample_ohlcv: weeks by their Monday, months by their
+    first day.
+    """
+    if interval == '1d':
+        return np.arange(len(days)), days
+    keys = period_keys(days, interval)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return starts, pd.DatetimeIndex(key_labels(keys[starts], interval))
+
+
+def simulate(
+    rng: np.random.Generator,
+    count: int,
+    sessions: pd.DatetimeIndex,
+    interval: str = '1d',
+    jump_rate: float = 0.002,
+    split_rate: float = 0.02
+) -> Tuple[pd.DatetimeIndex, Dict[str, np.ndarray]]:
+    """Simulate daily bars for tickers sharing a calendar.
+
+    Args:
+        rng: Random generator
+        count: Number of tickers
+        sessions: Trading sessions of their calendar
+        interval: Bar size; weekly and monthly bars aggregate the daily ones
+        jump_rate: Probability of a price jump on any day
+        split_rate: Probability of a split per ticker and year
+
+    Returns:
+        Bar dates and a dict of (count x bars) arrays per OHLCV column.
+        Prices are not split-adjusted.
+    """
+    length = len(sessions)
+    dt = 1.0 / TRADING_DAYS
+    shape = (count, length)
+    f32 = np.float32
+
+    # Per-ticker parameters; the bar matrices are float32 to halve the work
+    mu = rng.uniform(-0.05, 0.20, (count, 1)).astype(f32)
+    sigma = rng.uniform(0.15, 0.80, (count, 1)).astype(f32)
+    scale = sigma * f32(np.sqrt(dt))
+    start_price = np.exp(rng.uniform(np.log(2.0), np.log(500.0), (count, 1))).astype(f32)
+    base_volume = np.exp(rng.uniform(np.log(1e4), np.log(5e7), (count, 1))).astype(f32)
+
+    z = rng.standard_normal(shape, dtype=f32)
+    log_returns = (mu - f32(0.5) * sigma ** 2) * f32(dt) + scale * z
+
+    # Jumps on a small random subset of days
+    jumps = rng.binomial(count * length, jump_rate)
+    if jumps:
+        flat = rng.integers(0, count * length, jumps)
+        log_returns.reshape(-1)[flat] += rng.normal(0.0, 0.08, jumps).astype(f32)
+
+    # Part of every move happens overnight, as the gap to the open.
+    # Cumulative sums run in float64 so long histories do not drift.
+    overnight = log_returns * rng.random(shape, dtype=f32) * f32(0.5)
+    close = start_price * np.exp(np.cumsum(log_returns, axis=1, dtype=np.float64)).astype(f32)
+    prev_close = np.concatenate((start_price, close[:, :-1]), axis=1)
+    opens = prev_close * np.exp(overnight)
+
+    # Wide ranges and big moves both come with more volume
+    w = rng.standard_normal(shape, dtype=f32)
+    spread = np.abs(w) * scale * f32(0.6)
+    split = rng.random(shape, dtype=f32) * f32(0.6) + f32(0.2)
+    high = np.maximum(opens, close) * np.exp(spread * split)
+    low = np.minimum(opens, close) * np.exp(-spread * (f32(1) - split))
+    volume = base_volume * np.exp(f32(0.3) * w + f32(0.5) * np.abs(z))
+
+    # Unadjusted splits: prices drop by the ratio, volume rises by it
+    years = length / TRADING_DAYS
+    splitting = np.flatnonzero(rng.random(count) < split_rate * years)
+    if len(splitting) and length > 1:
+        at = rng.integers(1, length, len(splitting))
+        ratio = SPLIT_RATIOS[rng.integers(0, len(SPLIT_RATIOS), len(splitting))]
+        after = np.arange(length) >= at[:, None]
+        factor = np.where(after, ratio[:, None], 1.0).astype(f32)
+        opens[splitting] /= factor
+        high[splitting] /= factor
+        low[splitting] /= factor
+        close[splitting] /= factor
+        volume[splitting] *= factor
+
+    starts, labels = _bars(sessions, interval)
+    if interval != '1d':
+        ends = np.append(starts[1:], length) - 1
+        opens = opens[:, starts]
+        high = np.maximum.reduceat(high, starts, axis=1)
+        low = np.minimum.reduceat(low, starts, axis=1)
+        close = close[:, ends]
+        volume = np.add.reduceat(volume, starts, axis=1)
+
+    return labels, {
+        'open': opens,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': np.round(volume)
+    }
+
+
+def _present_bars(
+    rng: np.random.Generator,
+    count: int,
+    length: int,
+    listing_rate: float,
+    gap_rate: float
+) -> np.ndarray:
+    """Mask of bars that exist, after late listings and missing stretches."""
+    present = np.ones((count, length), dtype=bool)
+    if length < 2:
+        return present
+
+    listed = np.flatnonzero(rng.random(count) < listing_rate)
+    first = rng.integers(1, length, len(listed))
+    present[listed] = np.arange(length) >= first[:, None]
+
+    gapped = np.flatnonzero(rng.random(count) < gap_rate)
+    start = rng.integers(0, length, len(gapped))
+    stop = start + rng.integers(1, max(2, length // 50), len(gapped))
+    bars = np.arange(length)
+    present[gapped] &= (bars < start[:, None]) | (bars >= stop[:, None])
+    return present
+
+
+class SyntheticMarket:
+    """A reproducible universe of synthetic tickers."""
+
+    def __init__(
+        self,
+        tickers: Union[int, List[str]] = 100,
+        years: float = 10,
+        end: Optional[DateLike] = None,
+        seed: int = 0,
+        chunk_size: int = 256,
+        jump_rate: float = 0.002,
+        split_rate: float = 0.02,
+        listing_rate: float = 0.2,
+        gap_rate: float = 0.05
+    ):
+        """Initialize the market.
+
+        Args:
+            tickers: Ticker names, or how many to create
+            years: Length of the history
+            end: Last day of the history, today by default
+            seed: Seed; the same seed gives the same data
+            chunk_size: Tickers simulated together
+            jump_rate: Probability of a price jump on any day
+            split_rate: Probability of a split per ticker and year
+            listing_rate: Share of tickers listed after the start
+            gap_rate: Share of tickers with a stretch of missing bars
+        """
+        if isinstance(tickers, int):
+            tickers = synthetic_tickers(tickers, seed=seed)
+        self.tickers = list(tickers)
+        self.end = pd.Timestamp(end or pd.Timestamp.today()).normalize()
+        self.start = self.end - pd.DateOffset(days=int(round(years * 365.25)))
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.rates = {
+            'jump_rate': jump_rate,
+            'split_rate': split_rate,
+            'listing_rate': listing_rate,
+            'gap_rate': gap_rate
+        }
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._sessions: Dict[str, pd.DatetimeIndex] = {}
+        self._last_chunk: Optional[Tuple[tuple, Dict[str, pd.DataFrame]]] = None
+
+    def _calendar_sessions(self, ticker: str) -> Tuple[str, pd.DatetimeIndex]:
+        """Get the calendar name and sessions of a ticker."""
+        calendar = get_calendar(ticker)
+        if calendar.name not in self._sessions:
+            self._sessions[calendar.name] = calendar.sessions(self.start, self.end)
+        return calendar.name, self._sessions[calendar.name]
+
+    def _simulate_chunk(self, number: int, interval: str) -> Dict[str, pd.DataFrame]:
+        """Simulate one chunk of tickers, grouped by calendar."""
+        chunk = self.tickers[number * self.chunk_size:(number + 1) * self.chunk_size]
+        # Same draws for every interval, so weekly bars aggregate the daily ones
+        rng = np.random.default_rng([self.seed, number])
+
+        groups: Dict[str, List[str]] = {}
+        for ticker in chunk:
+            groups.setdefault(self._calendar_sessions(ticker)[0], []).append(ticker)
+
+        frames = {}
+        for name in sorted(groups):
+            members = groups[name]
+            dates, columns = simulate(
+                rng,
+                len(members),
+                self._sessions[name],
+                interval,
+                self.rates['jump_rate'],
+                self.rates['split_rate']
+            )
+            present = _present_bars(
+                rng,
+                len(members),
+                len(dates),
+                self.rates['listing_rate'],
+                self.rates['gap_rate']
+            )
+            values = np.stack([columns[column] for column in OHLCV_COLUMNS], axis=2, dtype=float)
+            index = pd.DatetimeIndex(dates, name='date')
+            complete = present.all(axis=1)
+            for row, ticker in enumerate(members):
+                if complete[row]:
+                    frames[ticker] = pd.DataFrame(values[row], index=index, columns=OHLCV_COLUMNS)
+                else:
+                    mask = present[row]
+                    frames[ticker] = pd.DataFrame(
+                        values[row][mask], index=index[mask], columns=OHLCV_COLUMNS
+                    )
+        return frames
+
+    def frames(self, interval: str = '1d') -> Iterator[List[Tuple[str, pd.DataFrame]]]:
+        """Yield (ticker, bars) pairs, one chunk of tickers at a time."""
+        for number in range((len(self.tickers) + self.chunk_size - 1) // self.chunk_size):
+            chunk = self._simulate_chunk(number, interval)
+            yield [(ticker, chunk[ticker]) for ticker in chunk]
+
+    def series(self, ticker: str, interval: str = '1d') -> pd.DataFrame:
+        """Get the bars of one ticker, identical to what frames() yields."""
+        position = self._positions.get(ticker)
+        if position is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        key = (position // self.chunk_size, interval)
+        if not self._last_chunk or self._last_chunk[0] != key:
+            self._last_chunk = (key, self._simulate_chunk(*key))
+        return self._last_chunk[1][ticker].copy()
+
+    def write_to_database(
+        self,
+        db,
+        interval: str = '1d',
+        provider: str = 'synthetic',
+        derive: bool = True
+    ) -> int:
+        """Write the market into a DatabaseOperations store.
+
+        Args:
+            db: DatabaseOperations instance
+            interval: Interval to generate
+            provider: Provider name recorded in the metadata
+            derive: Also store the derived intervals of daily bars, as
+                DataManager does
+
+        Returns:
+            Number of rows written
+        """
+        from config.settings import DATA_SETTINGS
+        from .resample import derive_levels
+
+        derived = DATA_SETTINGS['derived_intervals'] if derive and interval == DATA_SETTINGS['base_interval'] else []
+        rows = 0
+        for chunk in self.frames(interval):
+            batch = []
+            for ticker, df in chunk:
+                batch.append((ticker, interval, df))
+                for level, bars in derive_levels(df, derived).items():
+                    batch.append((ticker, level, bars))
+            db.save_ticker_batch(
+                batch,
+                provider,
+                replace=True,
+                refreshed=[(ticker, level) for ticker, level, _ in batch]
+            )
+            rows += sum(len(df) for _, _, df in batch)
+        return rows
+
+
+def generate_series(
+    ticker: str,
+    interval: str = '1d',
+    years: float = 10,
+    end: Optional[DateLike] = None,
+    seed: int = 0
+) -> pd.DataFrame:
+    """Generate the bars of a single ticker, seeded by its name.
+
+    Missing stretches and late listings are left out so that any ticker
+    has a full history, which is what the replay provider wants.
+    """
+    market = SyntheticMarket(
+        [ticker],
+        years=years,
+        end=end,
+        seed=seed + zlib.crc32(ticker.encode()),
+        listing_rate=0.0,
+        gap_rate=0.0
+    )
+    return market.series(ticker, interval)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate synthetic market data")
+    parser.add_argument('--tickers', type=int, default=1000)
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--interval', default='1d', choices=['1d', '1wk', '1mo'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help="SQLite file to write; only generates when omitted")
+    args = parser.parse_args()
+
+    market = SyntheticMarket(args.tickers, years=args.years, seed=args.seed)
+    started = time.perf_counter()
+    if args.db:
+        from .database.operations import DatabaseOperations
+        rows = market.write_to_database(DatabaseOperations(args.db), args.interval)
+    else:
+        rows = sum(len(df) for chunk in market.frames(args.interval) for _, df in chunk)
+    elapsed = time.perf_counter() - started
+    print(f"{rows:,} rows for {len(market.tickers):,} tickers in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""Symbol universe of the files/*.csv lists, cached as a binary snapshot.
+
+The CSV files are parsed once and their rows written to a single .npy
+file of bytes holding several arrays side by side, plus a JSON index of
+where each array starts. The snapshot is keyed by the hash of the source
+files; the index also remembers their modification times and sizes, so
+later processes only stat the files and memory-map the snapshot instead
+of parsing 11k rows again. Files that were touched but not changed are
+recognized by their hash.
+
+Arrays in the snapshot:
+    text            "SYMBOL\\tName\\n" of every row, UTF-8
+    offsets         Start of every row in text, and the end
+    search          Upper-cased copy of text for case-insensitive search
+    search_offsets  Start of every row in search, and the end
+    categories      Category code of every row, see the index
+    sources         Source file of every row, see the index
+    sorted_symbols  Symbols in byte order, for lookups and prefix search
+    order           Row of each entry of sorted_symbols
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from config.settings import BASE_DIR, DATA_SETTINGS
+from backend.utils.instrumentation import timed
+
+INDEX_FILE = 'index.json'
+
+# Bumped when the layout of the snapshot changes
+FORMAT = 1
+
+# Category of the rows of each file, by file stem; others use the stem
+FILE_CATEGORIES = {
+    'tickers': 'Stock',
+    'crypto_tickers': 'Crypto'
+}
+
+# Arrays are aligned to this many bytes in the snapshot
+ALIGNMENT = 8
+
+
+def universe_files(directory: Optional[Path] = None) -> List[Path]:
+    """Symbol list files, in a fixed order."""
+    return sorted(Path(directory or BASE_DIR / 'files').glob('*.csv'))
+
+
+def read_rows(path: Path) -> List[Tuple[str, str]]:
+    """(symbol, name) rows of a symbol list file.
+
+    Header rows are skipped wherever they appear, since some files hold
+    several sections with a header each. Symbols are upper-cased.
+    """
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].strip().lower() == 'ticker':
+                continue
+            rows.append((row[0].strip().upper(), row[1].strip() if len(row) > 1 else ''))
+    return rows
+
+
+def _file_stats(paths: List[Path]) -> List[List]:
+    """Name, modification time and size of every file."""
+    stats = []
+    for path in paths:
+        stat = path.stat()
+        stats.append([path.name, stat.st_mtime_ns, stat.st_size])
+    return stats
+
+
+def _files_key(paths: List[Path]) -> str:
+    """Hash of the names and contents of the files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()[:20]
+
+
+def _lines(rows: List[Tuple[str, str]], upper: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows joined into one byte array, and the offset of every row."""
+    encoded = [
+        f"{symbol}\t{name.upper() if upper else name}\n".encode('utf-8')
+        for symbol, name in rows
+    ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(line) for line in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def build_arrays(paths: List[Path]) -> Tuple[Dict[str, np.ndarray], List[str], List[str]]:
+    """Parse the files into the snapshot arrays.
+
+    The first row of a symbol wins when files or sections repeat it.
+
+    Returns:
+        Arrays by name, category names and source file names
+    """
+    rows: List[Tuple[str, str]] = []
+    categories: List[str] = []
+    sources: List[int] = []
+    row_categories: List[int] = []
+    seen = set()
+    for source, path in enumerate(paths):
+        category = FILE_CATEGORIES.get(path.stem, path.stem)
+        if category not in categories:
+            categories.append(category)
+        for symbol, name in read_rows(path):
+            if symbol in seen:
+                continue
+            seen.add(symbol)
+            rows.append((symbol, name))
+            sources.append(source)
+            row_categories.append(categories.index(category))
+
+    text, offsets = _lines(rows, upper=False)
+    search, search_offsets = _lines(rows, upper=True)
+    symbols = np.array([symbol.encode('utf-8') for symbol, _ in rows], dtype=bytes)
+    order = np.argsort(symbols, kind='stable').astype(np.int32)
+    arrays = {
+        'text': text,
+        'offsets': offsets,
+        'search': search,
+        'search_offsets': search_offsets,
+        'categories': np.array(row_categories, dtype=np.uint8),
+        'sources': np.array(sources, dtype=np.uint8),
+        'sorted_symbols': symbols[order],
+        'order': order
+    }
+    return arrays, categories, [path.name for path in paths]
+
+
+def _read_index(directory: Path) -> Optional[Dict]:
+    """Index of the current snapshot, None if missing or of another format."""
+    try:
+        index = json.loads((directory / INDEX_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+    return index if index.get('format') == FORMAT else None
+
+
+def _write_index(directory: Path, index: Dict) -> None:
+    """Replace the index in one step, so readers never see half of it."""
+    index_tmp = directory / f".{INDEX_FILE}.{os.getpid()}"
+    index_tmp.write_text(json.dumps(index))
+    os.replace(index_tmp, directory / INDEX_FILE)
+
+
+def _write(directory: Path, arrays: Dict[str, np.ndarray], index: Dict) -> None:
+    """Write the arrays as one byte file and the index pointing to it."""
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, list(array.shape)]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"universe-{index['key']}.npy"
+    tmp_path = directory / f".{name}.{os.getpid()}"
+    try:
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(max(offset, 1),))
+        for array_name, array in arrays.items():
+            start = layout[array_name][0]
+            out[start:start + array.nbytes] = np.ascontiguousarray(array).view(np.uint8).reshape(-1)
+        out.flush()
+        del out
+        os.replace(tmp_path, directory / name)
+        _write_index(directory, {**index, 'file': name, 'arrays': layout})
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    # Older snapshots may still be mapped by another process, which is fine
+    for path in directory.glob('universe-*.npy'):
+        if path.name != name:
+            path.unlink(missing_ok=True)
+
+
+def _map(directory: Path, index: Dict) -> Dict[str, np.ndarray]:
+    """Memory-map the arrays of a snapshot."""
+    blob = np.load(directory / index['file'], mmap_mode='r')
+    arrays = {}
+    for name, (offset, dtype, shape) in index['arrays'].items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = blob[offset:offset + count * dtype.itemsize].view(dtype).reshape(shape)
+    return arrays
+
+
+class SymbolUniverse:
+    """Rows of the symbol lists, read from a mapped snapshot."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], categories: List[str], sources: List[str]):
+        """Initialize the universe.
+
+        Args:
+            arrays: Snapshot arrays by name
+            categories: Name of every category code
+            sources: Name of every source file
+        """
+        self.arrays = arrays
+        self.category_names = categories
+        self.source_names = sources
+        self._search_bytes: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self.arrays['categories'])
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.find(symbol) is not None
+
+    def _row_text(self, row: int) -> str:
+        offsets = self.arrays['offsets']
+        return self.arrays['text'][offsets[row]:offsets[row + 1] - 1].tobytes().decode('utf-8')
+
+    def row(self, row: int) -> Dict[str, str]:
+        """Symbol, name, category and source file of a row."""
+        symbol, _, name = self._row_text(row).partition('\t')
+        return {
+            'ticker': symbol,
+            'name': name,
+            'category': self.category_names[self.arrays['categories'][row]],
+            'source': self.source_names[self.arrays['sources'][row]]
+        }
+
+    def rows(self) -> List[Tuple[str, str]]:
+        """(symbol, name) of every row, decoded at once."""
+        lines = self.arrays['text'].tobytes().decode('utf-8').split('\n')[:-1]
+        return [tuple(line.split('\t', 1)) for line in lines]
+
+    def symbols(self) -> List[str]:
+        """Symbol of every row, in file order."""
+        order = self.arrays['order']
+        rows = np.empty_like(order)
+        rows[order] = np.arange(len(order), dtype=order.dtype)
+        try:
+            # Undoing the sort of the fixed-width symbols skips the names
+            return self.arrays['sorted_symbols'][rows].astype(str).tolist()
+        except UnicodeDecodeError:
+            return [symbol for symbol, _ in self.rows()]
+
+    def categories(self) -> List[str]:
+        """Category of every row, in file order."""
+        names = self.category_names
+        return [names[code] for code in self.arrays['categories'].tolist()]
+
+    def find(self, symbol: str) -> Optional[int]:
+        """Row of a symbol, or None."""
+        key = symbol.strip().upper().encode('utf-8')
+        sorted_symbols = self.arrays['sorted_symbols']
+        if not len(sorted_symbols) or len(key) > sorted_symbols.dtype.itemsize:
+            return None
+        position = int(np.searchsorted(sorted_symbols, key))
+        if position < len(sorted_symbols) and sorted_symbols[position] == key:
+            return int(self.arrays['order'][position])
+        return None
+
+    def search(self, query: str, limit: int = 50) -> List[int]:
+        """Rows matching a query, symbols starting with it first.
+
+        Args:
+            query: Text found anywhere in the symbol or name, any case
+            limit: Rows returned at most
+
+        Returns:
+            Matching rows, prefix matches in symbol order, then the rest
+            in file order
+        """
+        key = query.strip().upper()
+        if not key or limit <= 0:
+            return []
+
+        # Symbols starting with the query are one range of the sorted ones
+        sorted_symbols = self.arrays['sorted_symbols']
+        encoded = key.encode('utf-8')
+        low = int(np.searchsorted(sorted_symbols, encoded, 'left'))
+        high = int(np.searchsorted(sorted_symbols, encoded + b'\xff', 'left'))
+        found = self.arrays['order'][low:min(high, low + limit)].tolist()
+        if len(found) >= limit or '\t' in key or '\n' in key:
+            return found
+
+        if self._search_bytes is None:
+            self._search_bytes = self.arrays['search'].tobytes()
+        haystack = self._search_bytes
+        offsets = self.arrays['search_offsets']
+        seen = set(found)
+        position = haystack.find(encoded)
+        while position >= 0 and len(found) < limit:
+            row = int(np.searchsorted(offsets, position, 'right')) - 1
+            if row not in seen:
+                seen.add(row)
+                found.append(row)
+            # Continue after this row
+            position = haystack.find(encoded, int(offsets[row + 1]))
+        return found
+
+
+@timed('universe.load')
+def load_universe(files: Optional[List[Path]] = None, directory: Optional[Path] = None) -> SymbolUniverse:
+    """Load the universe from its snapshot, rebuilding it if the files changed.
+
+    Args:
+        files: Symbol list files, files/*.csv by default
+        directory: Directory of the snapshot
+
+    Returns:
+        Universe of every file's rows; empty if the files cannot be read
+    """
+    files = universe_files() if files is None else files
+    directory = Path(directory or DATA_SETTINGS['universe']['dir'])
+    try:
+        stats = _file_stats(files)
+        key = None
+        index = _read_index(directory)
+        if index is not None and index['stats'] != stats:
+            key = _files_key(files)
+            if index['key'] != key:
+                index = None
+            else:
+                # Same contents with new modification times
+                index['stats'] = stats
+                _write_index(directory, index)
+        if index is not None:
+            try:
+                return SymbolUniverse(_map(directory, index), index['categories'], index['sources'])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error mapping universe snapshot: {str(e)}")
+
+        arrays, categories, sources = build_arrays(files)
+        index = {
+            'format': FORMAT,
+            'key': key or _files_key(files),
+            'stats': stats,
+            'categories': categories,
+            'sources': sources
+        }
+        try:
+            _write(directory, arrays, index)
+        except OSError as e:
+            print(f"Error writing universe snapshot: {str(e)}")
+        return SymbolUniverse(arrays, categories, sources)
+
+    except (OSError, ValueError) as e:
+        print(f"Error loading symbol universe: {str(e)}")
+        return SymbolUniverse(*build_arrays([]))
+
+
+_universe: Optional[SymbolUniverse] = None
+_universe_lock = threading.Lock()
+
+
+def get_universe() -> SymbolUniverse:
+    """Get the universe shared by the whole process, loading it on first use."""
+    global _universe
+    if _universe is None:
+        with _universe_lock:
+            if _universe is None:
+                _universe = load_universe()
+    return _universe
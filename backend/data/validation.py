@@ -0,0 +1,122 @@
+"""Symbol validation against the local universe and a persistent cache."""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config.settings import DATA_DIR, DATA_SETTINGS, TICKER_LISTS
+from .composites import is_composite
+from .providers import DataProvider
+from .universe import get_universe
+from backend.utils.metrics import record_cache
+
+
+class SymbolValidator:
+    """Validates symbols locally first and asks the provider only once."""
+
+    def __init__(
+        self,
+        provider: DataProvider,
+        provider_name: str,
+        cache_path: Optional[Path] = None
+    ):
+        """Initialize the validator.
+
+        Args:
+            provider: Provider asked about symbols unknown locally
+            provider_name: Name the cache entries are kept under
+            cache_path: JSON file holding earlier provider answers
+        """
+        self.provider = provider
+        self.provider_name = provider_name
+        self.cache_path = Path(cache_path or DATA_DIR / 'symbol_validation.json')
+        self._cache: Optional[Dict[str, List]] = None
+
+    def _load_cache(self) -> Dict[str, List]:
+        """Load cached answers as {symbol: [valid, checked_at]}."""
+        if self._cache is None:
+            try:
+                with open(self.cache_path, 'r') as f:
+                    self._cache = json.load(f).get(self.provider_name, {})
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self) -> None:
+        """Persist cached answers next to other providers' answers."""
+        try:
+            try:
+                with open(self.cache_path, 'r') as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = {}
+            stored[self.provider_name] = self._cache
+            tmp_path = self.cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(stored, f)
+            tmp_path.replace(self.cache_path)
+        except OSError as e:
+            print(f"Error saving symbol cache: {str(e)}")
+
+    def _cached(self, symbol: str, now: float) -> Optional[bool]:
+        """Get a cached answer that has not expired."""
+        entry = self._load_cache().get(symbol)
+        if not entry:
+            return None
+        valid, checked_at = entry
+        ttl = DATA_SETTINGS['validation_ttl']['valid' if valid else 'invalid']
+        return valid if now - checked_at < ttl else None
+
+    def validate(self, tickers: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """Validate symbols.
+
+        Symbols in the local universe are valid without a lookup. Cached
+        answers are used until their TTL runs out, and whatever is left is
+        sent to the provider in one batch. Symbols the provider could not
+        check are reported as None and not cached, so they are asked again.
+
+        Args:
+            tickers: Symbols to validate, as entered
+
+        Returns:
+            Dictionary mapping the given symbols to their validity, None
+            where unknown
+        """
+        tickers = list(tickers)
+        universe = get_universe()
+        listed = {ticker.upper() for category in TICKER_LISTS.values() for ticker in category}
+        now = time.time()
+
+        result = {}
+        unknown = []
+        for ticker in tickers:
+            symbol = ticker.strip().upper()
+            if not symbol:
+                result[ticker] = False
+            elif symbol in universe or symbol in listed or is_composite(ticker.strip()):
+                result[ticker] = True
+            else:
+                cached = self._cached(symbol, now)
+                if cached is None:
+                    unknown.append(symbol)
+                else:
+                    result[ticker] = cached
+
+        record_cache('symbols', hits=len(tickers) - len(unknown), misses=len(unknown))
+        if unknown:
+            unknown = list(dict.fromkeys(unknown))
+            answers = self.provider.validate_tickers(unknown)
+            cache = self._load_cache()
+            checked = {symbol: answers.get(symbol) for symbol in unknown}
+            for symbol, valid in checked.items():
+                if valid is not None:
+                    cache[symbol] = [bool(valid), now]
+            if any(valid is not None for valid in checked.values()):
+                self._save_cache()
+            for ticker in tickers:
+                if ticker not in result:
+                    valid = checked[ticker.strip().upper()]
+                    result[ticker] = None if valid is None else bool(valid)
+
+        return result
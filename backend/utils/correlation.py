@@ -0,0 +1,299 @@
+"""Correlation and covariance of many tickers at once.
+
+Returns of every ticker are computed over its own consecutive bars and
+aligned into one (dates x tickers) matrix. The pairwise statistics come
+from matrix products of that matrix, its squares and its validity
+mask, so each pair uses exactly the dates both tickers have a
+return on, as pandas' DataFrame.corr() does. Rolling correlation against
+a benchmark uses cumulative sums over each pair's common dates.
+
+Results are cached per (tickers, interval, range, window, benchmark) and
+the data they came from. Large universes are computed in a process pool
+so the web worker keeps serving other requests meanwhile.
+"""
+
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+from .metrics import record_cache
+from .normalization import PriceMatrix, align
+
+
+class Correlation(NamedTuple):
+    """Pairwise statistics of the returns of several tickers."""
+
+    tickers: List[str]
+    # (tickers x tickers) matrices; NaN where a pair has too few returns
+    correlation: np.ndarray
+    covariance: np.ndarray
+    # Number of returns each pair has in common
+    counts: np.ndarray
+    dates: np.ndarray
+    # Rolling correlation of every ticker with the benchmark, per date
+    rolling: Dict[str, np.ndarray]
+
+
+def returns_matrix(ticker_data: Dict[str, pd.DataFrame], column: str = 'close') -> PriceMatrix:
+    """Simple returns of several tickers, aligned into a matrix.
+
+    Each return is taken between consecutive bars of the ticker itself,
+    so a ticker that does not trade on some dates of the others still
+    has a return on its next bar.
+    """
+    matrix = align(ticker_data, column)
+    returns = np.full(matrix.values.shape, np.nan, order='F')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for col, ticker in enumerate(matrix.tickers):
+            rows = matrix.rows[ticker]
+            prices = matrix.values[rows, col]
+            returns[rows[1:], col] = prices[1:] / prices[:-1] - 1.0
+    returns[~np.isfinite(returns)] = np.nan
+    return matrix._replace(values=returns)
+
+
+def _column_means(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Mean of the present values of each column, 0 for empty columns."""
+    counts = valid.sum(axis=0)
+    return np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+
+
+def pairwise(returns: np.ndarray, min_periods: int = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pairwise correlation and covariance of the columns of a matrix.
+
+    Args:
+        returns: (dates x tickers) matrix with NaN for missing values
+        min_periods: Common values a pair needs to get a result
+
+    Returns:
+        Correlation, covariance and number of common values of every pair
+    """
+    valid = ~np.isnan(returns)
+    # Centering first keeps the sums below from cancelling out
+    x = np.where(valid, returns - _column_means(returns, valid), 0.0)
+    mask = valid.astype(np.float64)
+
+    # Every pairwise sum in two products: x^T x, and [x, x^2, mask]^T mask
+    n = returns.shape[1]
+    products = x.T @ x
+    sums = np.hstack([x, x * x, mask]).T @ mask
+    x_sums = sums[:n]            # sum of x_i where x_j is present too
+    squares = sums[n:2 * n]
+    counts = sums[2 * n:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross = products - x_sums * x_sums.T / counts
+        spread = squares - x_sums ** 2 / counts
+        covariance = cross / (counts - 1)
+        correlation = np.clip(cross / np.sqrt(spread * spread.T), -1.0, 1.0)
+
+    too_few = counts < max(min_periods, 2)
+    flat = spread <= 1e-12 * np.diag(squares)[:, None]
+    covariance[too_few] = np.nan
+    correlation[too_few | flat | flat.T] = np.nan
+    return correlation, covariance, counts.astype(np.int64)
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Sums over the last `window` rows of each column, from row window - 1 on."""
+    sums = np.cumsum(x, axis=0)
+    out = sums[window - 1:].copy()
+    out[1:] -= sums[:-window]
+    return out
+
+
+def rolling_correlation(returns: np.ndarray, benchmark: int, window: int) -> np.ndarray:
+    """Rolling correlation of every column with one of them.
+
+    A window is the last `window` dates on which both the column and the
+    benchmark have a value, so a stock compared with a ticker that also
+    trades on weekends still gets full windows.
+
+    Args:
+        returns: (dates x tickers) matrix with NaN for missing values
+        benchmark: Column of the benchmark
+        window: Number of common values in a window
+
+    Returns:
+        (dates x tickers) matrix of correlations, NaN on dates where the
+        pair has no common value or fewer than `window` so far
+    """
+    out = np.full(returns.shape, np.nan)
+    if len(returns) < window or window < 2:
+        return out
+
+    valid = ~np.isnan(returns)
+    centered = returns - _column_means(returns, valid)
+    both = valid & valid[:, [benchmark]]
+    # Move each pair's common dates to the top of its column, in order
+    order = np.argsort(~both, axis=0, kind='stable')
+    x = np.take_along_axis(np.where(both, centered, 0.0), order, axis=0)
+    y = np.take_along_axis(np.where(both, centered[:, [benchmark]], 0.0), order, axis=0)
+    common = both.sum(axis=0)
+
+    sx, sy = _window_sums(x, window), _window_sums(y, window)
+    sxx, syy = _window_sums(x * x, window), _window_sums(y * y, window)
+    sxy = _window_sums(x * y, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross = sxy - sx * sy / window
+        spread_x = sxx - sx * sx / window
+        spread_y = syy - sy * sy / window
+        corr = np.clip(cross / np.sqrt(spread_x * spread_y), -1.0, 1.0)
+    # Differences of cumulative sums leave rounding noise where a window is
+    # constant, so spreads are compared to the size of the sums
+    flat_x = spread_x <= 1e-10 * np.maximum(np.sum(x * x, axis=0), 1e-300)
+    flat_y = spread_y <= 1e-10 * np.maximum(np.sum(y * y, axis=0), 1e-300)
+    corr[flat_x | flat_y] = np.nan
+
+    # Back to dates; packed rows past a column's common count are padding
+    rows = np.arange(window - 1, len(returns))[:, None]
+    keep = rows < common
+    columns = np.broadcast_to(np.arange(returns.shape[1]), keep.shape)
+    out[order[window - 1:][keep], columns[keep]] = corr[keep]
+    return out
+
+
+def _compute(
+    dates: np.ndarray,
+    tickers: List[str],
+    returns: np.ndarray,
+    window: int,
+    benchmark: Optional[str]
+) -> Correlation:
+    """Statistics of an aligned returns matrix; runs in pool workers too."""
+    correlation, covariance, counts = pairwise(returns)
+    rolling = {}
+    if benchmark in tickers:
+        values = rolling_correlation(returns, tickers.index(benchmark), window)
+        rolling = {ticker: values[:, col] for col, ticker in enumerate(tickers)}
+    return Correlation(tickers, correlation, covariance, counts, dates, rolling)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process pool for large universes, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Workers fork from a clean server process, not from this
+            # threaded one, and only need this module
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _pool = ProcessPoolExecutor(
+                max_workers=DATA_SETTINGS['correlation']['pool_workers'],
+                mp_context=context
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class CorrelationCache:
+    """Correlation results per selection, least recently used first out."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Number of results kept
+        """
+        self.max_entries = max_entries or DATA_SETTINGS['correlation']['cache_size']
+        self._entries: 'OrderedDict[Tuple, Correlation]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ticker_data: Dict[str, pd.DataFrame], interval: str, start, end, window: int, benchmark) -> Tuple:
+        """Key of a selection, including the last bar of every ticker.
+
+        A refreshed or revised last bar gives a new key, so results never
+        outlive the data they were computed from.
+        """
+        data = tuple(
+            (ticker, len(df), df.index[-1].value, float(df['close'].iat[-1]))
+            for ticker, df in ticker_data.items() if not df.empty
+        )
+        return (data, interval, str(start), str(end), window, benchmark)
+
+    def compute(
+        self,
+        ticker_data: Dict[str, pd.DataFrame],
+        interval: str,
+        start_date=None,
+        end_date=None,
+        window: int = 60,
+        benchmark: Optional[str] = None
+    ) -> Correlation:
+        """Correlation statistics of several tickers.
+
+        Args:
+            ticker_data: Dictionary mapping tickers to OHLCV DataFrames of
+                the selected range
+            interval: Bar interval of the data
+            start_date: Start of the selected range, part of the cache key
+            end_date: End of the selected range, part of the cache key
+            window: Bars in a rolling window
+            benchmark: Ticker to compute rolling correlations against
+
+        Returns:
+            Pairwise statistics and rolling correlations
+        """
+        key = self._key(ticker_data, interval, start_date, end_date, window, benchmark)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        record_cache('correlation', hits=int(result is not None), misses=int(result is None))
+        if result is not None:
+            return result
+
+        matrix = returns_matrix(ticker_data)
+        args = (matrix.dates, matrix.tickers, matrix.values, window, benchmark)
+        result = None
+        if len(matrix.tickers) >= DATA_SETTINGS['correlation']['pool_min_tickers']:
+            try:
+                result = _get_pool().submit(_compute, *args).result()
+            except BrokenProcessPool as e:
+                print(f"Error in correlation worker: {str(e)}")
+                _reset_pool()
+        if result is None:
+            result = _compute(*args)
+
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache: Optional[CorrelationCache] = None
+
+
+def get_correlation_cache() -> CorrelationCache:
+    """Get the correlation cache shared by all callbacks."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = CorrelationCache()
+    return _shared_cache
@@ -0,0 +1,445 @@
+"""Technical indicators computed for many tickers at once.
+
+Series are stacked into one (bars x tickers) matrix aligned on their last
+bar, with NaN before a ticker's first bar, so rolling windows and
+recursive averages run over each ticker's own consecutive bars in a
+single NumPy pass. Every indicator can continue from the state it ended
+in, which IndicatorCache uses to compute only the bars appended since the
+last call.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+
+PERIODS_PER_YEAR = {'1d': 252, '1wk': 52, '1mo': 12}
+
+Arrays = Dict[str, np.ndarray]
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Sums over the last `window` rows; NaN until a window has no NaN."""
+    out = np.full(x.shape, np.nan)
+    if len(x) < window:
+        return out
+    valid = ~np.isnan(x)
+    sums = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    window_sums = sums[window - 1:].copy()
+    window_sums[1:] -= sums[:-window]
+    window_counts = counts[window - 1:].copy()
+    window_counts[1:] -= counts[:-window]
+    out[window - 1:] = np.where(window_counts == window, window_sums, np.nan)
+    return out
+
+
+def _rolling_mean_std(x: np.ndarray, window: int, ddof: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling mean and standard deviation over the last `window` rows."""
+    # Shifting by a value of each column keeps the sums of squares small
+    shift = x[np.isnan(x).argmin(axis=0), np.arange(x.shape[1])] if len(x) else 0.0
+    shifted = x - shift
+    sums = _rolling_sum(shifted, window)
+    squares = _rolling_sum(shifted * shifted, window)
+    variance = (squares - sums * sums / window) / (window - ddof)
+    return sums / window + shift, np.sqrt(np.maximum(variance, 0.0))
+
+
+def _ewm(x: np.ndarray, alpha: float, last: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Exponentially weighted mean continuing from `last`.
+
+    A ticker without a previous value starts at its first value.
+
+    Returns:
+        The means and the last mean of every ticker
+    """
+    out = np.empty(x.shape)
+    current = np.full(x.shape[1], np.nan) if last is None else last.copy()
+    for i in range(len(x)):
+        row = x[i]
+        step = current + alpha * (row - current)
+        current = np.where(np.isnan(current), row, np.where(np.isnan(row), current, step))
+        out[i] = current
+    return out, current
+
+
+class Indicator:
+    """An indicator with its parameters.
+
+    Subclasses set the name, inputs, outputs and default parameters and
+    implement _compute. Windowed indicators keep `lookback` input bars
+    in their state to continue from; recursive ones keep their last
+    values.
+    """
+
+    name = ''
+    title = ''
+    inputs = ('close',)
+    outputs: Tuple[str, ...] = ()
+    # Drawn on the price axis rather than in a panel of its own
+    overlay = True
+    defaults: Dict[str, float] = {}
+
+    def __init__(self, *args):
+        self.params = dict(self.defaults)
+        self.params.update(zip(self.defaults, args))
+
+    @property
+    def key(self) -> Tuple:
+        """Name and parameter values."""
+        return (self.name,) + tuple(self.params.values())
+
+    @property
+    def spec(self) -> str:
+        """Text form parsed by parse_indicator, e.g. 'sma:20'."""
+        return ':'.join(str(value) for value in self.key)
+
+    @property
+    def label(self) -> str:
+        """Display name, e.g. 'SMA 20'."""
+        return f"{self.title} {', '.join(f'{value:g}' for value in self.params.values())}"
+
+    @property
+    def lookback(self) -> int:
+        """Input bars needed before the first new bar."""
+        return 0
+
+    def _compute(self, data: Arrays, start: int, state: Dict, interval: str) -> Tuple[Arrays, Dict]:
+        """Compute rows from `start` of data, which begins with kept bars."""
+        raise NotImplementedError
+
+    def run(self, data: Arrays, state: Optional[Dict] = None, interval: str = '1d') -> Tuple[Arrays, Dict]:
+        """Compute new bars of several tickers.
+
+        Args:
+            data: Input columns as (bars x tickers) arrays
+            state: State the previous run ended in, or None to start over
+            interval: Bar interval
+
+        Returns:
+            Outputs for the new bars and the state after them
+        """
+        state = dict(state or {})
+        start = 0
+        history = state.pop('history', None)
+        if self.lookback and history is not None:
+            start = len(history[self.inputs[0]])
+            data = {name: np.concatenate([history[name], data[name]]) for name in self.inputs}
+
+        outputs, new_state = self._compute(data, start, state, interval)
+        if self.lookback:
+            new_state['history'] = {name: data[name][-self.lookback:] for name in self.inputs}
+        return outputs, new_state
+
+
+class SMA(Indicator):
+    name = 'sma'
+    title = 'SMA'
+    outputs = ('sma',)
+    defaults = {'window': 20}
+
+    @property
+    def lookback(self) -> int:
+        return int(self.params['window']) - 1
+
+    def _compute(self, data, start, state, interval):
+        window = int(self.params['window'])
+        return {'sma': (_rolling_sum(data['close'], window) / window)[start:]}, {}
+
+
+class EMA(Indicator):
+    name = 'ema'
+    title = 'EMA'
+    outputs = ('ema',)
+    defaults = {'span': 20}
+
+    def _compute(self, data, start, state, interval):
+        ema, last = _ewm(data['close'], 2.0 / (self.params['span'] + 1), state.get('ema'))
+        return {'ema': ema}, {'ema': last}
+
+
+class Bollinger(Indicator):
+    name = 'bbands'
+    title = 'Bollinger'
+    outputs = ('middle', 'upper', 'lower')
+    defaults = {'window': 20, 'width': 2}
+
+    @property
+    def lookback(self) -> int:
+        return int(self.params['window']) - 1
+
+    def _compute(self, data, start, state, interval):
+        mean, std = _rolling_mean_std(data['close'], int(self.params['window']))
+        mean, std = mean[start:], std[start:]
+        band = self.params['width'] * std
+        return {'middle': mean, 'upper': mean + band, 'lower': mean - band}, {}
+
+
+class RSI(Indicator):
+    name = 'rsi'
+    title = 'RSI'
+    outputs = ('rsi',)
+    overlay = False
+    defaults = {'period': 14}
+
+    @property
+    def lookback(self) -> int:
+        return 1
+
+    def _compute(self, data, start, state, interval):
+        close = data['close']
+        delta = np.full((len(close) - start, close.shape[1]), np.nan)
+        first = max(start, 1)
+        delta[first - start:] = close[first:] - close[first - 1:-1]
+
+        alpha = 1.0 / self.params['period']
+        gain, last_gain = _ewm(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0)), alpha, state.get('gain'))
+        loss, last_loss = _ewm(np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0)), alpha, state.get('loss'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + gain / loss))
+        rsi[np.isnan(gain)] = np.nan
+        return {'rsi': rsi}, {'gain': last_gain, 'loss': last_loss}
+
+
+class MACD(Indicator):
+    name = 'macd'
+    title = 'MACD'
+    outputs = ('macd', 'signal', 'histogram')
+    overlay = False
+    defaults = {'fast': 12, 'slow': 26, 'signal': 9}
+
+    def _compute(self, data, start, state, interval):
+        close = data['close']
+        fast, last_fast = _ewm(close, 2.0 / (self.params['fast'] + 1), state.get('fast'))
+        slow, last_slow = _ewm(close, 2.0 / (self.params['slow'] + 1), state.get('slow'))
+        macd = fast - slow
+        signal, last_signal = _ewm(macd, 2.0 / (self.params['signal'] + 1), state.get('signal'))
+        outputs = {'macd': macd, 'signal': signal, 'histogram': macd - signal}
+        return outputs, {'fast': last_fast, 'slow': last_slow, 'signal': last_signal}
+
+
+class ATR(Indicator):
+    name = 'atr'
+    title = 'ATR'
+    inputs = ('high', 'low', 'close')
+    outputs = ('atr',)
+    overlay = False
+    defaults = {'period': 14}
+
+    @property
+    def lookback(self) -> int:
+        return 1
+
+    def _compute(self, data, start, state, interval):
+        high, low = data['high'][start:], data['low'][start:]
+        previous = np.full(high.shape, np.nan)
+        first = max(start, 1)
+        previous[first - start:] = data['close'][first - 1:-1]
+        # fmax skips the missing previous close of a first bar
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+        atr, last = _ewm(true_range, 1.0 / self.params['period'], state.get('atr'))
+        return {'atr': atr}, {'atr': last}
+
+
+class Volatility(Indicator):
+    name = 'volatility'
+    title = 'Volatility'
+    outputs = ('volatility',)
+    overlay = False
+    defaults = {'window': 20}
+
+    @property
+    def lookback(self) -> int:
+        return int(self.params['window'])
+
+    def _compute(self, data, start, state, interval):
+        close = data['close']
+        returns = np.full(close.shape, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = np.log(close[1:] / close[:-1])
+        _, std = _rolling_mean_std(returns, int(self.params['window']), ddof=1)
+        # Annualized, in percent
+        scale = np.sqrt(PERIODS_PER_YEAR.get(interval, 252)) * 100.0
+        return {'volatility': std[start:] * scale}, {}
+
+
+INDICATORS = {cls.name: cls for cls in (SMA, EMA, Bollinger, RSI, MACD, ATR, Volatility)}
+
+# Choices offered in the chart sidebar
+PRESETS = [
+    'sma:20', 'sma:50', 'sma:200', 'ema:20', 'ema:50', 'bbands:20:2',
+    'rsi:14', 'macd:12:26:9', 'atr:14', 'volatility:20'
+]
+
+
+def parse_indicator(spec: str) -> Indicator:
+    """Create an indicator from text such as 'bbands:20:2'."""
+    name, *args = spec.split(':')
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}")
+    return INDICATORS[name](*(float(arg) if '.' in arg else int(arg) for arg in args))
+
+
+def _stack(columns: List[np.ndarray]) -> np.ndarray:
+    """Stack series of different lengths, aligned on their last bar."""
+    out = np.full((max(len(column) for column in columns), len(columns)), np.nan)
+    for col, column in enumerate(columns):
+        out[len(out) - len(column):, col] = column
+    return out
+
+
+def _stack_states(states: List[Dict]) -> Dict:
+    """Merge single-ticker states into one state of several tickers."""
+    merged = {}
+    for name, value in states[0].items():
+        if isinstance(value, dict):
+            merged[name] = _stack_states([state[name] for state in states])
+        elif value.ndim == 2:
+            # Kept bars, fewer for tickers with a short history
+            rows = max(len(state[name]) for state in states)
+            merged[name] = np.concatenate([_pad(state[name], rows) for state in states], axis=1)
+        else:
+            merged[name] = np.concatenate([state[name] for state in states])
+    return merged
+
+
+def _pad(history: np.ndarray, rows: int) -> np.ndarray:
+    """Pad a (bars x 1) history with NaN on top to `rows` bars."""
+    out = np.full((rows, 1), np.nan)
+    out[rows - len(history):] = history
+    return out
+
+
+def _split_state(state: Dict, col: int) -> Dict:
+    """State of one ticker out of a state of several."""
+    return {
+        name: _split_state(value, col) if isinstance(value, dict)
+        else value[:, col:col + 1].copy() if value.ndim == 2 else value[col:col + 1].copy()
+        for name, value in state.items()
+    }
+
+
+class _Entry:
+    """Cached values of one indicator for one ticker."""
+
+    __slots__ = ('dates', 'outputs', 'state')
+
+    def __init__(self, dates: np.ndarray, outputs: Arrays, state: Dict):
+        self.dates = dates
+        self.outputs = outputs
+        # State before the last bar, so a revised last bar is recomputed
+        self.state = state
+
+
+class IndicatorCache:
+    """Indicator values per (ticker, interval, indicator and parameters).
+
+    When a ticker's series is the cached one with bars appended, only the
+    new bars and the last cached bar are computed.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Number of series kept, least recently used first out
+        """
+        self.max_entries = max_entries or DATA_SETTINGS['indicator_cache_size']
+        self._entries: 'OrderedDict[Tuple, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _run(self, indicator: Indicator, columns: Dict[str, List[np.ndarray]], state: Optional[Dict], interval: str):
+        """Run a batch, returning outputs and the state before the last bar."""
+        data = {name: _stack(columns[name]) for name in indicator.inputs}
+        head, before_last = indicator.run({name: values[:-1] for name, values in data.items()}, state, interval)
+        tail, _ = indicator.run({name: values[-1:] for name, values in data.items()}, before_last, interval)
+        outputs = {name: np.concatenate([head[name], tail[name]]) for name in indicator.outputs}
+        return outputs, before_last
+
+    def compute(
+        self,
+        indicator: Indicator,
+        ticker_data: Dict[str, pd.DataFrame],
+        interval: str
+    ) -> Dict[str, Arrays]:
+        """Compute an indicator for several tickers.
+
+        Args:
+            indicator: Indicator with its parameters
+            ticker_data: Dictionary mapping tickers to OHLCV DataFrames
+            interval: Bar interval of the data
+
+        Returns:
+            Dictionary mapping tickers to outputs, one value per bar
+        """
+        results: Dict[str, Arrays] = {}
+        dates = {}
+        full: List[str] = []
+        # Tickers continuing from a cached state, by number of bars redone
+        tails: Dict[int, List[Tuple[str, _Entry]]] = {}
+
+        with self._lock:
+            for ticker, df in ticker_data.items():
+                if df.empty:
+                    continue
+                dates[ticker] = df.index.values.astype('datetime64[ns]').view(np.int64)
+                entry = self._entries.get((ticker, interval, indicator.key))
+                cached = len(entry.dates) if entry else 0
+                if entry and len(dates[ticker]) >= cached and dates[ticker][0] == entry.dates[0] \
+                        and dates[ticker][cached - 1] == entry.dates[-1]:
+                    tails.setdefault(len(dates[ticker]) - cached + 1, []).append((ticker, entry))
+                else:
+                    full.append(ticker)
+
+        if full:
+            columns = {
+                name: [ticker_data[ticker][name].to_numpy(dtype=np.float64) for ticker in full]
+                for name in indicator.inputs
+            }
+            outputs, state = self._run(indicator, columns, None, interval)
+            for col, ticker in enumerate(full):
+                bars = len(dates[ticker])
+                results[ticker] = {name: values[len(values) - bars:, col].copy() for name, values in outputs.items()}
+                self._store(ticker, interval, indicator, dates[ticker], results[ticker], _split_state(state, col))
+
+        for redo, entries in tails.items():
+            columns = {
+                name: [ticker_data[ticker][name].to_numpy(dtype=np.float64)[-redo:] for ticker, _ in entries]
+                for name in indicator.inputs
+            }
+            outputs, state = self._run(indicator, columns, _stack_states([entry.state for _, entry in entries]), interval)
+            for col, (ticker, entry) in enumerate(entries):
+                results[ticker] = {
+                    name: np.concatenate([entry.outputs[name][:-1], outputs[name][:, col]])
+                    for name in indicator.outputs
+                }
+                self._store(ticker, interval, indicator, dates[ticker], results[ticker], _split_state(state, col))
+
+        return results
+
+    def _store(self, ticker: str, interval: str, indicator: Indicator, dates: np.ndarray, outputs: Arrays, state: Dict) -> None:
+        key = (ticker, interval, indicator.key)
+        with self._lock:
+            self._entries[key] = _Entry(dates, outputs, state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache: Optional[IndicatorCache] = None
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """Get the indicator cache shared by all callbacks."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = IndicatorCache()
+    return _shared_cache
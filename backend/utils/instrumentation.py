@@ -0,0 +1,192 @@
+"""Lightweight timing spans, callback instrumentation and profiling."""
+
+import cProfile
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config.settings import PERF_SETTINGS
+
+# Spans of the callback running in the current thread, or None outside one
+_trace: ContextVar[Optional[List[Dict]]] = ContextVar('trace', default=None)
+_depth: ContextVar[int] = ContextVar('depth', default=0)
+_fields: ContextVar[Optional[Dict]] = ContextVar('fields', default=None)
+
+_listeners: List[Callable[[str, float, Dict], None]] = []
+_totals: Dict[str, List[float]] = {}
+_lock = threading.Lock()
+_profile_requests = set()
+
+
+def add_listener(listener: Callable[[str, float, Dict], None]) -> None:
+    """Call listener(name, seconds, fields) whenever a span ends."""
+    _listeners.append(listener)
+
+
+def _finish(name: str, seconds: float, fields: Dict) -> None:
+    """Aggregate a finished span and notify listeners."""
+    with _lock:
+        total = _totals.setdefault(name, [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += seconds
+        total[2] = max(total[2], seconds)
+    for listener in _listeners:
+        try:
+            listener(name, seconds, fields)
+        except Exception as e:
+            print(f"Error in span listener: {str(e)}")
+
+
+@contextmanager
+def span(name: str, **fields):
+    """Time a block of code.
+
+    Inside an instrumented callback the span is also added to that
+    callback's trace, which ends up in the slow-callback log. Fields can
+    be updated from inside the block, e.g. with row counts.
+    """
+    if not PERF_SETTINGS['enabled']:
+        yield fields
+        return
+
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    fields_token = _fields.set(fields)
+    started = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        seconds = time.perf_counter() - started
+        _depth.reset(token)
+        _fields.reset(fields_token)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append({'name': name, 'ms': round(seconds * 1000, 2), 'depth': depth, **fields})
+        _finish(name, seconds, fields)
+
+
+def annotate(**fields) -> None:
+    """Add fields, such as row counts, to the innermost open span."""
+    current = _fields.get()
+    if current is not None:
+        current.update(fields)
+
+
+def timed(name: str) -> Callable:
+    """Decorator running a function inside a span."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def span_totals() -> Dict[str, Dict[str, float]]:
+    """Count, total and max seconds of every span name so far."""
+    with _lock:
+        return {
+            name: {'count': count, 'total_s': total, 'max_s': longest}
+            for name, (count, total, longest) in _totals.items()
+        }
+
+
+def request_profile(callback_name: str = '*') -> None:
+    """Profile the next invocation of a callback ('*' for any)."""
+    _profile_requests.add(callback_name)
+
+
+def _take_profile_request(callback_name: str) -> bool:
+    """Whether this invocation should be profiled; consumes the request."""
+    flag = Path(PERF_SETTINGS['profile_flag'])
+    if flag.exists():
+        try:
+            _profile_requests.add(flag.read_text().strip() or '*')
+            flag.unlink()
+        except OSError:
+            pass
+    for wanted in (callback_name, '*'):
+        if wanted in _profile_requests:
+            _profile_requests.discard(wanted)
+            return True
+    return False
+
+
+def _write_slow_log(entry: Dict) -> None:
+    """Append one slow-callback entry as a JSON line."""
+    try:
+        path = Path(PERF_SETTINGS['slow_log_path'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _lock, open(path, 'a') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+    except OSError as e:
+        print(f"Error writing slow callback log: {str(e)}")
+
+
+def _dump_profile(profiler: cProfile.Profile, callback_name: str) -> Path:
+    """Save a profile where pstats/snakeviz can read it."""
+    directory = Path(PERF_SETTINGS['profile_dir'])
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{callback_name}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof"
+    profiler.dump_stats(str(path))
+    return path
+
+
+def instrument(func: Callable, callback_name: str) -> Callable:
+    """Wrap a callback with timing, slow logging and on-demand profiling."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace: List[Dict] = []
+        token = _trace.set(trace)
+        profiler = cProfile.Profile() if _take_profile_request(callback_name) else None
+        started = time.perf_counter()
+        failed = False
+        try:
+            if profiler:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except Exception as e:
+            # PreventUpdate is how callbacks decline to update, not a failure
+            failed = type(e).__name__ != 'PreventUpdate'
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            _trace.reset(token)
+            _finish(f"callback.{callback_name}", seconds, {'failed': failed})
+
+            profile_path = _dump_profile(profiler, callback_name) if profiler else None
+            if profile_path:
+                print(f"Profile of {callback_name} saved to {profile_path}")
+            if seconds * 1000 >= PERF_SETTINGS['slow_callback_ms'] or profile_path:
+                _write_slow_log({
+                    'time': datetime.now().isoformat(timespec='milliseconds'),
+                    'callback': callback_name,
+                    'ms': round(seconds * 1000, 2),
+                    'failed': failed,
+                    'spans': trace,
+                    'profile': str(profile_path) if profile_path else None
+                })
+    return wrapper
+
+
+def instrument_callbacks(app) -> None:
+    """Instrument every callback registered on a Dash app so far."""
+    if not PERF_SETTINGS['enabled']:
+        return
+    if PERF_SETTINGS['profile_callback']:
+        request_profile(PERF_SETTINGS['profile_callback'])
+
+    for entry in app.callback_map.values():
+        func = entry.get('callback')
+        if func is None or getattr(func, '_instrumented', False):
+            continue
+        wrapped = instrument(func, getattr(func, '__name__', 'callback'))
+        wrapped._instrumented = True
+        entry['callback'] = wrapped
@@ -0,0 +1,446 @@
+"""Prometheus metrics for the dashboard, served at /metrics.
+
+Timings come from the instrumentation spans; counters for rows, errors,
+rate-limit waits and cache lookups are incremented where they happen.
+
+Under a pre-fork server every worker counts on its own, and a scrape
+reaches just one of them. So each worker also writes its counts and
+session times to a file of its own in PERF_SETTINGS['metrics_dir'],
+every few seconds while it serves and at exit, and /metrics adds up the
+files of all workers: counters and histograms are summed, sessions are
+counted once across workers. Counts of a worker that exited stay in the
+sum, so counters never go backwards; gunicorn clears the directory when
+it starts.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import PERF_SETTINGS
+from . import instrumentation
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)
+
+SESSION_COOKIE = 'dashboard_session'
+
+
+def _escape(value) -> str:
+    """Escape a label value."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    """Render a label set."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A metric family with optional labels."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def state(self) -> List:
+        """Copy of the values as JSON-ready [label values, value] pairs."""
+        with self._lock:
+            return [[list(key), json.loads(json.dumps(value))] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(values: Dict[Tuple, object], state: List) -> None:
+        """Add the values of another worker's state to values."""
+        raise NotImplementedError
+
+    def _samples(self, values: Dict[Tuple, object]) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, values: Optional[Dict[Tuple, object]] = None) -> List[str]:
+        """Exposition lines of the family.
+
+        Args:
+            values: Values to render, this process's own by default
+        """
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ] + self._samples(values)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add to the count of a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current count of a label set in this process."""
+        return self._values.get(self._key(labels), 0)
+
+    @staticmethod
+    def merge(values: Dict[Tuple, object], state: List) -> None:
+        for key, value in state:
+            key = tuple(key)
+            values[key] = values.get(key, 0) + value
+
+    def _samples(self, values: Dict[Tuple, object]) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """A value that is set, or computed when scraped."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), collect: Optional[Callable] = None):
+        super().__init__(name, documentation, labels)
+        # collect(merged) returns {label values tuple: value}, given the
+        # values of every metric summed over the workers, see render()
+        self.collect = collect
+
+    def set(self, value: float, **labels) -> None:
+        """Set the value of a label set."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @staticmethod
+    def merge(values: Dict[Tuple, object], state: List) -> None:
+        # The latest value written by any worker
+        values.update((tuple(key), value) for key, value in state)
+
+    def _samples(self, values: Dict[Tuple, object]) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation."""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def merge(values: Dict[Tuple, object], state: List) -> None:
+        for key, (counts, total, count) in state:
+            key = tuple(key)
+            merged = values.get(key)
+            if merged is None:
+                values[key] = [list(counts), total, count]
+                continue
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+
+    def _samples(self, values: Dict[Tuple, object]) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+CALLBACK_SECONDS = Histogram(
+    'dashboard_callback_duration_seconds', "Dash callback duration.", ['callback']
+)
+CALLBACK_ERRORS = Counter(
+    'dashboard_callback_errors_total', "Dash callbacks that raised.", ['callback']
+)
+CALLBACK_RESPONSE_BYTES = Histogram(
+    'dashboard_callback_response_bytes', "Size of callback responses sent to the browser.",
+    ['output'], BYTES_BUCKETS
+)
+FIGURE_SECONDS = Histogram(
+    'dashboard_figure_build_seconds', "Time to build the chart figure in update_chart."
+)
+PROVIDER_SECONDS = Histogram(
+    'dashboard_provider_request_duration_seconds', "Data provider call duration.",
+    ['provider', 'operation']
+)
+PROVIDER_ERRORS = Counter(
+    'dashboard_provider_errors_total', "Data provider calls that failed.", ['provider']
+)
+RATE_LIMIT_WAIT_SECONDS = Counter(
+    'dashboard_rate_limit_wait_seconds_total', "Time spent waiting for provider rate limits.",
+    ['provider']
+)
+RATE_LIMIT_WAITS = Counter(
+    'dashboard_rate_limit_waits_total', "Provider calls delayed by a rate limit.", ['provider']
+)
+DB_SECONDS = Histogram(
+    'dashboard_db_operation_duration_seconds', "Database operation duration.", ['operation']
+)
+DB_ROWS = Counter(
+    'dashboard_db_rows_total', "Rows read from or written to the database.",
+    ['operation', 'direction']
+)
+CACHE_REQUESTS = Counter(
+    'dashboard_cache_requests_total', "Cache lookups by result.", ['cache', 'result']
+)
+
+
+def _hit_ratios(merged: Dict) -> Dict[Tuple, float]:
+    """Hit ratio of every cache seen so far."""
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in merged['metrics'].get(CACHE_REQUESTS.name, {}).items():
+        entry = totals.setdefault(cache, [0.0, 0.0])
+        entry[0 if result == 'hit' else 1] += value
+    return {(cache,): hits / (hits + misses) for cache, (hits, misses) in totals.items() if hits + misses}
+
+
+CACHE_HIT_RATIO = Gauge(
+    'dashboard_cache_hit_ratio', "Share of cache lookups that were hits.", ['cache'], _hit_ratios
+)
+
+# Browser sessions by id -> last request time
+_sessions: Dict[str, float] = {}
+_sessions_lock = threading.Lock()
+
+
+def _active_sessions(merged: Dict) -> Dict[Tuple, float]:
+    """Sessions seen by any worker within the activity window."""
+    cutoff = time.time() - PERF_SETTINGS['session_timeout']
+    return {(): sum(1 for seen in merged['sessions'].values() if seen >= cutoff)}
+
+
+ACTIVE_SESSIONS = Gauge(
+    'dashboard_active_sessions', "Browser sessions active within the timeout.", (), _active_sessions
+)
+
+REGISTRY = [
+    CALLBACK_SECONDS,
+    CALLBACK_ERRORS,
+    CALLBACK_RESPONSE_BYTES,
+    FIGURE_SECONDS,
+    PROVIDER_SECONDS,
+    PROVIDER_ERRORS,
+    RATE_LIMIT_WAITS,
+    RATE_LIMIT_WAIT_SECONDS,
+    DB_SECONDS,
+    DB_ROWS,
+    CACHE_REQUESTS,
+    CACHE_HIT_RATIO,
+    ACTIVE_SESSIONS
+]
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    """Count lookups of a cache."""
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result='hit')
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result='miss')
+
+
+def record_rate_limit_wait(provider: str, seconds: float) -> None:
+    """Count a call delayed by a rate limit."""
+    RATE_LIMIT_WAITS.inc(provider=provider)
+    RATE_LIMIT_WAIT_SECONDS.inc(seconds, provider=provider)
+
+
+def _on_span(name: str, seconds: float, fields: Dict) -> None:
+    """Turn finished spans into metrics."""
+    kind, _, rest = name.partition('.')
+    if kind == 'callback':
+        CALLBACK_SECONDS.observe(seconds, callback=rest)
+        if fields.get('failed'):
+            CALLBACK_ERRORS.inc(callback=rest)
+    elif kind == 'provider':
+        provider, _, operation = rest.partition('.')
+        PROVIDER_SECONDS.observe(seconds, provider=provider, operation=operation)
+        if fields.get('failed'):
+            PROVIDER_ERRORS.inc(provider=provider)
+    elif kind == 'db':
+        DB_SECONDS.observe(seconds, operation=rest)
+        for direction in ('read', 'written'):
+            if fields.get(f"rows_{direction}"):
+                DB_ROWS.inc(fields[f"rows_{direction}"], operation=rest, direction=direction)
+    elif name == 'chart.figure':
+        FIGURE_SECONDS.observe(seconds)
+
+
+# File this process writes its metrics to, named when first written so
+# a forked worker gets its own
+_state_path: Optional[Path] = None
+_state_pid: Optional[int] = None
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _state() -> Dict:
+    """This process's counts and recently seen sessions."""
+    cutoff = time.time() - PERF_SETTINGS['session_timeout']
+    with _sessions_lock:
+        for session_id in [key for key, seen in _sessions.items() if seen < cutoff]:
+            del _sessions[session_id]
+        sessions = dict(_sessions)
+    return {
+        'metrics': {metric.name: metric.state() for metric in REGISTRY if not getattr(metric, 'collect', None)},
+        'sessions': sessions
+    }
+
+
+def _directory() -> Optional[Path]:
+    directory = PERF_SETTINGS['metrics_dir']
+    return Path(directory) if directory else None
+
+
+def flush() -> None:
+    """Write this process's metrics for the other workers to add up."""
+    global _state_path, _state_pid, _last_flush
+    directory = _directory()
+    if directory is None:
+        return
+    with _flush_lock:
+        _last_flush = time.time()
+        if _state_pid != os.getpid():
+            _state_pid = os.getpid()
+            _state_path = directory / f"{_state_pid}-{uuid.uuid4().hex[:8]}.json"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = _state_path.with_name(f".{_state_path.name}")
+            tmp_path.write_text(json.dumps(_state()))
+            os.replace(tmp_path, _state_path)
+        except OSError as e:
+            print(f"Error writing metrics: {str(e)}")
+
+
+def _merged() -> Dict:
+    """Metrics of every worker added up, this one's current."""
+    own = _state()
+    states = [own]
+    directory = _directory()
+    if directory is not None:
+        flush()
+        try:
+            paths = [path for path in directory.glob('*.json') if path != _state_path]
+        except OSError:
+            paths = []
+        for path in paths:
+            try:
+                states.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Written or removed while read
+                continue
+
+    merged = {'metrics': {}, 'sessions': {}}
+    kinds = {metric.name: metric for metric in REGISTRY}
+    for state in states:
+        for name, values in state.get('metrics', {}).items():
+            if name in kinds:
+                kinds[name].merge(merged['metrics'].setdefault(name, {}), values)
+        for session_id, seen in state.get('sessions', {}).items():
+            merged['sessions'][session_id] = max(seen, merged['sessions'].get(session_id, 0))
+    return merged
+
+
+def clear_worker_metrics() -> None:
+    """Remove the metrics files of earlier server runs."""
+    directory = _directory()
+    if directory is None or not directory.is_dir():
+        return
+    for path in directory.glob('*.json'):
+        path.unlink(missing_ok=True)
+
+
+def render() -> str:
+    """All metrics of all workers in the Prometheus text format."""
+    merged = _merged()
+    lines = []
+    for metric in REGISTRY:
+        collect = getattr(metric, 'collect', None)
+        values = collect(merged) if collect else merged['metrics'].get(metric.name, {})
+        lines.extend(metric.render(values))
+    return '\n'.join(lines) + '\n'
+
+
+def register_metrics(app) -> None:
+    """Serve /metrics from a Dash app's Flask server and track sessions."""
+    from flask import Response, request
+
+    instrumentation.add_listener(_on_span)
+    atexit.register(flush)
+    server = app.server
+
+    @server.after_request
+    def track_request(response):
+        if request.path.endswith('_dash-update-component'):
+            body = request.get_json(silent=True) or {}
+            if not response.direct_passthrough:
+                CALLBACK_RESPONSE_BYTES.observe(
+                    response.calculate_content_length() or 0,
+                    output=body.get('output', '')
+                )
+
+        session_id = request.cookies.get(SESSION_COOKIE)
+        if request.path != '/metrics':
+            if not session_id:
+                session_id = uuid.uuid4().hex
+                response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+            with _sessions_lock:
+                _sessions[session_id] = time.time()
+        if time.time() - _last_flush >= PERF_SETTINGS['metrics_flush_s']:
+            flush()
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,189 @@
+"""Normalization of many price series at once.
+
+Series are aligned into one (dates x tickers) matrix with NaN where a
+ticker has no bar. The base bar of every ticker is found with
+searchsorted, and all tickers are rebased in a single broadcast.
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+import numpy as np
+import pandas as pd
+
+# Rebased value at each bar:
+#   index    price / base * 100, so the base bar is 100
+#   percent  change from the base bar in percent
+#   log      log return from the base bar, times 100
+MODES = ('index', 'percent', 'log')
+
+
+class PriceMatrix(NamedTuple):
+    """Series of several tickers aligned on the union of their dates."""
+
+    dates: np.ndarray
+    tickers: List[str]
+    values: np.ndarray
+    # Row of every bar of every ticker, in that ticker's own order
+    rows: Dict[str, np.ndarray]
+
+
+def _union(indexes: List[np.ndarray]) -> np.ndarray:
+    """Union of sorted date arrays."""
+    first = indexes[0]
+    if all(len(index) == len(first) and np.array_equal(index, first) for index in indexes[1:]):
+        return first
+    # A stable sort merges the already sorted runs in near-linear time
+    merged = np.sort(np.concatenate(indexes).view(np.int64), kind='stable')
+    keep = np.empty(len(merged), dtype=bool)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep].view('datetime64[ns]')
+
+
+def align(ticker_data: Dict[str, pd.DataFrame], column: str = 'close') -> PriceMatrix:
+    """Align one column of several tickers into a matrix.
+
+    Args:
+        ticker_data: Dictionary mapping tickers to DataFrames with a sorted
+            DatetimeIndex
+        column: Column to align
+
+    Returns:
+        Matrix of the column with one row per date of any ticker
+    """
+    tickers = [ticker for ticker, df in ticker_data.items() if not df.empty]
+    stamps = {ticker: ticker_data[ticker].index.values.astype('datetime64[ns]') for ticker in tickers}
+    if not tickers:
+        return PriceMatrix(np.array([], dtype='datetime64[ns]'), [], np.empty((0, 0)), {})
+
+    dates = _union(list(stamps.values()))
+    # Column-major, so each ticker's column is contiguous
+    values = np.full((len(dates), len(tickers)), np.nan, order='F')
+    every_row = np.arange(len(dates))
+    rows = {}
+    for col, ticker in enumerate(tickers):
+        if len(stamps[ticker]) == len(dates):
+            rows[ticker] = every_row
+            values[:, col] = ticker_data[ticker][column].to_numpy(dtype=np.float64)
+        else:
+            rows[ticker] = np.searchsorted(dates, stamps[ticker])
+            values[rows[ticker], col] = ticker_data[ticker][column].to_numpy(dtype=np.float64)
+    return PriceMatrix(dates, tickers, values, rows)
+
+
+def base_rows(matrix: PriceMatrix, base_date=None) -> np.ndarray:
+    """Find the base bar of every ticker.
+
+    Args:
+        matrix: Aligned prices
+        base_date: Date to rebase to; each ticker uses its bar nearest to
+            it, the later one on a tie. None rebases every ticker to its
+            first bar.
+
+    Returns:
+        Row of the base bar of each ticker
+    """
+    valid = ~np.isnan(matrix.values)
+    if base_date is None or not len(matrix.dates):
+        return valid.argmax(axis=0)
+
+    target = np.datetime64(pd.Timestamp(base_date).tz_localize(None), 'ns')
+    row = int(np.clip(np.searchsorted(matrix.dates, target), 0, len(matrix.dates) - 1))
+
+    # Nearest bar of each ticker at or after row, and at or before it
+    after = valid[row:]
+    next_rows = np.where(after.any(axis=0), row + after.argmax(axis=0), -1)
+    before = valid[row::-1]
+    prev_rows = np.where(before.any(axis=0), row - before.argmax(axis=0), -1)
+
+    gap_next = np.abs(matrix.dates[next_rows] - target)
+    gap_prev = np.abs(matrix.dates[prev_rows] - target)
+    use_next = (next_rows >= 0) & ((prev_rows < 0) | (gap_next <= gap_prev))
+    return np.where(use_next, next_rows, prev_rows)
+
+
+def rebase(matrix: PriceMatrix, rows: np.ndarray, mode: str = 'index') -> np.ndarray:
+    """Rebase every ticker to its base bar, in place.
+
+    Tickers whose base price is zero or missing are left as they are in
+    'index' mode and are NaN in the other modes.
+
+    Returns:
+        The matrix values, rebased
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown normalization mode: {mode}")
+    values = matrix.values
+    if not matrix.tickers:
+        return values
+
+    base = values[rows, np.arange(len(matrix.tickers))]
+    usable = np.isfinite(base) & (base != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode == 'index':
+            values /= np.where(usable, base, 1.0)
+            values *= np.where(usable, 100.0, 1.0)
+            return values
+        values /= np.where(usable, base, np.nan)
+        if mode == 'percent':
+            values -= 1.0
+        else:
+            np.log(values, out=values)
+        values *= 100.0
+    return values
+
+
+def rebase_values(values: np.ndarray, base: float, mode: str = 'index') -> np.ndarray:
+    """Rebase other values of a ticker, such as a moving average, to its base price."""
+    usable = np.isfinite(base) and base != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode == 'index':
+            return values / base * 100.0 if usable else values
+        ratio = values / base if usable else np.full(len(values), np.nan)
+        return (ratio - 1.0) * 100.0 if mode == 'percent' else np.log(ratio) * 100.0
+
+
+def normalize_with_bases(
+    ticker_data: Dict[str, pd.DataFrame],
+    base_date=None,
+    mode: str = 'index',
+    column: str = 'close'
+) -> Tuple[Dict[str, np.ndarray], Dict[str, float]]:
+    """Rebase one column of several tickers and report their base prices.
+
+    Returns:
+        Rebased values as returned by normalize, and the base price of
+        every ticker
+    """
+    matrix = align(ticker_data, column)
+    rows = base_rows(matrix, base_date)
+    bases = {
+        ticker: float(matrix.values[rows[col], col])
+        for col, ticker in enumerate(matrix.tickers)
+    }
+    rebased = rebase(matrix, rows, mode)
+    return {
+        ticker: rebased[matrix.rows[ticker], col]
+        for col, ticker in enumerate(matrix.tickers)
+    }, bases
+
+
+def normalize(
+    ticker_data: Dict[str, pd.DataFrame],
+    base_date=None,
+    mode: str = 'index',
+    column: str = 'close'
+) -> Dict[str, np.ndarray]:
+    """Rebase one column of several tickers.
+
+    Args:
+        ticker_data: Dictionary mapping tickers to DataFrames
+        base_date: Date to rebase to, or None for each ticker's first bar
+        mode: One of MODES
+        column: Column to rebase
+
+    Returns:
+        Dictionary mapping tickers to rebased values, one per bar of the
+        ticker's own DataFrame
+    """
+    return normalize_with_bases(ticker_data, base_date, mode, column)[0]
+
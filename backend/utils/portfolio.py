@@ -0,0 +1,294 @@
+"""Portfolio backtests of many weight vectors at once.
+
+Prices of the assets are aligned on the union of their dates, carried
+forward over dates an asset does not trade, and trimmed to the first date
+every asset has a price. Between two rebalances each asset's holding grows
+with its price relative to the last rebalance, so the value of every
+portfolio in a batch is a single (dates x assets) @ (assets x portfolios)
+product; the segments between rebalances are chained with a cumulative
+product.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_SETTINGS
+from .metrics import record_cache
+from .normalization import align
+
+# Rebalancing schedules and the period each rebalance starts; 'none' buys
+# and holds, 'bar' rebalances on every bar
+SCHEDULES = {
+    'none': None,
+    'bar': None,
+    'weekly': 'W',
+    'monthly': 'M',
+    'quarterly': 'Q',
+    'yearly': 'Y'
+}
+
+# Statistics of every portfolio, in display order
+STATS = {
+    'total_return': 'Total Return %',
+    'cagr': 'CAGR %',
+    'volatility': 'Volatility %',
+    'sharpe': 'Sharpe',
+    'max_drawdown': 'Max Drawdown %',
+    'turnover': 'Turnover %/yr'
+}
+
+
+class Backtest(NamedTuple):
+    """Results of a batch of portfolios over the same assets."""
+
+    dates: np.ndarray
+    tickers: List[str]
+    # (portfolios x assets), each row summing to 1
+    weights: np.ndarray
+    # (dates x portfolios), starting at 1
+    equity: np.ndarray
+    drawdown: np.ndarray
+    # Statistic name -> one value per portfolio
+    stats: Dict[str, np.ndarray]
+
+
+def price_matrix(ticker_data: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Close prices carried forward, from the first date all assets trade.
+
+    Returns:
+        Dates, tickers and the (dates x assets) price matrix
+    """
+    matrix = align(ticker_data)
+    values = matrix.values
+    if not matrix.tickers:
+        return matrix.dates, [], values
+    valid = np.isfinite(values) & (values > 0)
+    # Row of the last valid price at or before each row
+    last = np.maximum.accumulate(np.where(valid, np.arange(len(values))[:, None], -1), axis=0)
+    ready = (last >= 0).all(axis=1)
+    first = int(ready.argmax()) if ready.any() else len(values)
+    filled = values[np.maximum(last, 0), np.arange(values.shape[1])]
+    return matrix.dates[first:], matrix.tickers, filled[first:]
+
+
+def rebalance_rows(dates: np.ndarray, schedule: str) -> np.ndarray:
+    """Rows at whose close the portfolio goes back to its weights.
+
+    Args:
+        dates: Dates of the price matrix
+        schedule: One of SCHEDULES
+
+    Returns:
+        Rebalance rows, excluding the first row where the weights are set
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unknown rebalancing schedule: {schedule}")
+    if schedule == 'none' or len(dates) < 2:
+        return np.empty(0, dtype=np.int64)
+    if schedule == 'bar':
+        return np.arange(1, len(dates))
+    periods = pd.DatetimeIndex(dates).to_period(SCHEDULES[schedule]).asi8
+    # First bar of every new period
+    return np.flatnonzero(periods[1:] != periods[:-1]) + 1
+
+
+def normalize_weights(weights: np.ndarray) -> np.ndarray:
+    """Scale each weight vector to sum to 1; vectors summing to 0 become NaN."""
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    totals = weights.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(totals != 0, weights / totals, np.nan)
+
+
+def simulate(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    rebalances: np.ndarray,
+    cost: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Value of several portfolios over time.
+
+    Args:
+        prices: (dates x assets) prices without gaps
+        weights: (portfolios x assets) weights, each row summing to 1
+        rebalances: Rows at whose close the weights are restored
+        cost: Cost per unit of value traded at a rebalance
+
+    Returns:
+        Equity of every portfolio, (dates x portfolios) starting at 1, and
+        its one-way turnover at every rebalance, (rebalances x portfolios)
+    """
+    rows = np.arange(len(prices))
+    anchors = np.concatenate([[0], rebalances])
+    # Last rebalance strictly before each row; the first row anchors itself
+    anchor = anchors[np.maximum(np.searchsorted(anchors, rows, 'left') - 1, 0)]
+    relative = prices / prices[anchor]
+    value = relative @ weights.T
+
+    # Drift of the weights up to each rebalance; chunked over portfolios so
+    # large sweeps with frequent rebalancing stay within memory
+    turnover = np.empty((len(rebalances), len(weights)))
+    at_rebalance = relative[rebalances]
+    chunk = max(1, 2_000_000 // max(1, at_rebalance.size))
+    for start in range(0, len(weights), chunk):
+        w = np.abs(weights[start:start + chunk])
+        v = value[rebalances, start:start + chunk]
+        drift = np.abs(v[:, :, None] - at_rebalance[:, None, :])
+        turnover[:, start:start + chunk] = 0.5 * (drift * w[None]).sum(axis=2) / np.abs(v)
+
+    # Growth of each segment, net of the cost of its closing rebalance
+    growth = value[rebalances] * (1.0 - cost * 2.0 * turnover)
+    start_equity = np.vstack([np.ones((1, len(weights))), np.cumprod(growth, axis=0)])
+    equity = start_equity[np.searchsorted(anchors, anchor)] * value
+    return equity, turnover
+
+
+def _statistics(
+    dates: np.ndarray,
+    equity: np.ndarray,
+    drawdown: np.ndarray,
+    turnover: np.ndarray,
+    risk_free: float
+) -> Dict[str, np.ndarray]:
+    """Summary statistics of every portfolio."""
+    years = max((dates[-1] - dates[0]) / np.timedelta64(1, 'D') / 365.25, 1e-9)
+    # Bars per year as they occur, e.g. 365 with crypto in the mix
+    periods = (len(dates) - 1) / years
+    returns = equity[1:] / equity[:-1] - 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        excess = returns.mean(axis=0) - risk_free / periods
+        deviation = returns.std(axis=0, ddof=1) if len(returns) > 1 else np.full(equity.shape[1], np.nan)
+        return {
+            'total_return': (equity[-1] - 1.0) * 100.0,
+            'cagr': (equity[-1] ** (1.0 / years) - 1.0) * 100.0,
+            'volatility': deviation * np.sqrt(periods) * 100.0,
+            'sharpe': excess / deviation * np.sqrt(periods),
+            'max_drawdown': drawdown.min(axis=0) * 100.0,
+            'turnover': turnover.sum(axis=0) / years * 100.0
+        }
+
+
+def backtest(
+    ticker_data: Dict[str, pd.DataFrame],
+    weights: np.ndarray,
+    schedule: str = 'monthly',
+    cost_bps: float = 0.0,
+    risk_free: float = 0.0
+) -> Backtest:
+    """Backtest a batch of weight vectors over the same assets.
+
+    Args:
+        ticker_data: Dictionary mapping tickers to OHLCV DataFrames; the
+            weights follow its order
+        weights: (portfolios x assets) weights, or one vector; each is
+            scaled to sum to 1
+        schedule: Rebalancing schedule, one of SCHEDULES
+        cost_bps: Trading cost in basis points of the value traded
+        risk_free: Annual risk-free rate for the Sharpe ratio, e.g. 0.03
+
+    Returns:
+        Equity, drawdown and statistics of every portfolio
+    """
+    dates, tickers, prices = price_matrix(ticker_data)
+    weights = normalize_weights(weights)
+    # Assets without data drop out; the rest keep their relative weights
+    order = [list(ticker_data).index(ticker) for ticker in tickers]
+    weights = normalize_weights(weights[:, order]) if tickers else weights[:, :0]
+    if len(dates) < 2 or not tickers:
+        empty = np.empty((len(dates), len(weights)))
+        return Backtest(dates, tickers, weights, empty, empty, {name: np.full(len(weights), np.nan) for name in STATS})
+
+    equity, turnover = simulate(prices, np.nan_to_num(weights), rebalance_rows(dates, schedule), cost_bps / 10_000)
+    equity[:, np.isnan(weights).any(axis=1)] = np.nan
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+    stats = _statistics(dates, equity, drawdown, turnover, risk_free)
+    return Backtest(dates, tickers, weights, equity, drawdown, stats)
+
+
+def inverse_volatility_weights(ticker_data: Dict[str, pd.DataFrame]) -> np.ndarray:
+    """Weights proportional to 1 / volatility of each asset's returns."""
+    _, tickers, prices = price_matrix(ticker_data)
+    weights = np.zeros(len(ticker_data))
+    if len(prices) < 3:
+        return weights
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / np.diff(np.log(prices), axis=0).std(axis=0, ddof=1)
+    inverse[~np.isfinite(inverse)] = 0.0
+    weights[[list(ticker_data).index(ticker) for ticker in tickers]] = inverse
+    return weights
+
+
+def random_weights(count: int, assets: int, seed: int = 0) -> np.ndarray:
+    """Long-only weight vectors spread evenly over all allocations."""
+    return np.random.default_rng(seed).dirichlet(np.ones(assets), size=count)
+
+
+class BacktestCache:
+    """Backtest results per inputs, least recently used first out."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Number of results kept
+        """
+        self.max_entries = max_entries or DATA_SETTINGS['backtest_cache_size']
+        self._entries: 'OrderedDict[Tuple, Backtest]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ticker_data: Dict[str, pd.DataFrame], weights: np.ndarray, *params) -> Tuple:
+        """Key of the inputs, including the last bar of every ticker."""
+        data = tuple(
+            (ticker, len(df), df.index[-1].value, float(df['close'].iat[-1])) if not df.empty else (ticker,)
+            for ticker, df in ticker_data.items()
+        )
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        return (data, weights.shape, weights.tobytes(), *params)
+
+    def backtest(
+        self,
+        ticker_data: Dict[str, pd.DataFrame],
+        weights: np.ndarray,
+        schedule: str = 'monthly',
+        cost_bps: float = 0.0,
+        risk_free: float = 0.0
+    ) -> Backtest:
+        """Backtest a batch of weight vectors, reusing a cached result.
+
+        Takes the same arguments as backtest().
+        """
+        key = self._key(ticker_data, weights, schedule, cost_bps, risk_free)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        record_cache('backtest', hits=int(result is not None), misses=int(result is None))
+        if result is not None:
+            return result
+
+        result = backtest(ticker_data, weights, schedule, cost_bps, risk_free)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache: Optional[BacktestCache] = None
+
+
+def get_backtest_cache() -> BacktestCache:
+    """Get the backtest cache shared by all callbacks."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = BacktestCache()
+    return _shared_cache
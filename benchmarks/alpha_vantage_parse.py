@@ -0,0 +1,105 @@
+"""Benchmark Alpha Vantage response decoding and parsing.
+
+Usage:
+    python -m benchmarks.alpha_vantage_parse [--payload recorded.json]
+
+Without --payload a 20-year TIME_SERIES_DAILY response is generated in
+the format Alpha Vantage returns.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict
+import numpy as np
+import pandas as pd
+
+from backend.data.providers.alpha_vantage import loads, parse_time_series
+
+
+def generate_payload(years: int = 20, seed: int = 0) -> bytes:
+    """Generate a full-history daily response body."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=years * 252)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    series = {}
+    # Newest first, like the real API
+    for day, price in zip(dates[::-1], close[::-1]):
+        series[day.strftime('%Y-%m-%d')] = {
+            '1. open': f"{price * 0.99:.4f}",
+            '2. high': f"{price * 1.01:.4f}",
+            '3. low': f"{price * 0.98:.4f}",
+            '4. close': f"{price:.4f}",
+            '5. volume': str(int(rng.integers(1e5, 1e7)))
+        }
+    return json.dumps({
+        'Meta Data': {'2. Symbol': 'BENCH'},
+        'Time Series (Daily)': series
+    }).encode()
+
+
+def parse_legacy(payload: bytes) -> pd.DataFrame:
+    """Parse the way the providers did before the vectorized parser."""
+    data = json.loads(payload)
+    time_series_key = [k for k in data.keys() if 'Time Series' in k][0]
+    df = pd.DataFrame.from_dict(data[time_series_key], orient='index')
+    df.columns = [col.split('. ')[1].lower() for col in df.columns]
+    df.index = pd.to_datetime(df.index)
+    df.index.name = 'date'
+    for col in df.columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.sort_index()
+
+
+def parse_fast(payload: bytes) -> pd.DataFrame:
+    """Parse with the fast decoder and the one-pass parser."""
+    return parse_time_series(loads(payload))
+
+
+def best_of(func: Callable, payload: bytes, repeat: int) -> float:
+    """Best wall time of several runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payload)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(payload: bytes, repeat: int = 10) -> Dict[str, float]:
+    """Time both parsers on a payload and check they agree."""
+    legacy = parse_legacy(payload)
+    fast = parse_fast(payload)
+    pd.testing.assert_frame_equal(
+        legacy[fast.columns],
+        fast,
+        check_freq=False,
+        check_index_type=False,
+        check_dtype=False
+    )
+    return {
+        'bars': len(fast),
+        'payload_kb': len(payload) / 1024,
+        'decode_json_ms': best_of(json.loads, payload, repeat),
+        'decode_fast_ms': best_of(loads, payload, repeat),
+        'legacy_ms': best_of(parse_legacy, payload, repeat),
+        'fast_ms': best_of(parse_fast, payload, repeat)
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payload', type=Path, help="Recorded response body")
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    payload = args.payload.read_bytes() if args.payload else generate_payload(args.years)
+    for name, value in run(payload, args.repeat).items():
+        print(f"{name:>16}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
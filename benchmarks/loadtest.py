@@ -0,0 +1,445 @@
+"""Multi-client load test of the Dash callbacks.
+
+Usage:
+    python -m benchmarks.loadtest [--users 8] [--iterations 3] [--latency-ms 50]
+    python -m benchmarks.loadtest --url http://127.0.0.1:8050 --pid 1234
+
+Each virtual user is a headless client of the real `_dash-update-component`
+endpoint: it loads the layout and the callback graph, fires the initial
+callbacks and then runs a script (select a category, change the interval,
+toggle log scale and normalization, click the chart to rebase), following
+callback chains the way the browser does. Without --url a server is
+started with the offline replay provider and a throwaway database.
+
+The report has p50/p95/p99 latency and errors per callback, throughput,
+and the server's CPU and memory (read from /proc, Linux only).
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import requests
+
+from config.settings import BASE_DIR, TICKER_LISTS
+
+SCRIPT = ['select_category', 'change_interval', 'toggle_log', 'toggle_normalize', 'click_rebase']
+INTERVALS = ['1d', '1wk', '1mo']
+
+SERVER_CODE = (
+    "import sys; from app import app; "
+    "app.run(host='127.0.0.1', port=int(sys.argv[1]), debug=False, threaded=True)"
+)
+
+
+def _parse_outputs(output: str) -> List[Tuple[str, str]]:
+    """Split a callback output spec into (id, property) pairs."""
+    if output.startswith('..'):
+        specs = output[2:-2].split('...')
+    else:
+        specs = [output]
+    return [tuple(spec.rsplit('.', 1)) for spec in specs]
+
+
+def _collect_props(node, props: Dict[str, object]) -> None:
+    """Collect the initial props of every component with an id."""
+    if isinstance(node, list):
+        for child in node:
+            _collect_props(child, props)
+        return
+    if not isinstance(node, dict) or 'props' not in node:
+        return
+    component_props = node['props']
+    component_id = component_props.get('id')
+    for name, value in component_props.items():
+        if component_id is not None and isinstance(component_id, str):
+            props[f"{component_id}.{name}"] = value
+        if isinstance(value, (dict, list)):
+            _collect_props(value, props)
+
+
+class Stats:
+    """Thread-safe latency and error records per callback."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ms: float, ok: bool) -> None:
+        """Record one call."""
+        with self._lock:
+            self.latencies[name].append(elapsed_ms)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        """Percentiles per callback, in milliseconds."""
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[name] = {
+                'calls': len(values),
+                'errors': self.errors.get(name, 0),
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': max(values)
+            }
+        return result
+
+
+class DashSession:
+    """One browser-like client of a Dash app."""
+
+    def __init__(self, url: str, stats: Stats, seed: int = 0, max_depth: int = 6):
+        self.url = url.rstrip('/')
+        self.stats = stats
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+        self.http = requests.Session()
+        self.props: Dict[str, object] = {}
+        self.callbacks: List[Dict] = []
+        self.by_input: Dict[str, List[int]] = defaultdict(list)
+
+    def start(self) -> None:
+        """Load the layout and callback graph and fire initial callbacks."""
+        _collect_props(self.http.get(f"{self.url}/_dash-layout").json(), self.props)
+        known_ids = {key.rsplit('.', 1)[0] for key in self.props}
+
+        for spec in self.http.get(f"{self.url}/_dash-dependencies").json():
+            outputs = _parse_outputs(spec['output'])
+            # The renderer skips callbacks whose outputs are not on the page
+            if spec.get('clientside_function') or not all(o[0] in known_ids for o in outputs):
+                continue
+            spec['parsed_outputs'] = outputs
+            index = len(self.callbacks)
+            self.callbacks.append(spec)
+            for item in spec['inputs']:
+                self.by_input[f"{item['id']}.{item['property']}"].append(index)
+
+        initial = [
+            (index, set())
+            for index, spec in enumerate(self.callbacks)
+            if not spec.get('prevent_initial_call')
+        ]
+        self._run_waves(initial)
+
+    def _name(self, spec: Dict) -> str:
+        """Readable name of a callback: its first output."""
+        component_id, prop = spec['parsed_outputs'][0]
+        return f"{component_id}.{prop}"
+
+    def _call(self, index: int, changed: Set[str]) -> List[str]:
+        """Fire one callback and apply its response; return changed props."""
+        spec = self.callbacks[index]
+        outputs = spec['parsed_outputs']
+
+        def values(items):
+            return [
+                {
+                    'id': item['id'],
+                    'property': item['property'],
+                    'value': self.props.get(f"{item['id']}.{item['property']}")
+                }
+                for item in items
+            ]
+
+        output_items = [{'id': i, 'property': p} for i, p in outputs]
+        body = {
+            'output': spec['output'],
+            'outputs': output_items if spec['output'].startswith('..') else output_items[0],
+            'inputs': values(spec['inputs']),
+            'state': values(spec['state']),
+            'changedPropIds': sorted(changed)
+        }
+
+        started = time.perf_counter()
+        try:
+            response = self.http.post(f"{self.url}/_dash-update-component", json=body)
+            ok = response.status_code in (200, 204)
+        except requests.RequestException:
+            response, ok = None, False
+        self.stats.record(self._name(spec), (time.perf_counter() - started) * 1000, ok)
+
+        if not ok or response.status_code == 204:
+            return []
+        updated = []
+        for component_id, props in response.json().get('response', {}).items():
+            for prop, value in props.items():
+                key = f"{component_id}.{prop}"
+                if self.props.get(key) != value:
+                    self.props[key] = value
+                    updated.append(key)
+        return updated
+
+    def _run_waves(self, triggered: List[Tuple[int, Set[str]]]) -> None:
+        """Fire callbacks and then everything their outputs trigger."""
+        for _ in range(self.max_depth):
+            if not triggered:
+                return
+            changed = []
+            for index, props in triggered:
+                changed.extend(self._call(index, props))
+            triggered = self._triggered_by(changed)
+
+    def _triggered_by(self, changed: List[str]) -> List[Tuple[int, Set[str]]]:
+        """Callbacks with any of the changed props as input."""
+        triggered: Dict[int, Set[str]] = {}
+        for prop in changed:
+            for index in self.by_input.get(prop, []):
+                triggered.setdefault(index, set()).add(prop)
+        return list(triggered.items())
+
+    def set_prop(self, key: str, value) -> None:
+        """Change a prop the way a user interaction would."""
+        self.props[key] = value
+        self._run_waves(self._triggered_by([key]))
+
+    def act(self, action: str) -> None:
+        """Run one scripted user action."""
+        if action == 'select_category':
+            self.set_prop('category-dropdown.value', self.random.choice(list(TICKER_LISTS)))
+        elif action == 'change_interval':
+            self.set_prop('interval-dropdown.value', self.random.choice(INTERVALS))
+        elif action == 'toggle_log':
+            self.set_prop('log-scale-switch.value', not self.props.get('log-scale-switch.value'))
+        elif action == 'toggle_normalize':
+            self.set_prop('normalize-switch.value', not self.props.get('normalize-switch.value'))
+        elif action == 'click_rebase':
+            figure = self.props.get('chart.figure') or {}
+            traces = [trace for trace in figure.get('data', []) if trace.get('x')]
+            if traces:
+                x = self.random.choice(traces[0]['x'])
+                self.set_prop('chart.clickData', {'points': [{'x': x, 'curveNumber': 0}]})
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+
+class ProcessSampler:
+    """Samples CPU and memory of a process and its children from /proc."""
+
+    def __init__(self, pid: int, period: float = 0.5):
+        self.pid = pid
+        self.period = period
+        self.cpu: List[float] = []
+        self.rss_mb: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    @staticmethod
+    def _stat(pid: int) -> Optional[List[str]]:
+        """Fields of /proc/<pid>/stat after the command name."""
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            return None
+
+    def _tree(self) -> List[int]:
+        """The process and all its descendants."""
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                fields = self._stat(int(entry))
+                if fields:
+                    parents[int(entry)] = int(fields[1])
+        tree = [self.pid]
+        for pid in tree:
+            tree.extend(child for child, parent in parents.items() if parent == pid)
+        return tree
+
+    def _sample(self) -> Tuple[float, float]:
+        """Total CPU seconds and RSS in MB of the process tree."""
+        cpu = rss = 0.0
+        for pid in self._tree():
+            fields = self._stat(pid)
+            if not fields:
+                continue
+            cpu += (int(fields[11]) + int(fields[12])) / self._ticks
+            # rss is field 24 of stat, in pages
+            rss += int(fields[21]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+        return cpu, rss
+
+    def _run(self) -> None:
+        """Sampling loop."""
+        last_cpu, _ = self._sample()
+        last_time = time.monotonic()
+        while not self._stop.wait(self.period):
+            cpu, rss = self._sample()
+            now = time.monotonic()
+            self.cpu.append(100 * (cpu - last_cpu) / (now - last_time))
+            self.rss_mb.append(rss)
+            last_cpu, last_time = cpu, now
+
+    def start(self) -> None:
+        """Start sampling in the background."""
+        if os.path.isdir('/proc'):
+            self._thread.start()
+
+    def stop(self) -> Dict[str, Optional[float]]:
+        """Stop sampling and summarize."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if not self.cpu:
+            return {'cpu_avg_pct': None, 'cpu_max_pct': None, 'rss_max_mb': None}
+        return {
+            'cpu_avg_pct': float(np.mean(self.cpu)),
+            'cpu_max_pct': float(np.max(self.cpu)),
+            'rss_max_mb': float(np.max(self.rss_mb))
+        }
+
+
+def _free_port() -> int:
+    """Find a free local port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir: Path, env_overrides: Dict[str, str], timeout: float = 60) -> Tuple[subprocess.Popen, str]:
+    """Start the app offline in a subprocess and wait until it serves."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        'PYTHONPATH': str(BASE_DIR),
+        'DATA_PROVIDER': 'replay',
+        'DB_PATH': str(workdir / 'loadtest.db'),
+        **env_overrides
+    }
+    # app_state.json is written to the working directory
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_CODE, str(port)],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            requests.get(f"{url}/_dash-layout", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not start in time")
+
+
+def run_load(
+    url: str,
+    users: int,
+    iterations: int,
+    think_ms: float = 0.0,
+    script: Optional[List[str]] = None,
+    seed: int = 0
+) -> Tuple[Stats, float]:
+    """Run every virtual user's script concurrently.
+
+    Returns:
+        Recorded stats and wall time in seconds
+    """
+    stats = Stats()
+    script = script or SCRIPT
+
+    def user(number: int) -> None:
+        session = DashSession(url, stats, seed=seed + number)
+        try:
+            session.start()
+            for _ in range(iterations):
+                for action in script:
+                    session.act(action)
+                    if think_ms:
+                        time.sleep(session.random.uniform(0, 2 * think_ms) / 1000)
+        except Exception as e:
+            stats.record('session', 0.0, False)
+            print(f"Error in session {number}: {str(e)}")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(number,)) for number in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - started
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Dash callback load test")
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--think-ms', type=float, default=0.0)
+    parser.add_argument('--script', nargs='+', choices=SCRIPT, help="Actions per iteration")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help="Test a running server instead of starting one")
+    parser.add_argument('--pid', type=int, help="Server process to sample with --url")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Replay provider latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Replay provider error rate")
+    parser.add_argument('--json', type=Path, help="Also write the report to a file")
+    args = parser.parse_args()
+
+    process = None
+    workdir = tempfile.TemporaryDirectory()
+    try:
+        if args.url:
+            url, pid = args.url, args.pid
+        else:
+            process, url = start_server(Path(workdir.name), {
+                'REPLAY_LATENCY_MS': str(args.latency_ms),
+                'REPLAY_ERROR_RATE': str(args.error_rate)
+            })
+            pid = process.pid
+
+        sampler = ProcessSampler(pid) if pid else None
+        if sampler:
+            sampler.start()
+        stats, elapsed = run_load(url, args.users, args.iterations, args.think_ms, args.script, args.seed)
+        server = sampler.stop() if sampler else {}
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        workdir.cleanup()
+
+    callbacks = stats.summary()
+    calls = sum(item['calls'] for item in callbacks.values())
+    report = {
+        'users': args.users,
+        'iterations': args.iterations,
+        'elapsed_s': elapsed,
+        'requests_per_s': calls / elapsed if elapsed else 0.0,
+        'callbacks': callbacks,
+        'server': server
+    }
+
+    print(f"{args.users} users x {args.iterations} iterations: {calls} calls in {elapsed:.1f}s "
+          f"({report['requests_per_s']:.1f}/s)")
+    print(f"{'callback':<32}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, item in callbacks.items():
+        print(f"{name:<32}{item['calls']:>7}{item['errors']:>8}"
+              f"{item['p50_ms']:>10.1f}{item['p95_ms']:>10.1f}{item['p99_ms']:>10.1f}")
+    if server.get('cpu_avg_pct') is not None:
+        print(f"server CPU avg {server['cpu_avg_pct']:.0f}% max {server['cpu_max_pct']:.0f}%, "
+              f"RSS max {server['rss_max_mb']:.0f} MB")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
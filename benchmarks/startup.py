@@ -0,0 +1,107 @@
+"""Cold start time of the app, from process launch to a serving socket.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--target 1.0] [--json startup.json]
+
+Each run launches the app in a fresh interpreter, with the offline replay
+provider and a throwaway database, and records when the port first
+accepts a connection and when the first layout request is answered. The
+command exits with status 1 when the median time to the socket is above
+the target.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+import requests
+
+from config.settings import BASE_DIR
+from .loadtest import SERVER_CODE, _free_port
+
+TARGET_SECONDS = 1.0
+
+
+def measure_startup(workdir: Path, timeout: float = 30) -> Dict[str, float]:
+    """Start the app once and time it until it serves.
+
+    Returns:
+        Seconds from launch to an accepting socket and to the first
+        answered layout request
+    """
+    port = _free_port()
+    env = {
+        **os.environ,
+        'PYTHONPATH': str(BASE_DIR),
+        'DATA_PROVIDER': 'replay',
+        'DB_PATH': str(workdir / 'startup.db'),
+        'SHARED_CACHE_DIR': str(workdir / 'cache')
+    }
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_CODE, str(port)],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+            if time.perf_counter() > deadline:
+                raise RuntimeError("Server did not start in time")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.005)
+        socket_s = time.perf_counter() - started
+
+        requests.get(f"http://127.0.0.1:{port}/_dash-layout", timeout=timeout).raise_for_status()
+        layout_s = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+    return {'socket_s': socket_s, 'layout_s': layout_s}
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="App cold start benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target', type=float, default=TARGET_SECONDS, help="Seconds to a serving socket")
+    parser.add_argument('--json', type=Path, help="Also write the results to a file")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for number in range(args.runs):
+            result = measure_startup(Path(tmp))
+            runs.append(result)
+            print(f"run {number + 1}: socket {result['socket_s']:.3f}s  layout {result['layout_s']:.3f}s", flush=True)
+
+    report = {
+        'target_s': args.target,
+        'socket_median_s': statistics.median(run['socket_s'] for run in runs),
+        'layout_median_s': statistics.median(run['layout_s'] for run in runs),
+        'runs': runs
+    }
+    print(f"median: socket {report['socket_median_s']:.3f}s  layout {report['layout_median_s']:.3f}s "
+          f"(target {args.target:.2f}s)")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if report['socket_median_s'] > args.target:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
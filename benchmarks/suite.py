@@ -0,0 +1,346 @@
+"""Benchmark suite for the fetch/store/load/render hot paths.
+
+Usage:
+    python -m benchmarks.suite run [--sizes small medium] [--only load_ticker_data] [--save NAME]
+    python -m benchmarks.suite compare [BASELINE] [CURRENT] [--threshold 0.1]
+
+`run` times every benchmark on synthetic data of each size and writes the
+results to benchmarks/baselines/NAME.json (default 'latest'). `compare`
+reports the change in median time between two result files, 'baseline'
+and 'latest' by default, and exits with status 1 when any benchmark got
+slower by more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+
+from backend.data.synthetic import SyntheticMarket
+
+BASELINE_DIR = Path(__file__).parent / 'baselines'
+
+# tickers x years of daily bars in the store; universe is the number of
+# dropdown options searched
+SIZES = {
+    'small': {'tickers': 5, 'years': 2, 'universe': 1_000},
+    'medium': {'tickers': 25, 'years': 10, 'universe': 10_000},
+    'large': {'tickers': 100, 'years': 30, 'universe': 50_000}
+}
+DEFAULT_SIZES = ['small', 'medium']
+
+BENCHMARKS: Dict[str, Callable[['Workload'], Callable[[], object]]] = {}
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup when its benchmark cannot run here."""
+
+
+def benchmark(name: str) -> Callable:
+    """Register a setup function returning the callable to time."""
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Workload:
+    """Synthetic data of one size, shared by the benchmarks of that size."""
+
+    def __init__(self, size: str, workdir: Path, seed: int = 0):
+        self.size = size
+        self.params = SIZES[size]
+        self.workdir = workdir
+        self.market = SyntheticMarket(
+            self.params['tickers'],
+            years=self.params['years'],
+            seed=seed,
+            listing_rate=0.0,
+            gap_rate=0.0
+        )
+        self.tickers = self.market.tickers
+        self.start = self.market.start.to_pydatetime()
+        self.end = self.market.end.to_pydatetime()
+        self._frames: Optional[Dict[str, pd.DataFrame]] = None
+        self._db_path: Optional[Path] = None
+
+    @property
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Daily bars of every ticker."""
+        if self._frames is None:
+            self._frames = {
+                ticker: df
+                for chunk in self.market.frames('1d')
+                for ticker, df in chunk
+            }
+        return self._frames
+
+    @property
+    def db_path(self) -> Path:
+        """A store filled with the workload, created on first use."""
+        if self._db_path is None:
+            from backend.data.database.operations import DatabaseOperations
+
+            self._db_path = self.workdir / f"{self.size}.db"
+            self.market.write_to_database(DatabaseOperations(str(self._db_path)))
+        return self._db_path
+
+
+@benchmark('save_ticker_data')
+def bench_save(workload: Workload) -> Callable:
+    """Save every ticker's full history, one call per ticker."""
+    from backend.data.database.operations import DatabaseOperations
+
+    db = DatabaseOperations(str(workload.workdir / f"{workload.size}_save.db"))
+    frames = workload.frames
+
+    def run():
+        for ticker, df in frames.items():
+            db.save_ticker_data(ticker, df, '1d', 'synthetic')
+    return run
+
+
+@benchmark('load_ticker_data')
+def bench_load(workload: Workload) -> Callable:
+    """Load every ticker's full history, one call per ticker."""
+    from backend.data.database.operations import DatabaseOperations
+
+    db = DatabaseOperations(str(workload.db_path))
+
+    def run():
+        for ticker in workload.tickers:
+            db.load_ticker_data(ticker, '1d', workload.start, workload.end)
+    return run
+
+
+@benchmark('load_data_for_tickers')
+def bench_load_many(workload: Workload) -> Callable:
+    """Load all tickers through the data manager, from the database."""
+    from backend.data.manager import DataManager
+
+    manager = DataManager('replay', db_path=str(workload.db_path))
+    # Without the shared cache every run after the warm-up would be a
+    # /dev/shm hit rather than a load
+    manager.cache = None
+    return lambda: manager.load_data_for_tickers(
+        workload.tickers, workload.start, workload.end, '1d'
+    )
+
+
+@benchmark('figure_build')
+def bench_figure(workload: Workload) -> Callable:
+    """Build the chart figure for all tickers."""
+    from frontend.callbacks.chart import build_figure
+
+    frames = workload.frames
+    return lambda: build_figure(frames, normalize=False, log_scale=False)
+
+
+@benchmark('figure_json')
+def bench_figure_json(workload: Workload) -> Callable:
+    """Serialize the chart figure for all tickers."""
+    from plotly.io.json import to_json_plotly
+    from frontend.callbacks.chart import build_figure
+
+    # What Dash does with the returned figure before sending it
+    figure = build_figure(workload.frames, normalize=False, log_scale=False)
+    return lambda: to_json_plotly(figure)
+
+
+@benchmark('normalize_callback')
+def bench_normalize_callback(workload: Workload) -> Callable:
+    """Normalize every close series the way the chart callback does."""
+    from backend.utils.normalization import normalize_with_bases
+
+    frames = workload.frames
+    norm_date = workload.market.start + pd.Timedelta(days=30)
+    return lambda: normalize_with_bases(frames, norm_date, 'index')
+
+
+@benchmark('normalize_utils')
+def bench_normalize_utils(workload: Workload) -> Callable:
+    """Normalize all tickers with core.utils."""
+    try:
+        from core.utils import normalize_data
+    except ImportError as e:
+        raise SkipBenchmark(str(e))
+
+    frames = workload.frames
+    norm_date = workload.market.start + pd.Timedelta(days=30)
+    return lambda: normalize_data(frames, norm_date)
+
+
+@benchmark('ticker_search')
+def bench_search(workload: Workload) -> Callable:
+    """Search the ticker dropdown options."""
+    from backend.data.synthetic import synthetic_tickers
+    from frontend.callbacks.data import search_tickers
+
+    options = [
+        {'label': f"{ticker} (Synthetic)", 'value': ticker}
+        for ticker in synthetic_tickers(workload.params['universe'])
+    ]
+    return lambda: search_tickers(options, 'syn12')
+
+
+@benchmark('screener_scan')
+def bench_screener(workload: Workload) -> Callable:
+    """Screen a universe of the dropdown's size and sort the matches."""
+    import numpy as np
+    from backend.data.screener import Universe, matching, scan, sort_order
+
+    universe = Universe()
+    count, bars = workload.params['universe'], universe.history
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, count)), axis=0))
+    universe.tickers = [f"T{i}" for i in range(count)]
+    universe.close = close.astype(np.float32)
+    universe.high = (close * 1.01).astype(np.float32)
+    universe.volume = rng.lognormal(12, 1, (bars, count)).astype(np.float32)
+
+    def run():
+        metrics = scan(universe)
+        matches = matching(metrics, {'return': (0, None), 'volatility': (None, 40)})
+        return matches[sort_order(metrics['volume_spike'][matches], descending=True)]
+    return run
+
+
+def measure(func: Callable, repeat: int) -> Dict[str, float]:
+    """Time a callable after one warm-up call, in milliseconds."""
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'max_ms': max(timings),
+        'runs': repeat
+    }
+
+
+def run_suite(
+    sizes: List[str],
+    only: Optional[List[str]] = None,
+    repeat: int = 5,
+    seed: int = 0
+) -> Dict:
+    """Run the selected benchmarks for every size.
+
+    Returns:
+        Result document with machine details and one entry per
+        'benchmark[size]'
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            workload = Workload(size, Path(tmp), seed)
+            for name, setup in BENCHMARKS.items():
+                if only and name not in only:
+                    continue
+                key = f"{name}[{size}]"
+                try:
+                    results[key] = measure(setup(workload), repeat)
+                except SkipBenchmark as e:
+                    results[key] = {'skipped': str(e)}
+                print(_format_result(key, results[key]), flush=True)
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'sizes': {size: SIZES[size] for size in sizes},
+        'results': results
+    }
+
+
+def _format_result(key: str, result: Dict) -> str:
+    """Format one result line."""
+    if 'skipped' in result:
+        return f"{key:<32} skipped: {result['skipped']}"
+    return f"{key:<32} median {result['median_ms']:>10.2f} ms   min {result['min_ms']:>10.2f} ms"
+
+
+def _resolve(name: str) -> Path:
+    """Resolve a result name or path to a file."""
+    path = Path(name)
+    return path if path.suffix == '.json' else BASELINE_DIR / f"{name}.json"
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Print the change between two result documents.
+
+    Returns:
+        Keys of the benchmarks slower than the baseline by more than the
+        threshold (0.1 = 10%)
+    """
+    regressions = []
+    old_results = baseline['results']
+    new_results = current['results']
+    for key in sorted(set(old_results) | set(new_results)):
+        old = old_results.get(key, {})
+        new = new_results.get(key, {})
+        if 'median_ms' not in old or 'median_ms' not in new:
+            print(f"{key:<32} {'only in one run' if not old or not new else 'skipped'}")
+            continue
+
+        change = new['median_ms'] / old['median_ms'] - 1
+        status = ''
+        if change > threshold:
+            status = 'REGRESSION'
+            regressions.append(key)
+        elif change < -threshold:
+            status = 'improved'
+        print(
+            f"{key:<32} {old['median_ms']:>10.2f} -> {new['median_ms']:>10.2f} ms"
+            f"  {change:>+8.1%}  {status}"
+        )
+    return regressions
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Hot path benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run benchmarks and save the results")
+    run_parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=DEFAULT_SIZES)
+    run_parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS))
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--save', default='latest', help="Result name or .json path")
+
+    compare_parser = commands.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline', nargs='?', default='baseline')
+    compare_parser.add_argument('current', nargs='?', default='latest')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        document = run_suite(args.sizes, args.only, args.repeat, args.seed)
+        path = _resolve(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(document, indent=2))
+        print(f"Saved {path}")
+        return
+
+    baseline = json.loads(_resolve(args.baseline).read_text())
+    current = json.loads(_resolve(args.current).read_text())
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,35 @@
 from pathlib import Path
 
 import pandas as pd
-import streamlit as st
 
 
 class ConfigLoader:
     @staticmethod
     def load_tickers(file_path: Path) -> pd.DataFrame:
+        """Load the ticker and name columns of a symbol list file.
+        
+        Files under files/ are read from the universe snapshot; other
+        files are parsed once, with or without a header row.
+        
+        Returns:
+            DataFrame with ticker and name columns, empty if the file
+            cannot be read
+        """
+        # Imported here; backend modules import these settings themselves
+        from backend.data.universe import get_universe, read_rows, universe_files
+        
+        path = Path(file_path)
         try:
-            df = pd.read_csv(file_path)
-            if 'ticker' in df.columns:
-                return df
-            df = pd.read_csv(file_path, header=None, names=["ticker", "name"])
-            if 'ticker' in df.columns:
-                return df
-            raise ValueError(
-                "Unable to find 'ticker' column in the provided CSV file."
-            )
-        except Exception as e:
-            st.error(f"Error reading ticker CSV: {e}")
-            st.stop()
+            if path.resolve() in {f.resolve() for f in universe_files()}:
+                universe = get_universe()
+                source = universe.source_names.index(path.name)
+                rows = [
+                    row for row, row_source in zip(universe.rows(), universe.arrays['sources'].tolist())
+                    if row_source == source
+                ]
+            else:
+                rows = read_rows(path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading ticker CSV: {str(e)}")
+            rows = []
+        return pd.DataFrame(rows, columns=['ticker', 'name'])
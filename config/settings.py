@@ -16,20 +16,135 @@ DATA_DIR.mkdir(exist_ok=True)
 
 # Database settings
 DB_SETTINGS = {
-    'db_path': str(DATA_DIR / 'market_data.db'),
-    'echo': False  # SQL echo for debugging
+    'db_path': os.getenv('DB_PATH', str(DATA_DIR / 'market_data.db')),
+    'echo': False,  # SQL echo for debugging
+    'write_batch_size': 50,  # Frames written per transaction
+    'query_batch_size': 500  # Symbols per IN (...) query
 }
 
 # Data settings
 DATA_SETTINGS = {
-    'default_provider': 'yahoo',
-    'cache_timeout': 300,  # 5 minutes
+    'default_provider': os.getenv('DATA_PROVIDER', 'yahoo'),
+    'cache_timeout': 300,  # 5 minutes, in seconds
     'default_interval': '1d',
+    # Only the base interval is downloaded; coarser bars are built locally
+    'base_interval': '1d',
+    'derived_intervals': ['1wk', '1mo'],
+    # Minimum seconds between refetches of a bar that is still forming
+    'refresh_intervals': {
+        '1d': 300,
+        '1wk': 3600,
+        '1mo': 4 * 3600
+    },
+    # Relative change of a stored close, refetched with the next update,
+    # beyond which the provider is taken to have re-adjusted the history
+    # (a split or dividend) and the whole series is reloaded
+    'adjustment_tolerance': 0.001,
+    # Gaps separated by fewer stored sessions are fetched in one request
+    'gap_merge_sessions': 5,
+    # Empty answers for ranges ending at least this many days ago are
+    # stored; more recent ones may still be filled in by the provider
+    'empty_range_settle_days': 7,
+    # Stored empty ranges are asked for again after this many days, so a
+    # wrong entry heals itself
+    'empty_range_ttl_days': 90,
+    # Seconds a provider answer about a symbol is trusted
+    'validation_ttl': {
+        'valid': 30 * 24 * 3600,
+        'invalid': 24 * 3600
+    },
     'api_keys': {
         'alphavantage': os.getenv('ALPHA_VANTAGE_API_KEY')
+    },
+    # Hot series shared by worker processes; /dev/shm is memory-backed
+    'shared_cache': {
+        'enabled': os.getenv('SHARED_CACHE', '1') == '1',
+        'dir': os.getenv(
+            'SHARED_CACHE_DIR',
+            '/dev/shm/dashboard-cache' if Path('/dev/shm').is_dir() else str(DATA_DIR / 'cache')
+        ),
+        'max_mb': int(os.getenv('SHARED_CACHE_MB', '512'))
+    },
+    # Indicator series kept in memory, see backend/utils/indicators.py
+    'indicator_cache_size': int(os.getenv('INDICATOR_CACHE_SIZE', '1024')),
+    # Correlation results kept in memory and when to use the process pool,
+    # see backend/utils/correlation.py
+    'correlation': {
+        'cache_size': int(os.getenv('CORRELATION_CACHE_SIZE', '64')),
+        'pool_min_tickers': int(os.getenv('CORRELATION_POOL_MIN_TICKERS', '150')),
+        'pool_workers': int(os.getenv('CORRELATION_POOL_WORKERS', '2'))
+    },
+    # Portfolio backtest results kept in memory
+    'backtest_cache_size': int(os.getenv('BACKTEST_CACHE_SIZE', '32')),
+    # Fetches run on these many threads, most urgent first
+    'fetch_queue': {
+        'workers': int(os.getenv('FETCH_WORKERS', '2')),
+        # Jobs of the same priority and interval taken together by a worker;
+        # they are fetched one by one but stored in one write
+        'batch_size': int(os.getenv('FETCH_BATCH_SIZE', '4')),
+        # Milliseconds between checks for finished fetches to draw
+        'poll_ms': int(os.getenv('FETCH_POLL_MS', '500'))
+    },
+    # Category index series, see backend/data/composites.py
+    'composites': {
+        # Bars of dollar volume averaged into a cap weight
+        'weight_bars': int(os.getenv('COMPOSITE_WEIGHT_BARS', '20'))
+    },
+    # Bars per ticker kept by the screener, at least a 52-week year
+    'screener': {
+        'history_bars': int(os.getenv('SCREENER_HISTORY_BARS', '260')),
+        # Load the universe in the background at boot
+        'preload': os.getenv('SCREENER_PRELOAD', '1') == '1'
+    },
+    # Binary snapshot of the files/*.csv symbol lists
+    'universe': {
+        'dir': os.getenv('UNIVERSE_DIR', str(DATA_DIR / 'universe'))
+    },
+    # Snapshot of the shared cache restored at boot
+    'warm_start': {
+        'enabled': os.getenv('WARM_START', '1') == '1',
+        'dir': os.getenv('WARM_START_DIR', str(DATA_DIR / 'warm_start')),
+        'interval': int(os.getenv('WARM_START_INTERVAL', '900')),
+        # Also ask the provider for new bars of the preloaded tickers
+        'refresh': os.getenv('WARM_START_REFRESH', '0') == '1'
+    },
+    'alphavantage_url': os.getenv('ALPHA_VANTAGE_URL', 'https://www.alphavantage.co/query'),
+    # Offline replay provider ('replay') and its Alpha Vantage stand-in
+    'replay': {
+        'recordings_dir': os.getenv('REPLAY_RECORDINGS_DIR', str(DATA_DIR / 'recordings')),
+        'generate_missing': os.getenv('REPLAY_GENERATE', '1') == '1',
+        'years': float(os.getenv('REPLAY_YEARS', '10')),
+        'latency_ms': float(os.getenv('REPLAY_LATENCY_MS', '0')),
+        'jitter_ms': float(os.getenv('REPLAY_JITTER_MS', '0')),
+        'error_rate': float(os.getenv('REPLAY_ERROR_RATE', '0')),
+        'throttle_calls': int(os.getenv('REPLAY_THROTTLE_CALLS', '0')),
+        'throttle_period': float(os.getenv('REPLAY_THROTTLE_PERIOD', '60')),
+        'throttle_mode': os.getenv('REPLAY_THROTTLE_MODE', 'wait'),
+        'seed': int(os.getenv('REPLAY_SEED', '0'))
     }
 }
 
+# Callback timing and profiling
+PERF_SETTINGS = {
+    'enabled': os.getenv('PERF_INSTRUMENTATION', '1') == '1',
+    'slow_callback_ms': float(os.getenv('SLOW_CALLBACK_MS', '500')),
+    'slow_log_path': os.getenv('SLOW_LOG_PATH', str(DATA_DIR / 'slow_callbacks.jsonl')),
+    # Callback name (or '*') whose next invocation is profiled; writing a
+    # name into profile_flag does the same on a running server
+    'profile_callback': os.getenv('PROFILE_CALLBACK'),
+    'profile_flag': DATA_DIR / 'profile_callback',
+    'profile_dir': DATA_DIR / 'profiles',
+    'session_timeout': 300,  # Seconds a browser session counts as active
+    # Each server worker writes its metrics here so /metrics can add up
+    # all of them; cleared when gunicorn starts
+    'metrics_dir': os.getenv(
+        'METRICS_DIR',
+        str(Path(DATA_SETTINGS['shared_cache']['dir']) / 'metrics')
+    ),
+    # Seconds between writes of a worker's metrics while it serves
+    'metrics_flush_s': float(os.getenv('METRICS_FLUSH_S', '5'))
+}
+
 # Active theme (can be overridden by state management)
 ACTIVE_THEME = 'dark'
 THEME = COLOR_SCHEMES.get(ACTIVE_THEME, COLOR_SCHEMES[DEFAULT_THEME])
@@ -8,6 +8,9 @@ from typing import Optional
 import streamlit as st
 from core.request_manager import RequestManager
 from core.settings_manager import SettingsManager
+from config.settings import DATA_SETTINGS
+from backend.data.providers.alpha_vantage import COMPACT_BARS, parse_time_series
+from backend.data.symbols import get_registry
 
 class DataProvider(ABC):
     """Abstract base class for data providers"""
@@ -63,11 +66,14 @@ class YahooFinanceProvider(DataProvider):
 class AlphaVantageProvider(DataProvider):
     """Alpha Vantage data provider implementation"""
     
+    # Approximate number of daily bars in each yfinance-style period
+    PERIOD_BARS = {'1d': 1, '5d': 5, '1mo': 22, '3mo': 63}
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or st.secrets.get("ALPHA_VANTAGE_API_KEY")
         if not self.api_key:
             raise ValueError("Alpha Vantage API key is required")
-        self.base_url = "https://www.alphavantage.co/query"
+        self.base_url = DATA_SETTINGS['alphavantage_url']
 
     def get_provider_name(self) -> str:
         return "Alpha Vantage"
@@ -81,6 +87,10 @@ class AlphaVantageProvider(DataProvider):
         }
         return interval_mapping.get(interval, ("TIME_SERIES_DAILY_ADJUSTED", "Daily"))
 
+    def _output_size(self, period: str) -> str:
+        """Use a compact response when the period fits in one"""
+        return 'compact' if self.PERIOD_BARS.get(period, COMPACT_BARS) < COMPACT_BARS else 'full'
+
     def fetch_data(self, ticker: str, interval: str = "1d", period: str = "max") -> pd.DataFrame:
         """Fetch data from Alpha Vantage"""
         request_manager = RequestManager.get_instance()
@@ -88,14 +98,17 @@ class AlphaVantageProvider(DataProvider):
             SettingsManager.get_setting('cache_timeout', 3600)
         )
         
-        # Check if it's a crypto ticker
-        is_crypto = ticker.endswith('USD') and any(c in ticker for c in ['BTC', 'ETH', 'ADA', 'SOL', 'XRP', 'DOGE', 'DOT', 'MATIC', 'LINK', 'UNI'])
+        # Tickers arrive in Alpha Vantage spelling, e.g. BTCUSD
+        registry = get_registry()
+        symbol = registry.display_symbol(ticker, 'alphavantage')
+        is_crypto = registry.is_crypto(symbol)
         
         if is_crypto:
+            base, market = registry.pair(symbol)
             params = {
                 'function': 'DIGITAL_CURRENCY_DAILY',
-                'symbol': ticker[:-3],  # Remove USD suffix
-                'market': 'USD',
+                'symbol': base,
+                'market': market,
                 'apikey': self.api_key
             }
         else:
@@ -104,7 +117,7 @@ class AlphaVantageProvider(DataProvider):
                 'function': function,
                 'symbol': ticker,
                 'apikey': self.api_key,
-                'outputsize': 'full'
+                'outputsize': self._output_size(period)
             }
         
         try:
@@ -123,65 +136,20 @@ class AlphaVantageProvider(DataProvider):
                 return pd.DataFrame()
             
             # Handle different response formats for crypto vs stocks
-            if is_crypto:
-                time_series_key = 'Time Series (Digital Currency Daily)'
-                if time_series_key not in data:
-                    st.warning(f"No data received for {ticker}")
-                    if 'Note' in data:
-                        st.warning(f"API Note: {data['Note']}")
-                    return pd.DataFrame()
-                
-                # Convert crypto data format
-                raw_data = data[time_series_key]
-                df = pd.DataFrame.from_dict(raw_data, orient='index')
-                df.index.name = 'Date'
-                
-                # Debug: Print available columns
-                st.write(f"Available columns for {ticker}: {df.columns.tolist()}")
-                
-                # For crypto, we need to use the regular column names
-                column_mapping = {
-                    '1. open': 'Open',
-                    '2. high': 'High',
-                    '3. low': 'Low',
-                    '4. close': 'Close',
-                    '5. volume': 'Volume'
-                }
-                
-                # Rename columns first
-                df = df.rename(columns=column_mapping)
-                
-            else:
-                time_series_key = f"Time Series ({output_size})"
-                if time_series_key not in data:
-                    st.warning(f"No data received for {ticker}")
-                    if 'Note' in data:
-                        st.warning(f"API Note: {data['Note']}")
-                    return pd.DataFrame()
-                
-                # Convert stock data format
-                df = pd.DataFrame.from_dict(data[time_series_key], orient='index')
-                df.index.name = 'Date'
-                
-                # Rename stock columns
-                column_mapping = {
-                    '1. open': 'Open',
-                    '2. high': 'High',
-                    '3. low': 'Low',
-                    '4. close': 'Close',
-                    '5. volume': 'Volume'
-                }
-                df = df.rename(columns=column_mapping)
-            
-            # Reset index to get Date as a column, then set it back as index
-            df = df.reset_index()
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.set_index('Date')
+            time_series_key = (
+                'Time Series (Digital Currency Daily)' if is_crypto
+                else f"Time Series ({output_size})"
+            )
+            if time_series_key not in data:
+                st.warning(f"No data received for {ticker}")
+                if 'Note' in data:
+                    st.warning(f"API Note: {data['Note']}")
+                return pd.DataFrame()
             
-            # Convert numeric columns
-            for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+            # Parse dates and OHLCV values in one pass
+            df = parse_time_series({time_series_key: data[time_series_key]})
+            df.columns = df.columns.str.capitalize()
+            df.index.name = 'Date'
             
             # Sort index in ascending order
             df = df.sort_index()
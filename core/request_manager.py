@@ -5,6 +5,8 @@ import aiohttp
 import streamlit as st
 from datetime import datetime, timedelta
 from functools import wraps
+from backend.data.providers.alpha_vantage import loads
+from backend.utils.metrics import record_rate_limit_wait
 
 class RateLimiter:
     """Rate limiter for API requests"""
@@ -85,6 +87,7 @@ class RequestManager:
         if rate_limiter:
             wait_time = rate_limiter.wait_time()
             if wait_time > 0:
+                record_rate_limit_wait(provider, wait_time)
                 st.info(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
                 try:
                     await asyncio.sleep(wait_time)
@@ -98,7 +101,7 @@ class RequestManager:
                 try:
                     async with session.request(method, url, params=params, timeout=10) as response:
                         response.raise_for_status()
-                        data = await response.json()
+                        data = loads(await response.read())
                         
                         # Cache the response
                         if use_cache:
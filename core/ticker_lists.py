@@ -3,6 +3,7 @@ import json
 from pathlib import Path
 import streamlit as st
 from core.settings_manager import SettingsManager
+from backend.data.symbols import get_registry
 
 class TickerLists:
     """Manages available tickers and user custom ticker lists"""
@@ -39,36 +40,6 @@ class TickerLists:
         }
     }
 
-    # Provider-specific ticker mappings
-    TICKER_MAPPINGS = {
-        'yahoo_to_alphavantage': {
-            'BTC-USD': 'BTCUSD',
-            'ETH-USD': 'ETHUSD',
-            'ADA-USD': 'ADAUSD',
-            'SOL-USD': 'SOLUSD',
-            'XRP-USD': 'XRPUSD',
-            'DOGE-USD': 'DOGEUSD',
-            'DOT-USD': 'DOTUSD',
-            'MATIC-USD': 'MATICUSD',
-            'LINK-USD': 'LINKUSD',
-            'UNI-USD': 'UNIUSD',
-            '^GSPC': 'SPX',
-            '^DJI': 'DJI',
-            '^IXIC': 'IXIC',
-            '^RUT': 'RUT',
-            '^VIX': 'VIX',
-            '^FTSE': 'FTSE',
-            '^N225': 'N225',
-            '^GDAXI': 'GDAXI',
-            '^FCHI': 'FCHI'
-        }
-    }
-
-    # Add reverse mapping
-    TICKER_MAPPINGS['alphavantage_to_yahoo'] = {
-        v: k for k, v in TICKER_MAPPINGS['yahoo_to_alphavantage'].items()
-    }
-
     LISTS_FILE = "ticker_lists.json"
 
     @staticmethod
@@ -130,17 +101,8 @@ class TickerLists:
         if from_provider == to_provider:
             return ticker
         
-        mapping_key = f"{from_provider}_to_{to_provider}"
-        if mapping_key in TickerLists.TICKER_MAPPINGS:
-            return TickerLists.TICKER_MAPPINGS[mapping_key].get(ticker, ticker)
-        
-        # Try reverse mapping
-        reverse_key = f"{to_provider}_to_{from_provider}"
-        if reverse_key in TickerLists.TICKER_MAPPINGS:
-            reverse_map = {v: k for k, v in TickerLists.TICKER_MAPPINGS[reverse_key].items()}
-            return reverse_map.get(ticker, ticker)
-        
-        return ticker
+        registry = get_registry()
+        return registry.provider_symbol(registry.display_symbol(ticker, from_provider), to_provider)
 
     @staticmethod
     def create_list(name: str, description: str, tickers: List[str], provider: str) -> bool:
@@ -2,37 +2,14 @@ from typing import Dict, List, Optional
 import pandas as pd
 from core.state_manager import StateManager
 from config.settings import TICKER_LISTS
+from backend.data.composites import COMPOSITES, composite_label
+from backend.data.symbols import get_registry
 
 class TickerManager:
-    """Manages ticker lists and provider mappings."""
+    """Manages ticker lists and selection."""
     
-    # Provider-specific ticker mappings
-    PROVIDER_MAPPINGS = {
-        'yahoo': {
-            'BTC-USD': 'BTC-USD',
-            'ETH-USD': 'ETH-USD',
-            'ADA-USD': 'ADA-USD',
-            'SOL-USD': 'SOL-USD',
-            'XRP-USD': 'XRP-USD',
-            'DOGE-USD': 'DOGE-USD',
-            'DOT-USD': 'DOT-USD',
-            'MATIC-USD': 'MATIC-USD',
-            'LINK-USD': 'LINK-USD',
-            'UNI-USD': 'UNI-USD'
-        },
-        'alpha_vantage': {
-            'BTC-USD': 'BTCUSD',
-            'ETH-USD': 'ETHUSD',
-            'ADA-USD': 'ADAUSD',
-            'SOL-USD': 'SOLUSD',
-            'XRP-USD': 'XRPUSD',
-            'DOGE-USD': 'DOGEUSD',
-            'DOT-USD': 'DOTUSD',
-            'MATIC-USD': 'MATICUSD',
-            'LINK-USD': 'LINKUSD',
-            'UNI-USD': 'UNIUSD'
-        }
-    }
+    # Dropdown options of all tickers, built on first use
+    _available_tickers: Optional[List[Dict]] = None
     
     @classmethod
     def initialize(cls) -> None:
@@ -46,17 +23,12 @@ class TickerManager:
     @classmethod
     def get_provider_ticker(cls, ticker: str, provider: str = 'yahoo') -> str:
         """Convert display ticker to provider-specific ticker."""
-        mapping = cls.PROVIDER_MAPPINGS.get(provider, {})
-        return mapping.get(ticker, ticker)
+        return get_registry().provider_symbol(ticker, provider)
     
     @classmethod
     def get_display_ticker(cls, provider_ticker: str, provider: str = 'yahoo') -> Optional[str]:
         """Convert provider-specific ticker to display ticker."""
-        mapping = cls.PROVIDER_MAPPINGS.get(provider, {})
-        for display_ticker, prov_ticker in mapping.items():
-            if prov_ticker == provider_ticker:
-                return display_ticker
-        return provider_ticker
+        return get_registry().display_symbol(provider_ticker, provider)
     
     @classmethod
     def get_selected_tickers(cls) -> List[str]:
@@ -91,15 +63,18 @@ class TickerManager:
     
     @classmethod
     def get_available_tickers(cls) -> List[Dict]:
-        """Get all available tickers with categories."""
-        available_tickers = []
-        for category, tickers in TICKER_LISTS.items():
-            for ticker in tickers:
-                available_tickers.append({
-                    'label': f"{ticker} ({category})",
-                    'value': ticker
-                })
-        return available_tickers
+        """Get all available tickers with categories, then the category indices."""
+        # Built once; the ticker lists only change with a restart
+        if cls._available_tickers is None:
+            cls._available_tickers = [
+                {'label': f"{ticker} ({category})", 'value': ticker}
+                for category, tickers in TICKER_LISTS.items()
+                for ticker in tickers
+            ] + [
+                {'label': f"{symbol} ({composite_label(symbol)})", 'value': symbol}
+                for symbol in COMPOSITES
+            ]
+        return cls._available_tickers
     
     @classmethod
     def get_tickers_by_category(cls, category: str) -> List[str]:
@@ -2,9 +2,10 @@
 
 import pandas as pd
 from datetime import datetime
-import streamlit as st
 from typing import Dict
 
+from backend.utils import normalization
+
 
 def normalize_data(data_dict, norm_date=None):
     """
@@ -23,34 +24,21 @@ def normalize_data(data_dict, norm_date=None):
     # Use existing data without copying if no normalization needed
     if not norm_date:
         return data_dict
-        
-    normalized = {}
-    for ticker, df in data_dict.items():
-        if df.empty:
-            normalized[ticker] = df
-            continue
-            
-        try:
-            # Find normalization value
-            norm_date_ts = pd.Timestamp(norm_date)
-            if norm_date_ts not in df.index:
-                # If exact date not found, use nearest date
-                nearest_date = min(df.index, key=lambda x: abs(x - norm_date_ts))
-                st.info(f"Using nearest date {nearest_date.date()} for normalization of {ticker}")
-                norm_date_ts = nearest_date
-            
-            # Only normalize the close column which is used for display
-            df_norm = df.copy()
-            norm_value = df.loc[norm_date_ts, 'close']
-            df_norm['close'] = (df['close'] / norm_value) * 100
-                    
-            normalized[ticker] = df_norm
-            
-        except Exception as e:
-            st.error(f"Error normalizing {ticker}: {str(e)}")
-            normalized[ticker] = df
-            
-    return normalized
+    
+    try:
+        # All tickers at once; each uses its bar nearest to norm_date
+        closes = normalization.normalize(data_dict, norm_date)
+    except Exception as e:
+        # Only needed to report the error, so the function runs without it
+        import streamlit as st
+        st.error(f"Error normalizing data: {str(e)}")
+        return data_dict
+    
+    # Only the close column, which is used for display, changes
+    return {
+        ticker: df.assign(close=closes[ticker]) if ticker in closes else df
+        for ticker, df in data_dict.items()
+    }
 
 def adjust_range_and_interval(start_date: datetime, end_date: datetime, interval: str) -> str:
     """Adjust interval based on date range"""
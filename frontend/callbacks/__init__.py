@@ -2,10 +2,16 @@
 
 from dash import Dash
 from .chart import register_chart_callbacks
+from .correlation import register_correlation_callbacks
 from .data import register_data_callbacks
+from .portfolio import register_portfolio_callbacks
+from .screener import register_screener_callbacks
 
 
 def register_callbacks(app: Dash) -> None:
     """Register all callbacks with the app."""
     register_chart_callbacks(app)
-    register_data_callbacks(app) 
\ No newline at end of file
+    register_correlation_callbacks(app)
+    register_data_callbacks(app)
+    register_portfolio_callbacks(app)
+    register_screener_callbacks(app)
\ No newline at end of file
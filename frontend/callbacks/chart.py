@@ -1,53 +1,621 @@
 """Chart-related callbacks."""
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-from dash import Dash, Input, Output, State, callback_context
+from dash import Dash, Input, Output, Patch, State, callback_context, no_update
 import plotly.graph_objects as go
 from dash.exceptions import PreventUpdate
 
-from backend.data.manager import DataManager
+from backend.utils import indicators, normalization
+from backend.utils.instrumentation import span
 from core.ticker_manager import TickerManager
 from core.state_manager import StateManager
 from config.settings import THEME
 
 
-def normalize_data(df: pd.DataFrame, click_point: Dict = None) -> pd.DataFrame:
-    """Normalize data based on click point or start."""
-    if df.empty:
-        return df
+# Axis title and hover line of each normalization mode
+NORMALIZE_LABELS = {
+    'index': ('Normalized Price (%)', "Value: %{y:.1f}%<br>"),
+    'percent': ('Change (%)', "Change: %{y:+.1f}%<br>"),
+    'log': ('Log Return (%)', "Log return: %{y:+.1f}%<br>")
+}
+
+# Line style of indicator outputs other than the main line
+OUTPUT_DASH = {'upper': 'dot', 'lower': 'dot', 'signal': 'dot'}
+
+# Height of each indicator panel below the price chart, as a share of the plot
+PANEL_HEIGHT = 0.18
+
+# Price lines of tickers still being refreshed
+STALE_LINE = {'dash': 'dot'}
+STALE_OPACITY = 0.5
+
+
+def _value_labels(normalize: bool, normalize_mode: str) -> Tuple[str, str]:
+    """Axis title and hover line of the price values."""
+    return NORMALIZE_LABELS[normalize_mode] if normalize else ('Price', "Price: %{y:.2f}<br>")
+
+
+def _indicator_traces(
+    ticker: str,
+    df: pd.DataFrame,
+    color: str,
+    indicator: indicators.Indicator,
+    outputs: Dict[str, np.ndarray],
+    axis: str,
+    rebase=None
+) -> List:
+    """Traces of one indicator of one ticker.
+    
+    Args:
+        ticker: Ticker the values belong to
+        df: Shown bars of the ticker
+        color: Color of the ticker
+        indicator: Indicator the outputs are from
+        outputs: Output values, one per shown bar
+        axis: Y axis to draw on, 'y' for the price axis
+        rebase: Function normalizing price-axis values, if normalized
         
-    if click_point:
-        # Find the closest point in time to the click
-        click_time = pd.to_datetime(click_point['x'])
-        idx = df.index.get_indexer([click_time], method='nearest')[0]
-        reference_value = df.iloc[idx]
-        # Save normalization point in state
-        StateManager.set_state('norm_date', click_time.isoformat())
-    else:
-        # Try to get saved normalization point
-        saved_norm_date = StateManager.get_state('norm_date')
-        if saved_norm_date and saved_norm_date in df.index:
-            reference_value = df.loc[saved_norm_date]
-        else:
-            reference_value = df.iloc[0]
-            StateManager.set_state('norm_date', df.index[0].isoformat())
+    Returns:
+        Scatter and bar traces
+    """
+    traces = []
+    for name in indicator.outputs:
+        values = outputs[name]
+        if rebase is not None:
+            values = rebase(values)
+        label = indicator.label if name == indicator.outputs[0] else f"{indicator.title} {name}"
+        hover = (
+            f"<b>{ticker} {label}</b><br>" +
+            "%{x}<br>" +
+            "%{y:.2f}<br>" +
+            "<extra></extra>"
+        )
+        if name == 'histogram':
+            traces.append(go.Bar(
+                x=df.index.values, y=values, name=f"{ticker} {label}", yaxis=axis,
+                marker_color=color, opacity=0.4, hovertemplate=hover
+            ))
+            continue
+        traces.append(go.Scatter(
+            x=df.index.values,
+            y=values,
+            name=f"{ticker} {label}",
+            mode='lines',
+            yaxis=axis,
+            line=dict(color=color, width=1, dash=OUTPUT_DASH.get(name, 'dash' if axis == 'y' else 'solid')),
+            hovertemplate=hover
+        ))
+    return traces
+
+
+def _price_traces(
+    ticker: str,
+    df: pd.DataFrame,
+    color: str,
+    values,
+    value_hover: str,
+    stale: bool = False
+) -> List:
+    """Price line and volume bars of one ticker.
+    
+    Args:
+        ticker: Ticker the bars belong to
+        df: Shown bars of the ticker
+        color: Color of the ticker
+        values: Values of the price line, one per bar
+        value_hover: Hover line of a price value
+        stale: Whether the bars are still being refreshed
+        
+    Returns:
+        Scatter and bar traces
+    """
+    # Plain datetime64 values serialize far faster than Timestamps
+    dates = df.index.values
+    hoverlabel = dict(
+        bgcolor=THEME['hover_bg'],
+        bordercolor=color,
+        font=dict(
+            color=THEME['text_primary'],
+            size=13
+        )
+    )
+    return [
+        go.Scatter(
+            x=dates,
+            y=values,
+            name=ticker,
+            mode='lines',
+            line=dict(
+                color=color,
+                width=2,
+                **STALE_LINE if stale else {}
+            ),
+            opacity=STALE_OPACITY if stale else 1.0,
+            hovertemplate=(
+                f"<b>{ticker}</b><br>" +
+                "%{x}<br>" +
+                value_hover +
+                "<extra></extra>"
+            ),
+            hoverlabel=hoverlabel
+        ),
+        go.Bar(
+            x=dates,
+            y=df['volume'],
+            name=f"{ticker} Volume",
+            yaxis='y2',
+            marker_color=color,
+            opacity=0.3,
+            hovertemplate=(
+                f"<b>{ticker} Volume</b><br>" +
+                "%{x}<br>" +
+                "Volume: %{y:,.0f}<br>" +
+                "<extra></extra>"
+            ),
+            hoverlabel=hoverlabel,
+            visible='legendonly'
+        )
+    ]
+
+
+def build_figure(
+    ticker_data: Dict[str, pd.DataFrame],
+    normalize: bool,
+    log_scale: bool,
+    base_date=None,
+    normalize_mode: str = 'index',
+    indicator_values: Dict[str, List[Tuple[indicators.Indicator, Dict[str, np.ndarray]]]] = None,
+    stale: Optional[Set[str]] = None
+) -> Dict:
+    """Build the price chart figure from loaded ticker data.
+    
+    Args:
+        ticker_data: Dictionary mapping tickers to their OHLCV DataFrames
+        normalize: Whether to show prices normalized to a base point
+        log_scale: Whether to use a log scale for prices
+        base_date: Date to normalize to, or None for the first bar
+        normalize_mode: Normalization mode, one of normalization.MODES
+        indicator_values: Dictionary mapping tickers to indicators and
+            their outputs, one value per bar of ticker_data
+        stale: Tickers drawn from stored bars while they are refreshed
+        
+    Returns:
+        Figure dictionary for the chart component
+    """
+    stale = stale or set()
+    # All tickers are normalized together
+    normalized, bases = {}, {}
+    shown = {ticker: df for ticker, df in ticker_data.items() if not df.empty}
+    if normalize and shown:
+        normalized, bases = normalization.normalize_with_bases(shown, base_date, normalize_mode)
+    indicator_values = indicator_values or {}
+    # Y axis of each indicator drawn in a panel of its own
+    panels: Dict[Tuple, str] = {}
+    y_title, value_hover = _value_labels(normalize, normalize_mode)
+    # Changes and log returns go below zero
+    if normalize and normalize_mode != 'index':
+        log_scale = False
+    
+    # Create traces
+    traces = []
+    for i, (ticker, df) in enumerate(ticker_data.items()):
+        if not df.empty:
+            color = THEME['chart_colors'][i % len(THEME['chart_colors'])]
+            # Get the close prices
+            close_prices = normalized.get(ticker, df['close'])
+            
+            traces.extend(_price_traces(ticker, df, color, close_prices, value_hover, ticker in stale))
+            
+            # Add indicators, on the price axis or in their panels
+            for indicator, outputs in indicator_values.get(ticker, []):
+                rebase = None
+                if indicator.overlay:
+                    axis = 'y'
+                    if normalize:
+                        base = bases.get(ticker, np.nan)
+                        rebase = lambda values, base=base: normalization.rebase_values(values, base, normalize_mode)
+                else:
+                    axis = panels.setdefault(indicator.key, f"y{len(panels) + 3}")
+                traces.extend(_indicator_traces(ticker, df, color, indicator, outputs, axis, rebase))
+    
+    if not traces:
+        return {
+            'data': [],
+            'layout': {
+                'title': {
+                    'text': 'No data available for selected tickers',
+                    'x': 0.5,
+                    'xanchor': 'center',
+                    'font': {'color': THEME['text_primary']}
+                },
+                'showlegend': True,
+                'template': 'plotly_dark',
+                'xaxis': {
+                    'title': 'Date',
+                    'rangeslider': {'visible': False},
+                    'showgrid': True,
+                    'gridcolor': THEME['grid'],
+                    'domain': [0, 1],
+                    'color': THEME['text_primary']
+                },
+                'yaxis': {
+                    'title': y_title,
+                    'showgrid': True,
+                    'gridcolor': THEME['grid'],
+                    'type': 'log' if log_scale else 'linear',
+                    'side': 'left',
+                    'color': THEME['text_primary']
+                },
+                'yaxis2': {
+                    'title': 'Volume',
+                    'showgrid': False,
+                    'side': 'right',
+                    'overlaying': 'y',
+                    'color': THEME['text_primary']
+                },
+                'paper_bgcolor': THEME['chart_outer_bg'],
+                'plot_bgcolor': THEME['chart_inner_bg'],
+                'font': {'color': THEME['text_primary']},
+                'hovermode': 'closest',
+                'hoverdistance': 50,
+                'hoverlabel': {
+                    'bgcolor': THEME['hover_bg'],
+                    'font': {'size': 13},
+                    'align': 'right',
+                    'namelength': -1
+                },
+                'dragmode': 'zoom',
+                'modebar': {
+                    'bgcolor': 'rgba(0,0,0,0)',
+                    'color': THEME['text_primary'],
+                    'activecolor': THEME['text_primary']
+                },
+                'legend': {
+                    'bgcolor': 'rgba(0,0,0,0)',
+                    'font': {'color': THEME['text_primary']},
+                    'bordercolor': THEME['border'],
+                    'borderwidth': 1
+                },
+                'margin': {'l': 60, 'r': 60, 't': 50, 'b': 50}
+            }
+        }
+    
+    # Create figure
+    figure = {
+        'data': traces,
+        'layout': {
+            'title': {
+                'text': 'Normalized Price Chart (Click to change base point)' if normalize else 'Price Chart',
+                'x': 0.5,
+                'xanchor': 'center',
+                'font': {'color': THEME['text_primary']}
+            },
+            'showlegend': True,
+            'template': 'plotly_dark',
+            'xaxis': {
+                'title': 'Date',
+                'rangeslider': {'visible': False},
+                'showgrid': True,
+                'gridcolor': THEME['grid'],
+                'domain': [0, 1],
+                'color': THEME['text_primary']
+            },
+            'yaxis': {
+                'title': y_title,
+                'showgrid': True,
+                'gridcolor': THEME['grid'],
+                'type': 'log' if log_scale else 'linear',
+                'side': 'left',
+                'color': THEME['text_primary']
+            },
+            'yaxis2': {
+                'title': 'Volume',
+                'showgrid': False,
+                'side': 'right',
+                'overlaying': 'y',
+                'color': THEME['text_primary']
+            },
+            'paper_bgcolor': THEME['chart_outer_bg'],
+            'plot_bgcolor': THEME['chart_inner_bg'],
+            'font': {'color': THEME['text_primary']},
+            'hovermode': 'closest',
+            'hoverdistance': 50,
+            'hoverlabel': {
+                'bgcolor': THEME['hover_bg'],
+                'font': {'size': 13},
+                'align': 'right',
+                'namelength': -1
+            },
+            'dragmode': 'zoom',
+            'modebar': {
+                'bgcolor': 'rgba(0,0,0,0)',
+                'color': THEME['text_primary'],
+                'activecolor': THEME['text_primary']
+            },
+            'legend': {
+                'bgcolor': 'rgba(0,0,0,0)',
+                'font': {'color': THEME['text_primary']},
+                'bordercolor': THEME['border'],
+                'borderwidth': 1
+            },
+            'margin': {'l': 60, 'r': 60, 't': 50, 'b': 50}
+        }
+    }
+    
+    # Stack indicator panels under the price chart
+    if panels:
+        by_key = {indicator.key: indicator for values in indicator_values.values() for indicator, _ in values}
+        height = min(PANEL_HEIGHT, 0.6 / len(panels))
+        figure['layout']['yaxis']['domain'] = [height * len(panels) + 0.02, 1]
+        for position, (key, axis) in enumerate(panels.items()):
+            bottom = height * (len(panels) - 1 - position)
+            figure['layout'][f"yaxis{axis[1:]}"] = {
+                'title': by_key[key].label,
+                'domain': [bottom, bottom + height - 0.02],
+                'anchor': 'x',
+                'showgrid': True,
+                'gridcolor': THEME['grid'],
+                'side': 'left',
+                'color': THEME['text_primary']
+            }
+    
+    return figure
+
+
+def compute_indicators(
+    data_manager,
+    ticker_data: Dict[str, pd.DataFrame],
+    specs: List[str],
+    interval: str
+) -> Dict[str, List[Tuple[indicators.Indicator, Dict[str, np.ndarray]]]]:
+    """Compute indicators over the full series and cut them to the shown bars.
+    
+    Args:
+        data_manager: Data manager to load the full series from
+        ticker_data: Shown bars of every ticker
+        specs: Indicators as parsed by indicators.parse_indicator
+        interval: Bar interval
+        
+    Returns:
+        Dictionary mapping tickers to indicators and their outputs
+    """
+    tickers = [ticker for ticker, df in ticker_data.items() if not df.empty]
+    if not tickers:
+        return {}
+    # Windows reach back before the shown range
+    full_data = data_manager.load_data_for_tickers(tickers, None, None, interval)
+    cache = indicators.get_indicator_cache()
+    
+    result: Dict[str, List] = {ticker: [] for ticker in tickers}
+    for spec in specs:
+        indicator = indicators.parse_indicator(spec)
+        values = cache.compute(indicator, full_data, interval)
+        for ticker in tickers:
+            if ticker not in values:
+                continue
+            shown = ticker_data[ticker].index
+            start = full_data[ticker].index.searchsorted(shown[0])
+            result[ticker].append((
+                indicator,
+                {name: output[start:start + len(shown)] for name, output in values[ticker].items()}
+            ))
+    return result
+
+
+def chart_range(view: Dict) -> Dict:
+    """Selection of a chart view as published to the chart-range store."""
+    return {key: view[key] for key in ('tickers', 'interval', 'start', 'end')}
+
+
+def stream_state(
+    view: Dict,
+    ticker_data: Dict[str, pd.DataFrame],
+    figure: Dict,
+    pending: List[str],
+    stale: List[str]
+) -> Dict:
+    """What the chart shows, so bars can be patched in as fetches finish.
+    
+    Args:
+        view: Selection and display settings the chart was drawn with
+        ticker_data: Bars the chart was drawn from
+        figure: The chart figure
+        pending: Tickers whose fetch had not finished when it was drawn
+        stale: Tickers drawn from stored bars that are out of date
+        
+    Returns:
+        Dictionary with the view, the pending and stale tickers, the
+        positions of each ticker's price and volume traces, and each
+        drawn ticker's bar count, last bar date and normalization base
+    """
+    names = [trace['name'] for trace in figure['data']]
+    traces = {
+        name: [position, position + 1]
+        for position, name in enumerate(names) if name in ticker_data
+    }
+    bases = {}
+    if view['normalize'] and traces:
+        _, bases = normalization.normalize_with_bases(
+            {ticker: ticker_data[ticker] for ticker in traces}, view['base_date'], view['normalize_mode']
+        )
+    return {
+        'view': view,
+        'pending': pending,
+        'stale': stale,
+        'traces': traces,
+        'count': len(names),
+        'drawn': {
+            ticker: {
+                'bars': len(ticker_data[ticker]),
+                'last': ticker_data[ticker].index[-1].isoformat(),
+                'base': bases.get(ticker)
+            }
+            for ticker in traces
+        }
+    }
+
+
+def still_stale(data_manager, stale: List[str], pending: List[str], interval: str) -> List[str]:
+    """Stale tickers whose bars are still out of date.
+    
+    A ticker whose fetch finished, in whichever server worker, is checked
+    again against the stored update times, so a fetch that failed leaves
+    it drawn as stale rather than current.
+    """
+    done = [ticker for ticker in stale if ticker not in pending]
+    failed = set(data_manager.find_stale_tickers(done, interval)) if done else set()
+    return [ticker for ticker in stale if ticker in pending or ticker in failed]
+
+
+def render_chart(data_manager, view: Dict, pending: List[str], stale: List[str]) -> Tuple[Dict, Dict]:
+    """Load the shown bars and build the whole chart.
+    
+    Args:
+        data_manager: Data manager to load the bars from
+        view: Selection and display settings to draw
+        pending: Tickers whose fetch has not finished yet
+        stale: Tickers whose stored bars are out of date
+        
+    Returns:
+        The figure and its state as returned by stream_state
+    """
+    start = datetime.strptime(view['start'], '%Y-%m-%d')
+    end = datetime.strptime(view['end'], '%Y-%m-%d')
+    with span('chart.load', tickers=len(view['tickers'])):
+        ticker_data = data_manager.load_data_for_tickers(view['tickers'], start, end, view['interval'])
+    
+    indicator_values = {}
+    if view['indicators']:
+        with span('chart.indicators', indicators=len(view['indicators'])):
+            indicator_values = compute_indicators(
+                data_manager, ticker_data, view['indicators'], view['interval']
+            )
+    
+    with span('chart.figure'):
+        figure = build_figure(
+            ticker_data,
+            view['normalize'],
+            view['log_scale'],
+            view['base_date'],
+            view['normalize_mode'],
+            indicator_values,
+            set(stale)
+        )
+    return figure, stream_state(view, ticker_data, figure, pending, stale)
+
+
+def patch_chart(
+    stream: Dict,
+    ticker_data: Dict[str, pd.DataFrame],
+    pending: List[str],
+    stale: List[str]
+) -> Tuple[Patch, Dict]:
+    """Patch the bars of tickers whose fetch finished into the chart.
+    
+    Bars after the last drawn one are appended to a ticker's traces and
+    its last drawn bar, which may have still been forming, is rewritten.
+    A ticker whose earlier bars changed, such as a backfilled gap, gets
+    its traces replaced, and one not drawn yet gets new ones. Indicator
+    traces are not patched; charts with indicators are redrawn instead.
+    
+    Args:
+        stream: Chart state as returned by stream_state
+        ticker_data: Shown bars of the finished tickers
+        pending: Tickers whose fetch has still not finished
+        stale: Tickers whose stored bars are out of date
+        
+    Returns:
+        Patch of the chart figure and the new chart state
+    """
+    view = stream['view']
+    mode = view['normalize_mode']
+    _, value_hover = _value_labels(view['normalize'], mode)
+    base_date = pd.Timestamp(view['base_date']) if view['base_date'] else None
+    traces, drawn, count = dict(stream['traces']), dict(stream['drawn']), stream['count']
+    patch = Patch()
+    
+    for ticker, df in ticker_data.items():
+        info = drawn.get(ticker)
+        if df.empty:
+            if info and ticker in stream['stale'] and ticker not in stale:
+                patch['data'][traces[ticker][0]]['opacity'] = 1.0
+                patch['data'][traces[ticker][0]]['line']['dash'] = 'solid'
+            continue
         
-    if reference_value == 0:
-        return df
+        last = pd.Timestamp(info['last']) if info else None
+        appendable = (
+            info is not None
+            and int(df.index.searchsorted(last, side='right')) == info['bars']
+            and df.index[info['bars'] - 1] == last
+            # A base date past the drawn bars may move to a new one
+            and (not view['normalize'] or base_date is None or base_date <= last)
+        )
+        if appendable and ticker not in stream['stale']:
+            # Nothing was fetched, the drawn bars are current
+            continue
+        if appendable:
+            price, volume = traces[ticker]
+            tail = df.iloc[info['bars'] - 1:]
+            values = tail['close'].to_numpy(dtype=np.float64)
+            if view['normalize']:
+                base = info['base'] if info['base'] is not None else np.nan
+                values = normalization.rebase_values(values, base, mode)
+            volumes = tail['volume'].tolist()
+            row = info['bars'] - 1
+            patch['data'][price]['y'][row] = float(values[0])
+            patch['data'][volume]['y'][row] = volumes[0]
+            if len(tail) > 1:
+                dates = [date.isoformat() for date in tail.index[1:]]
+                patch['data'][price]['x'].extend(dates)
+                patch['data'][price]['y'].extend(values[1:].tolist())
+                patch['data'][volume]['x'].extend(dates)
+                patch['data'][volume]['y'].extend(volumes[1:])
+            if ticker not in stale:
+                patch['data'][price]['opacity'] = 1.0
+                patch['data'][price]['line']['dash'] = 'solid'
+            drawn[ticker] = {'bars': len(df), 'last': df.index[-1].isoformat(), 'base': info['base']}
+            continue
         
-    return (df / reference_value) * 100
+        values, base = df['close'], None
+        if view['normalize']:
+            rebased, bases = normalization.normalize_with_bases({ticker: df}, view['base_date'], mode)
+            values, base = rebased[ticker], bases[ticker]
+        colors = THEME['chart_colors']
+        color = colors[view['tickers'].index(ticker) % len(colors)]
+        new_traces = _price_traces(ticker, df, color, values, value_hover, ticker in stale)
+        if ticker in traces:
+            for position, trace in zip(traces[ticker], new_traces):
+                patch['data'][position] = trace
+        else:
+            patch['data'].extend(new_traces)
+            traces[ticker] = [count, count + 1]
+            count += len(new_traces)
+        drawn[ticker] = {'bars': len(df), 'last': df.index[-1].isoformat(), 'base': base}
+    
+    return patch, {
+        **stream,
+        'pending': pending,
+        'stale': stale,
+        'traces': traces,
+        'count': count,
+        'drawn': drawn
+    }
 
 
 def register_chart_callbacks(app: Dash) -> None:
     """Register chart-related callbacks."""
-    
-    data_manager = DataManager()
 
     @app.callback(
-        Output('chart', 'figure'),
+        [
+            Output('chart', 'figure'),
+            Output('chart-range', 'data'),
+            Output('fetch-poll', 'disabled'),
+            Output('chart-stream', 'data'),
+            Output('normalize-base', 'value')
+        ],
         [
             Input('ticker-dropdown', 'value'),
             Input('interval-dropdown', 'value'),
@@ -56,9 +624,12 @@ def register_chart_callbacks(app: Dash) -> None:
             Input('update-button', 'n_clicks'),
             Input('log-scale-switch', 'value'),
             Input('normalize-switch', 'value'),
+            Input('normalize-mode', 'value'),
+            Input('normalize-base', 'value'),
+            Input('indicator-dropdown', 'value'),
             Input('chart', 'clickData')
         ],
-        [State('chart', 'figure')]
+        [State('chart-stream', 'data')]
     )
     def update_chart(
         tickers: List[str],
@@ -68,22 +639,40 @@ def register_chart_callbacks(app: Dash) -> None:
         n_clicks: int,
         log_scale: bool,
         normalize: bool,
+        normalize_mode: str,
+        normalize_base: str,
+        indicator_specs: List[str],
         click_data: Dict,
-        current_figure: Dict
-    ) -> Dict:
-        """Update the price chart."""
+        stream: Optional[Dict]
+    ) -> Tuple[Dict, Optional[Dict], bool, Dict, str]:
+        """Update the price chart.
+        
+        A refresh queues the tickers' fetches, those already drawn first,
+        and draws right away from the stored bars, marking tickers whose
+        bars are out of date. stream_chart then patches in the fetched
+        bars. Once every fetch has finished, the loaded selection is
+        published to the chart-range store for views that read the same
+        data.
+        
+        Normalized prices are rebased to the first visible bar, or to the
+        last clicked date while it is inside the shown range; clicking the
+        chart selects the clicked date.
+        """
         ctx = callback_context
         triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
         
         # Save current settings to state
         if triggered_id not in ['chart']:
-            StateManager.update_state({
-                'interval': interval,
-                'log_scale': log_scale,
-                'normalize': normalize,
-                'start_date': start_date,
-                'end_date': end_date
-            })
+            with span('chart.save_state'):
+                StateManager.update_state({
+                    'interval': interval,
+                    'log_scale': log_scale,
+                    'normalize': normalize,
+                    'normalize_mode': normalize_mode,
+                    'normalize_base': normalize_base,
+                    'start_date': start_date,
+                    'end_date': end_date
+                })
 
         # Handle empty tickers
         if not tickers:
@@ -113,9 +702,16 @@ def register_chart_callbacks(app: Dash) -> None:
                         'font': {'size': 16, 'color': THEME['text_primary']}
                     }]
                 }
-            }
+            }, None, True, None, no_update
 
         try:
+            # Imported here so SQLAlchemy and the provider load on the first
+            # chart request rather than at startup
+            from backend.data.manager import get_data_manager
+            from backend.data.fetch_queue import ADDED, VISIBLE, get_fetch_queue
+            data_manager = get_data_manager()
+            queue = get_fetch_queue()
+            
             # Convert dates
             if not start_date or not end_date:
                 end = datetime.now()
@@ -125,217 +721,56 @@ def register_chart_callbacks(app: Dash) -> None:
                 end = datetime.strptime(end_date, '%Y-%m-%d')
             
             # Only update data if not triggered by click or switches
-            if triggered_id not in ['chart', 'log-scale-switch', 'normalize-switch']:
-                data_manager.update_ticker_data(tickers, interval)
-            
-            # Load data
-            ticker_data = data_manager.load_data_for_tickers(
-                tickers,
-                start,
-                end,
-                interval
-            )
+            refresh = triggered_id not in [
+                'chart', 'log-scale-switch', 'normalize-switch', 'normalize-mode', 'normalize-base',
+                'indicator-dropdown'
+            ]
+            if refresh:
+                with span('chart.refresh', tickers=len(tickers)):
+                    stale = data_manager.find_stale_tickers(tickers, interval)
+                    drawn = stream['traces'] if stream else {}
+                    queue.submit([t for t in tickers if t in drawn], interval, VISIBLE, start, end)
+                    queue.submit([t for t in tickers if t not in drawn], interval, ADDED, start, end)
+            else:
+                stale = stream['stale'] if stream else []
+            pending = queue.pending(tickers, interval)
+            stale = still_stale(data_manager, stale, pending, interval)
             
-            # Get click point for normalization
-            click_point = None
+            # Normalize to the clicked date while it is shown, else to the
+            # first visible bar
+            base_date = StateManager.get_state('norm_date')
+            base_value = no_update
             if normalize and click_data and triggered_id == 'chart':
-                click_point = click_data['points'][0]
-            
-            # Create traces
-            traces = []
-            for i, (ticker, df) in enumerate(ticker_data.items()):
-                if not df.empty:
-                    color = THEME['chart_colors'][i % len(THEME['chart_colors'])]
-                    # Get the close prices
-                    close_prices = df['close']
-                    
-                    # Normalize if requested
-                    if normalize:
-                        close_prices = normalize_data(close_prices, click_point if click_point else None)
-                    
-                    traces.append(
-                        go.Scatter(
-                            x=df.index,
-                            y=close_prices,
-                            name=ticker,
-                            mode='lines',
-                            line=dict(
-                                color=color,
-                                width=2
-                            ),
-                            hovertemplate=(
-                                f"<b>{ticker}</b><br>" +
-                                "%{x}<br>" +
-                                ("Value: %{y:.1f}%<br>" if normalize else "Price: %{y:.2f}<br>") +
-                                "<extra></extra>"
-                            ),
-                            hoverlabel=dict(
-                                bgcolor=THEME['hover_bg'],
-                                bordercolor=color,
-                                font=dict(
-                                    color=THEME['text_primary'],
-                                    size=13
-                                )
-                            )
-                        )
-                    )
-                    
-                    # Add volume bars
-                    traces.append(
-                        go.Bar(
-                            x=df.index,
-                            y=df['volume'],
-                            name=f"{ticker} Volume",
-                            yaxis='y2',
-                            marker_color=color,
-                            opacity=0.3,
-                            hovertemplate=(
-                                f"<b>{ticker} Volume</b><br>" +
-                                "%{x}<br>" +
-                                "Volume: %{y:,.0f}<br>" +
-                                "<extra></extra>"
-                            ),
-                            hoverlabel=dict(
-                                bgcolor=THEME['hover_bg'],
-                                bordercolor=color,
-                                font=dict(
-                                    color=THEME['text_primary'],
-                                    size=13
-                                )
-                            ),
-                            visible='legendonly'
-                        )
-                    )
+                base_date = pd.Timestamp(click_data['points'][0]['x']).isoformat()
+                StateManager.set_state('norm_date', base_date)
+                normalize_base = base_value = 'clicked'
+            if normalize_base != 'clicked' or not base_date \
+                    or not start <= pd.Timestamp(base_date).to_pydatetime() <= end:
+                base_date = None
             
-            if not traces:
-                return {
-                    'data': [],
-                    'layout': {
-                        'title': {
-                            'text': 'No data available for selected tickers',
-                            'x': 0.5,
-                            'xanchor': 'center',
-                            'font': {'color': THEME['text_primary']}
-                        },
-                        'showlegend': True,
-                        'template': 'plotly_dark',
-                        'xaxis': {
-                            'title': 'Date',
-                            'rangeslider': {'visible': False},
-                            'showgrid': True,
-                            'gridcolor': THEME['grid'],
-                            'domain': [0, 1],
-                            'color': THEME['text_primary']
-                        },
-                        'yaxis': {
-                            'title': 'Normalized Price (%)' if normalize else 'Price',
-                            'showgrid': True,
-                            'gridcolor': THEME['grid'],
-                            'type': 'log' if log_scale else 'linear',
-                            'side': 'left',
-                            'color': THEME['text_primary']
-                        },
-                        'yaxis2': {
-                            'title': 'Volume',
-                            'showgrid': False,
-                            'side': 'right',
-                            'overlaying': 'y',
-                            'color': THEME['text_primary']
-                        },
-                        'paper_bgcolor': THEME['chart_outer_bg'],
-                        'plot_bgcolor': THEME['chart_inner_bg'],
-                        'font': {'color': THEME['text_primary']},
-                        'hovermode': 'closest',
-                        'hoverdistance': 50,
-                        'hoverlabel': {
-                            'bgcolor': THEME['hover_bg'],
-                            'font': {'size': 13},
-                            'align': 'right',
-                            'namelength': -1
-                        },
-                        'dragmode': 'zoom',
-                        'modebar': {
-                            'bgcolor': 'rgba(0,0,0,0)',
-                            'color': THEME['text_primary'],
-                            'activecolor': THEME['text_primary']
-                        },
-                        'legend': {
-                            'bgcolor': 'rgba(0,0,0,0)',
-                            'font': {'color': THEME['text_primary']},
-                            'bordercolor': THEME['border'],
-                            'borderwidth': 1
-                        },
-                        'margin': {'l': 60, 'r': 60, 't': 50, 'b': 50}
-                    }
-                }
-            
-            # Create figure
-            figure = {
-                'data': traces,
-                'layout': {
-                    'title': {
-                        'text': 'Normalized Price Chart (Click to change base point)' if normalize else 'Price Chart',
-                        'x': 0.5,
-                        'xanchor': 'center',
-                        'font': {'color': THEME['text_primary']}
-                    },
-                    'showlegend': True,
-                    'template': 'plotly_dark',
-                    'xaxis': {
-                        'title': 'Date',
-                        'rangeslider': {'visible': False},
-                        'showgrid': True,
-                        'gridcolor': THEME['grid'],
-                        'domain': [0, 1],
-                        'color': THEME['text_primary']
-                    },
-                    'yaxis': {
-                        'title': 'Normalized Price (%)' if normalize else 'Price',
-                        'showgrid': True,
-                        'gridcolor': THEME['grid'],
-                        'type': 'log' if log_scale else 'linear',
-                        'side': 'left',
-                        'color': THEME['text_primary']
-                    },
-                    'yaxis2': {
-                        'title': 'Volume',
-                        'showgrid': False,
-                        'side': 'right',
-                        'overlaying': 'y',
-                        'color': THEME['text_primary']
-                    },
-                    'paper_bgcolor': THEME['chart_outer_bg'],
-                    'plot_bgcolor': THEME['chart_inner_bg'],
-                    'font': {'color': THEME['text_primary']},
-                    'hovermode': 'closest',
-                    'hoverdistance': 50,
-                    'hoverlabel': {
-                        'bgcolor': THEME['hover_bg'],
-                        'font': {'size': 13},
-                        'align': 'right',
-                        'namelength': -1
-                    },
-                    'dragmode': 'zoom',
-                    'modebar': {
-                        'bgcolor': 'rgba(0,0,0,0)',
-                        'color': THEME['text_primary'],
-                        'activecolor': THEME['text_primary']
-                    },
-                    'legend': {
-                        'bgcolor': 'rgba(0,0,0,0)',
-                        'font': {'color': THEME['text_primary']},
-                        'bordercolor': THEME['border'],
-                        'borderwidth': 1
-                    },
-                    'margin': {'l': 60, 'r': 60, 't': 50, 'b': 50}
-                }
+            view = {
+                'tickers': tickers,
+                'interval': interval,
+                'start': start.strftime('%Y-%m-%d'),
+                'end': end.strftime('%Y-%m-%d'),
+                'log_scale': log_scale,
+                'normalize': normalize,
+                'normalize_mode': normalize_mode or 'index',
+                'indicators': indicator_specs or [],
+                'base_date': base_date
             }
+            figure, new_stream = render_chart(data_manager, view, pending, stale)
             
-            return figure
+            # Published once, when the last fetch has finished
+            published = no_update
+            if not pending and (refresh or (stream and stream['pending'])):
+                published = chart_range(view)
+            return figure, published, not pending, new_stream, base_value
             
         except Exception as e:
             print(f"Error updating chart: {str(e)}")
-            return current_figure or {
+            # Keep what is drawn
+            return (no_update if stream and stream['traces'] else {
                 'data': [],
                 'layout': {
                     'title': {
@@ -394,4 +829,56 @@ def register_chart_callbacks(app: Dash) -> None:
                     },
                     'margin': {'l': 60, 'r': 60, 't': 50, 'b': 50}
                 }
-            }
\ No newline at end of file
+            }, no_update, True, None, no_update)
+
+    @app.callback(
+        [
+            Output('chart', 'figure', allow_duplicate=True),
+            Output('chart-range', 'data', allow_duplicate=True),
+            Output('fetch-poll', 'disabled', allow_duplicate=True),
+            Output('chart-stream', 'data', allow_duplicate=True)
+        ],
+        [Input('fetch-poll', 'n_intervals')],
+        [State('chart-stream', 'data')],
+        prevent_initial_call=True
+    )
+    def stream_chart(n_polls: int, stream: Optional[Dict]) -> Tuple:
+        """Draw the bars of tickers whose fetch finished since the last draw.
+        
+        Only the changes go to the browser as a patch of the figure, see
+        patch_chart.
+        """
+        if not stream or not stream['pending']:
+            return no_update, no_update, True, no_update
+        
+        from backend.data.manager import get_data_manager
+        from backend.data.fetch_queue import get_fetch_queue
+        view = stream['view']
+        # Progress is shared by the server's workers, so this poll sees
+        # fetches queued by whichever worker drew the chart
+        pending = get_fetch_queue().pending(view['tickers'], view['interval'])
+        finished = [ticker for ticker in stream['pending'] if ticker not in pending]
+        if not finished:
+            raise PreventUpdate
+        
+        try:
+            data_manager = get_data_manager()
+            stale = still_stale(data_manager, stream['stale'], pending, view['interval'])
+            if view['indicators'] or not stream['traces']:
+                figure, stream = render_chart(data_manager, view, pending, stale)
+            else:
+                with span('chart.stream', tickers=len(finished)):
+                    ticker_data = data_manager.load_data_for_tickers(
+                        finished,
+                        datetime.strptime(view['start'], '%Y-%m-%d'),
+                        datetime.strptime(view['end'], '%Y-%m-%d'),
+                        view['interval']
+                    )
+                    figure, stream = patch_chart(stream, ticker_data, pending, stale)
+            
+            published = chart_range(view) if not pending else no_update
+            return figure, published, not pending, stream
+        
+        except Exception as e:
+            print(f"Error streaming chart: {str(e)}")
+            raise PreventUpdate
@@ -0,0 +1,219 @@
+"""Correlation view callbacks."""
+
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from dash import Dash, Input, Output, State
+import plotly.graph_objects as go
+from dash.exceptions import PreventUpdate
+
+from backend.utils.correlation import Correlation, get_correlation_cache
+from backend.utils.instrumentation import span
+from config.settings import THEME
+
+# Rolling window choices, in bars
+WINDOWS = [20, 60, 120, 250]
+
+# Cell values are written on the heatmap up to this many tickers
+ANNOTATE_MAX_TICKERS = 20
+
+
+def figure_layout(title: str, **extra) -> Dict:
+    """Layout shared by the analysis figures below and beside the chart."""
+    return {
+        'title': {
+            'text': title,
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'color': THEME['text_primary']}
+        },
+        'template': 'plotly_dark',
+        'paper_bgcolor': THEME['chart_outer_bg'],
+        'plot_bgcolor': THEME['chart_inner_bg'],
+        'font': {'color': THEME['text_primary']},
+        'hoverlabel': {
+            'bgcolor': THEME['hover_bg'],
+            'font': {'size': 13},
+            'namelength': -1
+        },
+        'legend': {
+            'bgcolor': 'rgba(0,0,0,0)',
+            'font': {'color': THEME['text_primary']},
+            'bordercolor': THEME['border'],
+            'borderwidth': 1
+        },
+        'margin': {'l': 60, 'r': 30, 't': 50, 'b': 50},
+        **extra
+    }
+
+
+def empty_figure(message: str) -> Dict:
+    """A figure showing only a message."""
+    return {'data': [], 'layout': figure_layout(message)}
+
+
+def build_heatmap(result: Correlation, measure: str = 'correlation') -> Dict:
+    """Heatmap of the pairwise correlation or covariance matrix.
+
+    Args:
+        result: Correlation statistics of the selected tickers
+        measure: 'correlation' or 'covariance'
+
+    Returns:
+        Figure dictionary for the heatmap component
+    """
+    values = result.correlation if measure == 'correlation' else result.covariance
+    # NaN is sent as null, which plotly leaves blank
+    z = np.where(np.isnan(values), None, values)
+    annotate = len(result.tickers) <= ANNOTATE_MAX_TICKERS
+    heatmap = go.Heatmap(
+        z=z,
+        x=result.tickers,
+        y=result.tickers,
+        colorscale='RdBu',
+        reversescale=True,
+        zmid=0,
+        zmin=-1 if measure == 'correlation' else None,
+        zmax=1 if measure == 'correlation' else None,
+        texttemplate='%{z:.2f}' if annotate and measure == 'correlation' else None,
+        customdata=result.counts,
+        hovertemplate=(
+            "%{y} / %{x}<br>"
+            + ("Correlation: %{z:.3f}<br>" if measure == 'correlation' else "Covariance: %{z:.3g}<br>")
+            + "Returns: %{customdata}<extra></extra>"
+        )
+    )
+    return {
+        'data': [heatmap],
+        'layout': figure_layout(
+            'Return Correlation' if measure == 'correlation' else 'Return Covariance',
+            xaxis={'tickangle': -45, 'color': THEME['text_primary']},
+            yaxis={'autorange': 'reversed', 'color': THEME['text_primary']}
+        )
+    }
+
+
+def build_rolling_figure(result: Correlation, benchmark: Optional[str], window: int) -> Dict:
+    """Rolling correlation of every ticker with the benchmark.
+
+    Args:
+        result: Correlation statistics of the selected tickers
+        benchmark: Ticker the correlations are against
+        window: Bars in a rolling window
+
+    Returns:
+        Figure dictionary for the rolling correlation component
+    """
+    if not result.rolling:
+        return empty_figure('Select a benchmark')
+
+    traces = []
+    dates = result.dates
+    for i, ticker in enumerate(result.tickers):
+        if ticker == benchmark:
+            continue
+        values = result.rolling[ticker]
+        shown = ~np.isnan(values)
+        if not shown.any():
+            continue
+        traces.append(
+            go.Scatter(
+                x=dates[shown],
+                y=values[shown],
+                name=ticker,
+                mode='lines',
+                line={'color': THEME['chart_colors'][i % len(THEME['chart_colors'])], 'width': 1.5},
+                hovertemplate=f"<b>{ticker}</b><br>Correlation: %{{y:.2f}}<br>%{{x|%Y-%m-%d}}<extra></extra>"
+            )
+        )
+    return {
+        'data': traces,
+        'layout': figure_layout(
+            f'{window}-Bar Correlation with {benchmark}',
+            showlegend=True,
+            hovermode='closest',
+            xaxis={'showgrid': True, 'gridcolor': THEME['grid'], 'color': THEME['text_primary']},
+            yaxis={
+                'range': [-1.05, 1.05],
+                'showgrid': True,
+                'gridcolor': THEME['grid'],
+                'zeroline': True,
+                'color': THEME['text_primary']
+            }
+        )
+    }
+
+
+def register_correlation_callbacks(app: Dash) -> None:
+    """Register correlation view callbacks."""
+
+    @app.callback(
+        [
+            Output('benchmark-dropdown', 'options'),
+            Output('benchmark-dropdown', 'value')
+        ],
+        [Input('ticker-dropdown', 'value')],
+        [State('benchmark-dropdown', 'value')]
+    )
+    def update_benchmark_options(tickers: List[str], benchmark: str) -> Tuple[List[Dict], Optional[str]]:
+        """Offer the selected tickers as benchmarks, keeping the current one."""
+        tickers = tickers or []
+        if benchmark not in tickers:
+            benchmark = tickers[0] if tickers else None
+        return [{'label': ticker, 'value': ticker} for ticker in tickers], benchmark
+
+    @app.callback(
+        [
+            Output('correlation-heatmap', 'figure'),
+            Output('rolling-correlation', 'figure')
+        ],
+        [
+            Input('chart-range', 'data'),
+            Input('benchmark-dropdown', 'value'),
+            Input('correlation-window', 'value'),
+            Input('correlation-measure', 'value')
+        ]
+    )
+    def update_correlation(
+        chart_range: Dict,
+        benchmark: str,
+        window: int,
+        measure: str
+    ) -> Tuple[Dict, Dict]:
+        """Update the correlation heatmap and rolling correlations.
+
+        Runs after the price chart has loaded the selection, so the data
+        it reads is already stored.
+        """
+        if not chart_range:
+            message = 'Select tickers to compare'
+            return empty_figure(message), empty_figure(message)
+        if len(chart_range['tickers']) < 2:
+            message = 'Select at least two tickers'
+            return empty_figure(message), empty_figure(message)
+
+        try:
+            from backend.data.manager import get_data_manager
+
+            start = datetime.strptime(chart_range['start'], '%Y-%m-%d')
+            end = datetime.strptime(chart_range['end'], '%Y-%m-%d')
+            with span('correlation.load', tickers=len(chart_range['tickers'])):
+                ticker_data = get_data_manager().load_data_for_tickers(
+                    chart_range['tickers'], start, end, chart_range['interval']
+                )
+
+            window = int(window or WINDOWS[1])
+            with span('correlation.compute', tickers=len(ticker_data)):
+                result = get_correlation_cache().compute(
+                    ticker_data, chart_range['interval'], start, end, window, benchmark
+                )
+
+            with span('correlation.figure'):
+                return (
+                    build_heatmap(result, measure or 'correlation'),
+                    build_rolling_figure(result, benchmark, window)
+                )
+
+        except Exception as e:
+            print(f"Error updating correlation: {str(e)}")
+            raise PreventUpdate
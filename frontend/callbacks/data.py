@@ -6,16 +6,45 @@ from dash import Dash, Input, Output, State, callback_context
 from dash.exceptions import PreventUpdate
 from datetime import datetime, timedelta
 
-from backend.data.manager import DataManager
 from core.ticker_manager import TickerManager
 from core.state_manager import StateManager
 
 
+# Symbols of the whole universe offered for a search
+SEARCH_LIMIT = 50
+
+
+def search_tickers(available_tickers: List[Dict], search_value: str) -> List[Dict]:
+    """Filter dropdown options to those whose label contains the search.
+    
+    Matches from the symbol universe follow the listed tickers.
+    """
+    from backend.data.universe import get_universe
+    
+    search_upper = search_value.upper()
+    options = [
+        ticker for ticker in available_tickers
+        if search_upper in ticker['label'].upper()
+    ]
+    listed = {option['value'] for option in options}
+    universe = get_universe()
+    for row in universe.search(search_value, SEARCH_LIMIT):
+        match = universe.row(row)
+        if match['ticker'] not in listed:
+            options.append({'label': f"{match['ticker']} - {match['name']}", 'value': match['ticker']})
+    return options
+
+
+def with_selected(options: List[Dict], tickers: List[str]) -> List[Dict]:
+    """Add options for selected tickers missing from a list of options."""
+    listed = {option['value'] for option in options}
+    missing = [{'label': ticker, 'value': ticker} for ticker in tickers if ticker not in listed]
+    return options + missing if missing else options
+
+
 def register_data_callbacks(app: Dash) -> None:
     """Register data-related callbacks."""
     
-    data_manager = DataManager()
-    
     @app.callback(
         [
             Output('ticker-dropdown', 'value'),
@@ -48,20 +77,15 @@ def register_data_callbacks(app: Dash) -> None:
         if trigger_id == 'category-dropdown' and category:
             # Add all tickers from selected category
             category_tickers = TickerManager.get_tickers_by_category(category)
-            new_tickers = list(set(current_tickers + category_tickers))
+            # Appended in list order, so fetches start with the first
+            new_tickers = current_tickers + [t for t in category_tickers if t not in current_tickers]
             TickerManager.set_selected_tickers(new_tickers)
-            return new_tickers, available_tickers
+            return new_tickers, with_selected(available_tickers, new_tickers)
             
         elif trigger_id == 'ticker-dropdown' and search_value:
-            # Filter available tickers based on search
-            search_upper = search_value.upper()
-            filtered_tickers = [
-                ticker for ticker in available_tickers
-                if search_upper in ticker['label'].upper()
-            ]
-            return current_tickers, filtered_tickers
+            return current_tickers, with_selected(search_tickers(available_tickers, search_value), current_tickers)
             
-        return current_tickers, available_tickers
+        return current_tickers, with_selected(available_tickers, current_tickers)
     
     @app.callback(
         [
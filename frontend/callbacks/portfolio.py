@@ -0,0 +1,232 @@
+"""Portfolio backtest callbacks."""
+
+from typing import Dict, List, Tuple
+from datetime import datetime
+import numpy as np
+from dash import Dash, Input, Output, State
+import plotly.graph_objects as go
+from dash.exceptions import PreventUpdate
+
+from backend.utils import portfolio
+from backend.utils.instrumentation import span
+from config.settings import THEME
+from .correlation import empty_figure, figure_layout
+
+# Portfolios always backtested besides the random ones
+NAMED_PORTFOLIOS = ['Custom', 'Equal weight', 'Inverse volatility']
+
+# Random portfolios are reproducible for the same selection
+SWEEP_SEED = 0
+
+
+def build_portfolio_figure(result: portfolio.Backtest, names: List[str]) -> Dict:
+    """Equity curves with their drawdowns in a panel below.
+
+    Args:
+        result: Backtest of the portfolios
+        names: Names of the first portfolios of the batch, which are drawn
+
+    Returns:
+        Figure dictionary for the portfolio chart component
+    """
+    traces = []
+    for i, name in enumerate(names):
+        color = THEME['chart_colors'][i % len(THEME['chart_colors'])]
+        traces.append(go.Scatter(
+            x=result.dates,
+            y=result.equity[:, i] * 100.0,
+            name=name,
+            legendgroup=name,
+            mode='lines',
+            line={'color': color, 'width': 2},
+            hovertemplate=f"<b>{name}</b><br>Value: %{{y:.1f}}<br>%{{x|%Y-%m-%d}}<extra></extra>"
+        ))
+        traces.append(go.Scatter(
+            x=result.dates,
+            y=result.drawdown[:, i] * 100.0,
+            name=name,
+            legendgroup=name,
+            showlegend=False,
+            mode='lines',
+            fill='tozeroy',
+            line={'color': color, 'width': 1},
+            yaxis='y2',
+            hovertemplate=f"<b>{name}</b><br>Drawdown: %{{y:.1f}}%<br>%{{x|%Y-%m-%d}}<extra></extra>"
+        ))
+    return {
+        'data': traces,
+        'layout': figure_layout(
+            'Portfolio Value (start = 100)',
+            showlegend=True,
+            hovermode='closest',
+            xaxis={'showgrid': True, 'gridcolor': THEME['grid'], 'color': THEME['text_primary']},
+            yaxis={
+                'title': 'Value',
+                'domain': [0.32, 1],
+                'showgrid': True,
+                'gridcolor': THEME['grid'],
+                'color': THEME['text_primary']
+            },
+            yaxis2={
+                'title': 'Drawdown (%)',
+                'domain': [0, 0.26],
+                'anchor': 'x',
+                'showgrid': True,
+                'gridcolor': THEME['grid'],
+                'color': THEME['text_primary']
+            }
+        )
+    }
+
+
+def build_sweep_figure(result: portfolio.Backtest, names: List[str]) -> Dict:
+    """Volatility against CAGR of every portfolio, colored by Sharpe."""
+    named = len(names)
+    stats = result.stats
+    sweep = go.Scatter(
+        x=stats['volatility'][named:],
+        y=stats['cagr'][named:],
+        name='Random',
+        mode='markers',
+        marker={
+            'size': 5,
+            'color': stats['sharpe'][named:],
+            'colorscale': 'Viridis',
+            'showscale': True,
+            'colorbar': {'title': 'Sharpe'}
+        },
+        hovertemplate="Volatility: %{x:.1f}%<br>CAGR: %{y:.1f}%<br>Sharpe: %{marker.color:.2f}<extra></extra>"
+    )
+    marked = go.Scatter(
+        x=stats['volatility'][:named],
+        y=stats['cagr'][:named],
+        text=names,
+        name='Named',
+        mode='markers+text',
+        textposition='top center',
+        marker={'size': 10, 'color': THEME['text_primary'], 'symbol': 'diamond'},
+        hovertemplate="<b>%{text}</b><br>Volatility: %{x:.1f}%<br>CAGR: %{y:.1f}%<extra></extra>"
+    )
+    return {
+        'data': [sweep, marked],
+        'layout': figure_layout(
+            f'{len(result.weights) - named:,} Random Portfolios',
+            showlegend=False,
+            hovermode='closest',
+            xaxis={'title': 'Volatility (%)', 'showgrid': True, 'gridcolor': THEME['grid'], 'color': THEME['text_primary']},
+            yaxis={'title': 'CAGR (%)', 'showgrid': True, 'gridcolor': THEME['grid'], 'color': THEME['text_primary']}
+        )
+    }
+
+
+def _stats_row(name: str, result: portfolio.Backtest, index: int) -> Dict:
+    """Row of the statistics table for one portfolio."""
+    row = {'name': name}
+    for stat, values in result.stats.items():
+        value = values[index]
+        row[stat] = None if np.isnan(value) else round(float(value), 2)
+    return row
+
+
+def register_portfolio_callbacks(app: Dash) -> None:
+    """Register portfolio backtest callbacks."""
+
+    @app.callback(
+        Output('portfolio-weights', 'data'),
+        [Input('ticker-dropdown', 'value')],
+        [State('portfolio-weights', 'data')]
+    )
+    def sync_weights(tickers: List[str], rows: List[Dict]) -> List[Dict]:
+        """Keep one weight per selected ticker, 1 for new ones."""
+        weights = {row['ticker']: row.get('weight') for row in rows or []}
+        return [{'ticker': ticker, 'weight': weights.get(ticker, 1)} for ticker in tickers or []]
+
+    @app.callback(
+        [
+            Output('portfolio-chart', 'figure'),
+            Output('portfolio-stats', 'data'),
+            Output('portfolio-sweep-chart', 'figure')
+        ],
+        [
+            Input('portfolio-run', 'n_clicks'),
+            Input('chart-range', 'data')
+        ],
+        [
+            State('portfolio-weights', 'data'),
+            State('portfolio-rebalance', 'value'),
+            State('portfolio-cost', 'value'),
+            State('portfolio-risk-free', 'value'),
+            State('portfolio-sweep', 'value')
+        ]
+    )
+    def update_portfolio(
+        n_clicks: int,
+        chart_range: Dict,
+        rows: List[Dict],
+        schedule: str,
+        cost_bps: float,
+        risk_free: float,
+        sweep: int
+    ) -> Tuple[Dict, List[Dict], Dict]:
+        """Backtest the custom weights, the reference portfolios and a sweep.
+
+        All portfolios run in one batch over the selection the price chart
+        loaded.
+        """
+        no_sweep = empty_figure('Add random portfolios to compare')
+        if not chart_range or not rows:
+            return empty_figure('Select tickers to backtest'), [], no_sweep
+
+        try:
+            from backend.data.manager import get_data_manager
+
+            tickers = [row['ticker'] for row in rows]
+            with span('portfolio.load', tickers=len(tickers)):
+                ticker_data = get_data_manager().load_data_for_tickers(
+                    tickers,
+                    datetime.strptime(chart_range['start'], '%Y-%m-%d'),
+                    datetime.strptime(chart_range['end'], '%Y-%m-%d'),
+                    chart_range['interval']
+                )
+            ticker_data = {ticker: ticker_data[ticker] for ticker in tickers if ticker in ticker_data}
+            if not ticker_data:
+                return empty_figure('No data for the selected tickers'), [], no_sweep
+
+            custom = np.array([
+                max(float(row.get('weight') or 0), 0.0) for row in rows if row['ticker'] in ticker_data
+            ])
+            sweep = int(sweep or 0)
+            weights = np.vstack([
+                custom,
+                np.ones(len(ticker_data)),
+                portfolio.inverse_volatility_weights(ticker_data),
+                portfolio.random_weights(sweep, len(ticker_data), SWEEP_SEED)
+            ])
+
+            with span('portfolio.backtest', portfolios=len(weights)):
+                result = portfolio.get_backtest_cache().backtest(
+                    ticker_data,
+                    weights,
+                    schedule or 'monthly',
+                    float(cost_bps or 0),
+                    float(risk_free or 0) / 100.0
+                )
+            if len(result.dates) < 2:
+                return empty_figure('Not enough common history to backtest'), [], no_sweep
+
+            names = list(NAMED_PORTFOLIOS)
+            stats = [_stats_row(name, result, i) for i, name in enumerate(names)]
+            if sweep and np.isfinite(result.stats['sharpe'][len(names):]).any():
+                best = len(names) + int(np.nanargmax(result.stats['sharpe'][len(names):]))
+                stats.append(_stats_row(f'Best Sharpe of {sweep:,} random', result, best))
+
+            with span('portfolio.figure'):
+                return (
+                    build_portfolio_figure(result, names),
+                    stats,
+                    build_sweep_figure(result, names) if sweep else no_sweep
+                )
+
+        except Exception as e:
+            print(f"Error running backtest: {str(e)}")
+            raise PreventUpdate
@@ -0,0 +1,107 @@
+"""Screener callbacks."""
+
+import time
+from typing import Dict, List, Optional, Tuple
+from dash import Dash, Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from backend.data.screener import METRICS
+from backend.utils.instrumentation import span
+from frontend.components.screener_panel import PAGE_SIZE
+
+
+def _number(value) -> Optional[float]:
+    """A numeric input value, None when empty."""
+    return None if value in (None, '') else float(value)
+
+
+def register_screener_callbacks(app: Dash) -> None:
+    """Register screener callbacks."""
+
+    @app.callback(
+        [
+            Output('screener-table', 'data'),
+            Output('screener-table', 'page_count'),
+            Output('screener-table', 'selected_rows'),
+            Output('screener-status', 'children')
+        ],
+        [
+            Input('screener-button', 'n_clicks'),
+            Input('screener-table', 'sort_by'),
+            Input('screener-table', 'page_current')
+        ],
+        [
+            State('screener-return-bars', 'value'),
+            State('screener-volatility-bars', 'value'),
+            State('screener-volume-bars', 'value'),
+            *[State(f'screener-{name}-min', 'value') for name in METRICS],
+            *[State(f'screener-{name}-max', 'value') for name in METRICS]
+        ],
+        prevent_initial_call=True
+    )
+    def update_screener(
+        n_clicks: int,
+        sort_by: List[Dict],
+        page_current: int,
+        return_bars: int,
+        volatility_bars: int,
+        volume_bars: int,
+        *bounds
+    ) -> Tuple[List[Dict], int, List[int], str]:
+        """Screen the local universe and show one page of the matches."""
+        from backend.data.screener import get_screener
+
+        lows, highs = bounds[:len(METRICS)], bounds[len(METRICS):]
+        conditions = {
+            name: (_number(low), _number(high))
+            for name, low, high in zip(METRICS, lows, highs)
+            if _number(low) is not None or _number(high) is not None
+        }
+        sort = sort_by[0] if sort_by else {'column_id': 'return', 'direction': 'desc'}
+
+        try:
+            started = time.perf_counter()
+            with span('screener.screen', conditions=len(conditions)):
+                rows, total = get_screener().screen(
+                    conditions,
+                    return_bars=int(return_bars or 20),
+                    volatility_bars=int(volatility_bars or 20),
+                    volume_bars=int(volume_bars or 20),
+                    sort_by=sort['column_id'],
+                    descending=sort['direction'] == 'desc',
+                    offset=(page_current or 0) * PAGE_SIZE,
+                    limit=PAGE_SIZE
+                )
+            elapsed = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            print(f"Error screening: {str(e)}")
+            raise PreventUpdate
+
+        universe = len(get_screener().universe)
+        status = f"{total:,} of {universe:,} tickers match ({elapsed:.0f} ms)"
+        return rows, max(1, -(-total // PAGE_SIZE)), [], status
+
+    @app.callback(
+        Output('ticker-dropdown', 'value', allow_duplicate=True),
+        [Input('screener-add', 'n_clicks')],
+        [
+            State('screener-table', 'data'),
+            State('screener-table', 'selected_rows'),
+            State('ticker-dropdown', 'value')
+        ],
+        prevent_initial_call=True
+    )
+    def add_screened_tickers(
+        n_clicks: int,
+        rows: List[Dict],
+        selected_rows: List[int],
+        current_tickers: List[str]
+    ) -> List[str]:
+        """Add the selected screener rows to the charted tickers."""
+        if not n_clicks or not rows or not selected_rows:
+            raise PreventUpdate
+        current_tickers = list(current_tickers or [])
+        for index in selected_rows:
+            if index < len(rows) and rows[index]['ticker'] not in current_tickers:
+                current_tickers.append(rows[index]['ticker'])
+        return current_tickers
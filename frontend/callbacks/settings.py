@@ -1,6 +1,5 @@
 """Settings-related callbacks."""
 
-import json
 from typing import Dict, List
 from dash import Dash, Input, Output, State, ALL, ctx
 import dash_bootstrap_components as dbc
@@ -8,24 +7,11 @@ from core.state_manager import StateManager
 
 def save_app_state(app_state):
     """Save app state to file."""
-    try:
-        print("Saving app state:", app_state)
-        with open('app_state.json', 'w') as f:
-            json.dump(app_state, f, indent=4)
-        print("App state saved successfully")
-    except Exception as e:
-        print(f"Error saving app state: {e}")
+    StateManager.save_state(app_state)
 
 def load_app_state():
-    """Load app state from file."""
-    try:
-        with open('app_state.json', 'r') as f:
-            state = json.load(f)
-            print("Loaded app state:", state)
-            return state
-    except Exception as e:
-        print(f"Error loading app state: {e}")
-        return {}
+    """Load app state, read from file once and then kept in memory."""
+    return StateManager.load_state()
 
 def register_settings_callbacks(app: Dash) -> None:
     """Register settings-related callbacks."""
@@ -49,14 +35,8 @@ def register_settings_callbacks(app: Dash) -> None:
     )
     def update_theme(new_theme, current_theme):
         """Update the theme and persist the selection."""
-        print("Theme callback triggered")
-        print("New theme:", new_theme)
-        print("Current theme:", current_theme)
-        print("Triggered by:", ctx.triggered_id)
-        
         # If this is an automatic trigger (not user action), keep current theme
         if not ctx.triggered_id:
-            print("Automatic trigger - keeping current theme")
             app_state = load_app_state()
             saved_theme = app_state.get('theme')
             if saved_theme:
@@ -64,17 +44,14 @@ def register_settings_callbacks(app: Dash) -> None:
             return current_theme, current_theme
             
         if not new_theme:
-            print("No theme selected, using default")
             return dbc.themes.DARKLY, dbc.themes.DARKLY
             
         # Only save if this is a user change
         if new_theme != current_theme:
-            print("Theme changed by user, saving...")
             try:
                 app_state = load_app_state()
                 app_state['theme'] = new_theme
                 save_app_state(app_state)
-                print("Theme saved successfully:", new_theme)
             except Exception as e:
                 print(f"Error saving theme: {e}")
             
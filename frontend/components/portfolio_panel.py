@@ -0,0 +1,106 @@
+"""Portfolio panel component."""
+
+from dash import html, dcc, dash_table
+import dash_bootstrap_components as dbc
+
+from backend.utils.portfolio import STATS
+from config.settings import THEME
+
+# Rebalancing schedule choices
+REBALANCE_OPTIONS = [
+    {'label': 'Buy and hold', 'value': 'none'},
+    {'label': 'Every bar', 'value': 'bar'},
+    {'label': 'Weekly', 'value': 'weekly'},
+    {'label': 'Monthly', 'value': 'monthly'},
+    {'label': 'Quarterly', 'value': 'quarterly'},
+    {'label': 'Yearly', 'value': 'yearly'}
+]
+
+TABLE_STYLE = {
+    'style_header': {
+        'backgroundColor': THEME['chart_outer_bg'],
+        'color': THEME['text_primary'],
+        'fontWeight': 'bold',
+        'border': f"1px solid {THEME['border']}"
+    },
+    'style_cell': {
+        'backgroundColor': THEME['sidebar_bg'],
+        'color': THEME['text_primary'],
+        'border': f"1px solid {THEME['border']}",
+        'padding': '4px 8px'
+    }
+}
+
+
+def create_number_input(label, input_id, value, width=2, **kwargs):
+    """Create a labelled numeric input."""
+    return dbc.Col([
+        html.Label(label, className="mb-2"),
+        dbc.Input(id=input_id, type="number", value=value,
+                  persistence=True, persistence_type='local', **kwargs)
+    ], width=width)
+
+
+def create_portfolio_panel():
+    """Create the portfolio backtest panel."""
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.Label("Rebalancing", className="mb-2"),
+                dcc.Dropdown(
+                    id='portfolio-rebalance',
+                    options=REBALANCE_OPTIONS,
+                    value='monthly',
+                    clearable=False,
+                    className="dash-dropdown-dark",
+                    persistence=True,
+                    persistence_type='local'
+                )
+            ], width=3),
+            create_number_input("Cost (bps)", 'portfolio-cost', 5, min=0),
+            create_number_input("Risk-free %", 'portfolio-risk-free', 0, step=0.1),
+            create_number_input("Random Portfolios", 'portfolio-sweep', 0, min=0, max=5000, step=1),
+            dbc.Col([
+                dbc.Button("Run Backtest", id='portfolio-run', color="primary")
+            ], width=3, className="d-flex align-items-end justify-content-end")
+        ], className="mb-3"),
+        
+        dbc.Row([
+            # Weights of the selected tickers, scaled to sum to 100%
+            dbc.Col([
+                html.Label("Weights", className="mb-2"),
+                dash_table.DataTable(
+                    id='portfolio-weights',
+                    columns=[
+                        {'name': 'Ticker', 'id': 'ticker', 'editable': False},
+                        {'name': 'Weight', 'id': 'weight', 'type': 'numeric', 'editable': True}
+                    ],
+                    data=[],
+                    editable=True,
+                    style_table={'maxHeight': '60vh', 'overflowY': 'auto'},
+                    **TABLE_STYLE
+                )
+            ], width=3),
+            dbc.Col([
+                dcc.Graph(id='portfolio-chart', style={"height": "60vh"}, config={'displaylogo': False})
+            ], width=9)
+        ], className="mb-3"),
+        
+        dash_table.DataTable(
+            id='portfolio-stats',
+            columns=[{'name': 'Portfolio', 'id': 'name'}] + [
+                {'name': title, 'id': name, 'type': 'numeric'} for name, title in STATS.items()
+            ],
+            data=[],
+            **TABLE_STYLE
+        ),
+        
+        # Risk and return of every portfolio of a sweep
+        dcc.Graph(id='portfolio-sweep-chart', style={"height": "50vh"}, config={'displaylogo': False})
+    ], id="portfolio-container", style={
+        "margin": "1rem",
+        "padding": "1rem",
+        "backgroundColor": THEME['sidebar_bg'],
+        "borderRadius": "10px",
+        "border": f"1px solid {THEME['border']}"
+    })
@@ -0,0 +1,96 @@
+"""Screener panel component."""
+
+from dash import html, dash_table
+import dash_bootstrap_components as dbc
+
+from backend.data.screener import METRICS
+from config.settings import THEME
+
+PAGE_SIZE = 50
+
+# Ticker, last bar and close, then one column per metric
+COLUMNS = [
+    {'name': 'Ticker', 'id': 'ticker'},
+    {'name': 'Last Bar', 'id': 'date'},
+    {'name': 'Close', 'id': 'close', 'type': 'numeric'},
+    *[{'name': title, 'id': name, 'type': 'numeric'} for name, title in METRICS.items()]
+]
+
+
+def create_bar_input(label, input_id, value):
+    """Create a labelled input for a number of bars."""
+    return dbc.Col([
+        html.Label(label, className="mb-2"),
+        dbc.Input(id=input_id, type="number", min=1, step=1, value=value,
+                  persistence=True, persistence_type='local')
+    ], width=2)
+
+
+def create_condition_inputs(name, title):
+    """Create the minimum and maximum inputs of one metric."""
+    return dbc.Col([
+        html.Label(title, className="mb-2"),
+        dbc.InputGroup([
+            dbc.Input(id=f'screener-{name}-min', type="number", placeholder="min",
+                      persistence=True, persistence_type='local'),
+            dbc.Input(id=f'screener-{name}-max', type="number", placeholder="max",
+                      persistence=True, persistence_type='local')
+        ], size="sm")
+    ], width=3)
+
+
+def create_screener_panel():
+    """Create the screener panel."""
+    return html.Div([
+        # Windows of the metrics
+        dbc.Row([
+            create_bar_input("Return Bars", 'screener-return-bars', 20),
+            create_bar_input("Volatility Bars", 'screener-volatility-bars', 20),
+            create_bar_input("Volume Bars", 'screener-volume-bars', 20),
+            dbc.Col([
+                dbc.Button("Scan", id='screener-button', color="primary", className="me-2"),
+                dbc.Button("Add to Chart", id='screener-add', color="secondary")
+            ], width=6, className="d-flex align-items-end justify-content-end")
+        ], className="mb-3"),
+        
+        # Conditions
+        dbc.Row([
+            create_condition_inputs(name, title) for name, title in METRICS.items()
+        ], className="mb-3"),
+        
+        html.Div(id='screener-status', className="mb-2", style={"opacity": "0.8"}),
+        
+        # Results, sorted and paged on the server
+        dash_table.DataTable(
+            id='screener-table',
+            columns=COLUMNS,
+            data=[],
+            page_current=0,
+            page_size=PAGE_SIZE,
+            page_count=1,
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[{'column_id': 'return', 'direction': 'desc'}],
+            row_selectable='multi',
+            selected_rows=[],
+            style_header={
+                'backgroundColor': THEME['chart_outer_bg'],
+                'color': THEME['text_primary'],
+                'fontWeight': 'bold',
+                'border': f"1px solid {THEME['border']}"
+            },
+            style_cell={
+                'backgroundColor': THEME['sidebar_bg'],
+                'color': THEME['text_primary'],
+                'border': f"1px solid {THEME['border']}",
+                'padding': '4px 8px'
+            }
+        )
+    ], id="screener-container", style={
+        "margin": "1rem",
+        "padding": "1rem",
+        "backgroundColor": THEME['sidebar_bg'],
+        "borderRadius": "10px",
+        "border": f"1px solid {THEME['border']}"
+    })
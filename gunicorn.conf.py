@@ -0,0 +1,22 @@
+"""Gunicorn settings for serving wsgi:server."""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = 120
+
+# Each worker imports the app itself so no SQLite connection crosses a fork;
+# hot series are shared through the shared cache directory instead
+preload_app = False
+
+accesslog = '-'
+
+
+def on_starting(server):
+    """Drop the worker metrics files of the last run, see backend/utils/metrics.py."""
+    from backend.utils.metrics import clear_worker_metrics
+    clear_worker_metrics()
@@ -0,0 +1,19 @@
+"""WSGI entry point for production servers.
+
+Run with a pre-fork server, e.g.:
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+The Dash dev tools and Flask debug mode stay off since the app is not
+started through run_server. Responses are compressed with Flask-Compress,
+and each worker restores the cache snapshot before it serves.
+"""
+
+from flask_compress import Compress
+
+from app import app, warm_up
+
+server = app.server
+Compress(server)
+
+# Workers load the last selected tickers before accepting requests
+warm_up()